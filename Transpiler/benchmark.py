@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+"""Benchmarks for the transpiler phases over synthetic Hinglish programs.
+
+Usage: python benchmark.py [benchmark ...]   (runs every benchmark by default)
+"""
+
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+from lexer import Lexer, tokenize_parallel
+from parser import Parser
+
+
+def make_program(functions=1000):
+    """Generate a program with the given number of functions plus a main"""
+    parts = []
+    for i in range(functions):
+        parts.append(f'''
+vidhi func_{i}(ank n, sankhya scale) ank {{
+    # generated body {i}
+    ank total = 0;
+    vakya label = "function number {i}";
+    karo (ank k = 0; k < n; k = k + 1) {{
+        agar (k / 3 == 1 aur total < 1000) {{
+            total = total + k * 2 - {i};
+        }} nahi_to {{
+            total = total - 1;
+        }}
+    }}
+    wapas total;
+}}
+''')
+    parts.append('''
+vidhi main() {
+    likho(func_0(10, 1.5));
+    wapas 0;
+}
+''')
+    return "".join(parts)
+
+
+def make_expression_program(statements=1000):
+    """Generate a main made of long arithmetic and logical expressions"""
+    lines = ["vidhi f(ank x, ank y, ank z) ank {", "    wapas x + y * z;", "}",
+             "vidhi main() {", "    ank a = 1;", "    ank b = 2;", "    ank c = 3;"]
+    for i in range(statements):
+        lines.append(f"    a = (a + b * c - {i}) / (b + 1) + -c * (a - b) + f(a, b + c, {i});")
+        lines.append(f"    agar (a < b aur b >= c ya nahi (a == {i}) aur c != a + b * 2) {{ b = b + 1; }}")
+    lines.append("    wapas 0;")
+    lines.append("}")
+    return "\n".join(lines)
+
+
+def make_constant_program(statements=1000):
+    """Generate a machine-written main: named constants, literal arithmetic
+    and feature switches that are fixed at generation time"""
+    lines = ["ank DEBUG = 0;", "ank SCALE = 4;", "vidhi main() {", "    ank total = 0;"]
+    for i in range(statements):
+        lines.append(f"    ank size_{i} = {i} * SCALE + 2 * 8;")
+        lines.append(f"    agar (DEBUG == 1 ya size_{i} > {i * 8}) {{ likho(size_{i}); }} "
+                     f"nahi_to {{ total = total + size_{i} / 2; }}")
+        lines.append(f"    jabtak (DEBUG > 0 aur total < {i}) {{ total = total + 1; }}")
+    lines.append("    likho(total);")
+    lines.append("}")
+    return "\n".join(lines)
+
+
+def make_loop_program(size=300):
+    """Generate nested loops, with constant bounds so they certainly run,
+    whose bodies recompute values that only depend on the function's
+    parameters, including calls to a pure helper"""
+    return f"""
+vidhi weight(ank a, ank b) ank {{
+    wapas a * a + b * 3 - a * b;
+}}
+vidhi scan(ank w, ank h) ank {{
+    ank total = 0;
+    karo (ank y = 0; y < {size}; y = y + 1) {{
+        karo (ank x = 0; x < {size * 3 // 2}; x = x + 1) {{
+            total = total + weight(w, h) * (w - h) + x * (w * h + 7) - y;
+            agar (total > w * h * 1000) {{
+                total = total - (w + h) * (w - h);
+            }}
+        }}
+    }}
+    wapas total;
+}}
+vidhi main() {{
+    likho(scan({size}, {size // 2}));
+}}
+"""
+
+
+def make_nested_program(depth=40, statements=2000):
+    """Generate a main whose body sits inside depth nested blocks, reading
+    variables declared at the outermost levels"""
+    lines = ["vidhi main() {"]
+    lines += [f"ank v{level} = {level};" for level in range(4)]
+    lines += ["{"] * depth
+    for i in range(statements):
+        lines.append(f"v{i % 4} = v0 + v1 * v2 - v3 + {i};")
+    lines += ["}"] * depth
+    lines.append("wapas 0;")
+    lines.append("}")
+    return "\n".join(lines)
+
+
+def measure_memory(build):
+    """Return (result, retained bytes, peak bytes) for building a structure"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, retained, peak
+
+
+def timed(function, repeat=3):
+    """Return the best wall time of several runs"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_token_memory(functions=5000):
+    """Compare list-of-Token storage with the TokenBuffer columns"""
+    source = make_program(functions)
+    print(f"\nTOKEN MEMORY ({functions} functions, {len(source)} chars)")
+
+    tokens, list_bytes, list_peak = measure_memory(lambda: Lexer(source).tokenize())
+    count = len(tokens)
+    del tokens
+    buffer, buffer_bytes, buffer_peak = measure_memory(lambda: Lexer(source).tokenize_buffer())
+
+    print(f"  {'representation':<16}{'retained':>12}{'per token':>12}{'peak':>12}")
+    print(f"  {'list[Token]':<16}{list_bytes / 2**20:>10.1f}MB{list_bytes / count:>11.1f}B{list_peak / 2**20:>10.1f}MB")
+    print(f"  {'TokenBuffer':<16}{buffer_bytes / 2**20:>10.1f}MB{buffer_bytes / count:>11.1f}B{buffer_peak / 2**20:>10.1f}MB")
+
+    parse_list = timed(lambda: Parser(Lexer(source).tokenize()).parse(), repeat=1)
+    parse_buffer = timed(lambda: Parser(buffer).parse(), repeat=1)
+    print(f"  lex+parse list[Token]: {parse_list:.2f}s, parse TokenBuffer: {parse_buffer:.2f}s")
+
+
+def bench_ast_memory(functions=8000):
+    """Retained size of the AST for a large program (tokens already freed)"""
+    source = make_program(functions)
+    lines = source.count("\n")
+    print(f"\nAST MEMORY ({functions} functions, {lines} lines)")
+
+    tokens = Lexer(source).tokenize_buffer()
+    ast, retained, peak = measure_memory(lambda: Parser(tokens).parse())
+    print(f"  retained {retained / 2**20:.1f}MB ({retained / lines:.0f}B per line), peak {peak / 2**20:.1f}MB")
+
+
+def bench_ast_cache(functions=3000):
+    """Lexing and parsing from scratch against loading the AST from ASTCache"""
+    import tempfile
+    from cache import ASTCache
+
+    source = make_program(functions)
+    print(f"\nAST CACHE ({functions} functions, {len(source)} chars)")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ASTCache(cache_dir)
+        key = cache.key(source)
+        ast = Parser(Lexer(source).iter_tokens()).parse()
+        store = timed(lambda: cache.store(key, ast), repeat=1)
+        parse = timed(lambda: Parser(Lexer(source).iter_tokens()).parse())
+        load = timed(lambda: cache.load(key))
+        size = os.path.getsize(cache.path(key))
+    print(f"  lex+parse {parse:.2f}s, cache load {load:.2f}s ({parse / load:.1f}x), "
+          f"store {store:.2f}s, entry {size / 2**20:.1f}MB")
+
+
+def bench_incremental_parsing(functions=500, edits=100):
+    """Latency of IncrementalParser edits inside one function against a full re-parse"""
+    from parser import IncrementalParser
+
+    source = make_program(functions)
+    print(f"\nINCREMENTAL PARSING ({functions} functions, {len(source)} chars)")
+    full = timed(lambda: Parser(Lexer(source).iter_tokens()).parse())
+
+    parser = IncrementalParser(source)
+    offset = source.index("total = total - 1;", len(source) // 2)
+    latencies = []
+    for i in range(edits):
+        # Insert a statement, then take it out again
+        edit = (offset, 0, "total = 2;") if i % 2 == 0 else (offset, len("total = 2;"), "")
+        start = time.perf_counter()
+        parser.edit(*edit)
+        parser.program
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    median, worst = latencies[len(latencies) // 2], latencies[-1]
+    print(f"  full parse {full * 1000:.1f}ms, edit + read AST median {median * 1000:.2f}ms, "
+          f"worst {worst * 1000:.2f}ms ({full / median:.0f}x)")
+
+
+def bench_incremental_analysis(functions=2000, edits=50):
+    """IncrementalAnalyzer after edits inside one function body, and after a
+    signature change, against analysing the whole program again"""
+    import contextlib
+    import io
+    from parser import IncrementalParser
+    from sem_analyser import SemanticAnalyzer, IncrementalAnalyzer
+
+    source = make_program(functions)
+    print(f"\nINCREMENTAL ANALYSIS ({functions} functions, {len(source)} chars)")
+    parser = IncrementalParser(source)
+    full = timed(lambda: SemanticAnalyzer().analyze(parser.program))
+
+    analyzer = IncrementalAnalyzer()
+    analyzer.analyze(parser.program, parser.names)
+    offset = source.index("total = total - 1;", len(source) // 2)
+    latencies = []
+    for i in range(edits):
+        edit = (offset, 0, "total = 2;") if i % 2 == 0 else (offset, len("total = 2;"), "")
+        parser.edit(*edit)
+        program = parser.program
+        start = time.perf_counter()
+        analyzer.analyze(program, parser.names)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    median = latencies[len(latencies) // 2]
+    print(f"  full analysis {full * 1000:.1f}ms, after a body edit {median * 1000:.2f}ms "
+          f"({analyzer.rechecked} statement checked, {full / median:.0f}x)")
+
+    # Calling func_0 with the wrong argument count makes main an error
+    signature = source.index("vidhi func_0(ank n, sankhya scale)") + len("vidhi func_0(ank n")
+    parser.edit(signature, len(", sankhya scale"), "")
+    program = parser.program
+    with contextlib.redirect_stdout(io.StringIO()):
+        elapsed = timed(lambda: analyzer.analyze(program, parser.names), repeat=1)
+    print(f"  after a signature edit {elapsed * 1000:.2f}ms ({analyzer.rechecked} statements checked, "
+          f"errors: {analyzer.errors})")
+
+
+def bench_lazy_parsing(functions=5000):
+    """Whole-pipeline time with every function parsed against lazy bodies plus pruning"""
+    from compiler import HinglishCompiler
+
+    source = make_program(functions)
+    print(f"\nLAZY PARSING ({functions} functions, only func_0 reachable from main)")
+    for label, lazy in (("eager", False), ("lazy + prune", True)):
+        compiler = HinglishCompiler(use_cache=False, lazy=lazy)
+        elapsed = timed(lambda: compiler.transpile(source), repeat=1)
+        print(f"  {label:<14}{elapsed:>7.2f}s")
+
+
+def bench_parallel_lexing(functions=10000):
+    """Scaling of tokenize_parallel with the number of worker processes"""
+    source = make_program(functions)
+    print(f"\nPARALLEL LEXING ({functions} functions, {len(source)} chars, {os.cpu_count()} CPUs)")
+
+    serial = timed(lambda: Lexer(source).tokenize(), repeat=1)
+    print(f"  {'workers':<10}{'time':>8}{'speedup':>10}")
+    print(f"  {'serial':<10}{serial:>7.2f}s{1.0:>9.2f}x")
+    for workers in (1, 2, 4, 8):
+        elapsed = timed(lambda: tokenize_parallel(source, workers, min_chunk=1), repeat=1)
+        print(f"  {workers:<10}{elapsed:>7.2f}s{serial / elapsed:>9.2f}x")
+
+
+def bench_expression_parsing(statements=5000):
+    """Pratt expression parsing against the legacy precedence-level chain"""
+    source = make_expression_program(statements)
+    tokens = Lexer(source).tokenize()
+    buffer = Lexer(source).tokenize_buffer()
+    print(f"\nEXPRESSION PARSING ({statements * 2} statements, {len(tokens)} tokens)")
+
+    print(f"  {'parser':<22}{'time':>8}{'tokens/s':>14}")
+    baseline = None
+    for label, build in (("legacy chain", lambda: Parser(tokens, legacy=True)),
+                         ("pratt", lambda: Parser(tokens)),
+                         ("pratt + TokenBuffer", lambda: Parser(buffer))):
+        elapsed = timed(lambda: build().parse())
+        baseline = baseline or elapsed
+        print(f"  {label:<22}{elapsed:>7.2f}s{len(tokens) / elapsed:>14,.0f}  ({baseline / elapsed:.2f}x)")
+
+
+def bench_parallel_parsing(sizes=(1000, 10000, 50000)):
+    """Serial lex+parse against parse_parallel with several worker counts"""
+    from parser import parse_parallel
+
+    print(f"\nPARALLEL PARSING ({os.cpu_count()} CPUs)")
+    print(f"  {'functions':<11}{'serial':>8}" + "".join(f"{f'{workers} workers':>18}" for workers in (2, 4, 8)))
+    for functions in sizes:
+        source = make_program(functions)
+        serial = timed(lambda: Parser(Lexer(source).iter_tokens()).parse(), repeat=1)
+        row = f"  {functions:<11}{serial:>7.2f}s"
+        for workers in (2, 4, 8):
+            elapsed = timed(lambda: parse_parallel(source, workers, min_declarations=1), repeat=1)
+            row += f"{elapsed:>10.2f}s ({serial / elapsed:.2f}x)"
+        print(row)
+
+
+def bench_parallel_analysis(sizes=(1000, 5000, 20000)):
+    """Serial analysis and lowering (IRBuilder) against ParallelIRBuilder, as
+    hpc -j runs it, with several worker counts"""
+    from ir import IRBuilder, ParallelIRBuilder
+
+    print(f"\nPARALLEL ANALYSIS ({os.cpu_count()} CPUs)")
+    print(f"  {'functions':<11}{'serial':>8}" + "".join(f"{f'{workers} workers':>18}" for workers in (2, 4, 8)))
+    for functions in sizes:
+        ast = Parser(Lexer(make_program(functions)).iter_tokens()).parse()
+        serial = timed(lambda: IRBuilder().analyze(ast), repeat=1)
+        row = f"  {functions:<11}{serial:>7.2f}s"
+        for workers in (2, 4, 8):
+            elapsed = timed(lambda: ParallelIRBuilder(workers, min_functions=1).analyze(ast), repeat=1)
+            row += f"{elapsed:>10.2f}s ({serial / elapsed:.2f}x)"
+        print(row)
+
+
+def bench_symbol_lookup(depth=40, statements=20000):
+    """Semantic analysis time when every reference resolves many scopes out"""
+    from sem_analyser import SemanticAnalyzer
+
+    ast = Parser(Lexer(make_nested_program(depth, statements)).iter_tokens()).parse()
+    print(f"\nSYMBOL LOOKUP ({statements} statements {depth} blocks deep)")
+    elapsed = timed(lambda: SemanticAnalyzer().analyze(ast))
+    print(f"  analysis {elapsed:.2f}s, {elapsed / (statements * 5) * 1e6:.2f}us per reference")
+
+
+def bench_phases(functions=3000):
+    """Time of each compiler phase on the synthetic and the expression-heavy
+    program: analysis alone, analysis while lowering to IR, and C emission
+    from the IR"""
+    from sem_analyser import SemanticAnalyzer
+    from ir import IRBuilder
+    from generator import CodeGenerator
+
+    for label, source in (("synthetic", make_program(functions)),
+                          ("expressions", make_expression_program(functions))):
+        tokens = Lexer(source).tokenize()
+        ast = Parser(tokens).parse()
+        ir = IRBuilder().analyze(ast)['ir']
+        times = {
+            "lex": timed(lambda: Lexer(source).tokenize()),
+            "parse": timed(lambda: Parser(tokens).parse()),
+            "analyze": timed(lambda: SemanticAnalyzer().analyze(ast)),
+            "lower": timed(lambda: IRBuilder().analyze(ast)),
+            "emit": timed(lambda: CodeGenerator().generate(ir)),
+        }
+        print(f"\nPHASES ({label}, {len(tokens)} tokens)")
+        for phase, elapsed in times.items():
+            print(f"  {phase:<10}{elapsed:>7.3f}s")
+
+
+def bench_streaming_emit(functions=8000):
+    """Peak memory and time of writing a large program's C to a file from
+    one generate() string against streaming it with generate_to()"""
+    import tempfile
+    from ir import IRBuilder
+    from generator import CodeGenerator
+
+    ir = IRBuilder().analyze(Parser(Lexer(make_program(functions)).tokenize()).parse())['ir']
+    print(f"\nSTREAMING EMIT ({functions} functions)")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "out.c")
+
+        def buffered():
+            c_code = CodeGenerator().generate(ir)
+            with open(path, 'w') as f:
+                f.write(c_code)
+
+        def streamed():
+            with open(path, 'w') as f:
+                CodeGenerator().generate_to(ir, f)
+
+        for label, write in (("generate()", buffered), ("generate_to()", streamed)):
+            _, _, peak = measure_memory(write)
+            size = os.path.getsize(path)
+            print(f"  {label:<15}{timed(write):>7.3f}s  peak {peak / 2**20:7.2f} MiB "
+                  f"for {size / 2**20:.2f} MiB of C")
+
+
+def bench_constant_folding(statements=3000):
+    """Size of the generated C and gcc's time with and without -O1 on a
+    machine-written program full of constants"""
+    import subprocess
+    import tempfile
+    from ir import IRBuilder
+    from generator import CodeGenerator
+    from optimizer import optimize, format_report
+
+    source = make_constant_program(statements)
+    ast = Parser(Lexer(source).tokenize()).parse()
+    print(f"\nCONSTANT FOLDING ({statements} statements)")
+    with tempfile.TemporaryDirectory() as directory:
+        executable = os.path.join(directory, "program")
+        for level in (0, 1):
+            ir = IRBuilder().analyze(ast)['ir']
+            start = time.perf_counter()
+            report = optimize(ir, level)
+            optimized = time.perf_counter() - start
+            c_code = CodeGenerator().generate(ir)
+            gcc = timed(lambda: subprocess.run(['gcc', '-x', 'c', '-', '-o', executable],
+                                               input=c_code, text=True, check=True), repeat=1)
+            print(f"  -O{level}: {len(c_code) / 1024:7.1f} KiB of C, optimize {optimized:.3f}s, gcc {gcc:.2f}s")
+            for line in format_report(report):
+                print(f"    {line}")
+
+
+def bench_loop_invariant(size=2000):
+    """Run time of a loop-heavy program compiled at -O1 and at -O2, where
+    invariant expressions and pure calls move out of the loops (gcc itself
+    runs at its default -O0)"""
+    import subprocess
+    import tempfile
+    from ir import IRBuilder
+    from generator import CodeGenerator
+    from optimizer import optimize, format_report
+
+    ast = Parser(Lexer(make_loop_program(size)).tokenize()).parse()
+    print(f"\nLOOP-INVARIANT CODE MOTION ({size} x {size * 3 // 2} iterations)")
+    with tempfile.TemporaryDirectory() as directory:
+        executable = os.path.join(directory, "program")
+        for level in (1, 2):
+            ir = IRBuilder().analyze(ast)['ir']
+            report = optimize(ir, level)
+            subprocess.run(['gcc', '-x', 'c', '-', '-o', executable],
+                           input=CodeGenerator().generate(ir), text=True, check=True)
+            run = timed(lambda: subprocess.run([executable], stdout=subprocess.DEVNULL, check=True))
+            print(f"  -O{level}: program runs in {run:.3f}s")
+            for line in format_report(report)[1:]:
+                print(f"    {line}")
+
+
+BENCHMARKS = {
+    "token_memory": bench_token_memory,
+    "ast_memory": bench_ast_memory,
+    "ast_cache": bench_ast_cache,
+    "incremental_parsing": bench_incremental_parsing,
+    "incremental_analysis": bench_incremental_analysis,
+    "lazy_parsing": bench_lazy_parsing,
+    "symbol_lookup": bench_symbol_lookup,
+    "phases": bench_phases,
+    "streaming_emit": bench_streaming_emit,
+    "constant_folding": bench_constant_folding,
+    "loop_invariant": bench_loop_invariant,
+    "parallel_lexing": bench_parallel_lexing,
+    "parallel_parsing": bench_parallel_parsing,
+    "parallel_analysis": bench_parallel_analysis,
+    "expression_parsing": bench_expression_parsing,
+}
+
+
+if __name__ == "__main__":
+    selected = sys.argv[1:] or list(BENCHMARKS)
+    for name in selected:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark '{name}'. Available: {', '.join(BENCHMARKS)}")
+            sys.exit(1)
+        BENCHMARKS[name]()
@@ -0,0 +1,155 @@
+# cache.py
+
+import hashlib
+import os
+import pickle
+import tempfile
+
+from parser import build_tree, flatten_tree
+from util import gc_paused
+
+# Bump when the AST format changes in a way the source digest below can't see
+COMPILER_VERSION = "1.0"
+
+# Front-end modules whose code decides what a cached AST looks like
+FRONTEND_MODULES = ("lexer.py", "parser.py")
+
+DEFAULT_MAX_BYTES = 256 * 2**20
+
+# Source files are hashed this many bytes at a time
+HASH_CHUNK_SIZE = 2**20
+
+def default_cache_dir():
+    """Per-user cache directory, honouring XDG_CACHE_HOME"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "hpc")
+
+def frontend_version():
+    """COMPILER_VERSION plus a digest of the lexer and parser sources.
+
+    Editing either module invalidates every cached AST. When the sources are
+    not on disk (a frozen binary) only COMPILER_VERSION is used.
+    """
+    digest = hashlib.sha256(COMPILER_VERSION.encode())
+    here = os.path.dirname(os.path.abspath(__file__))
+    for module in FRONTEND_MODULES:
+        try:
+            with open(os.path.join(here, module), 'rb') as f:
+                digest.update(f.read())
+        except OSError:
+            pass
+    return digest.hexdigest()
+
+class ASTCache:
+    """Pickled Program ASTs on disk, keyed by source hash and compiler version.
+
+    Entries are single files named by key. An AST too deep to pickle
+    directly is stored as flatten_tree() records, which pickle without
+    recursing down it. Loading an entry refreshes its
+    mtime; when the directory grows past max_bytes the least recently used
+    entries are deleted.
+    """
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.version = frontend_version()
+
+    def key(self, source, variant=""):
+        """Cache key for source text or bytes; variant separates ASTs built
+        differently from the same source"""
+        if isinstance(source, str):
+            source = source.encode('utf-8')
+        digest = self.digest(variant)
+        digest.update(source)
+        return digest.hexdigest()
+
+    def file_key(self, path, variant=""):
+        """Cache key for a file's contents, hashed a chunk at a time rather
+        than read into memory whole"""
+        digest = self.digest(variant)
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def digest(self, variant):
+        digest = hashlib.sha256(self.version.encode())
+        digest.update(variant.encode())
+        return digest
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ".ast")
+
+    def load(self, key):
+        """Return the cached AST for key, or None on a miss"""
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as f, gc_paused():
+                ast = pickle.load(f)
+                if isinstance(ast, list):
+                    ast = build_tree(ast)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Truncated or unreadable entry: drop it and treat it as a miss
+            self.discard(path)
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return ast
+
+    def store(self, key, ast):
+        """Write an AST for key, then evict old entries if over the size cap"""
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Write to a temporary file and rename it so readers never see half an entry
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f, gc_paused():
+                try:
+                    pickle.dump(ast, f, protocol=pickle.HIGHEST_PROTOCOL)
+                except RecursionError:
+                    f.seek(0)
+                    f.truncate()
+                    pickle.dump(flatten_tree(ast), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self.path(key))
+        except BaseException:
+            self.discard(temp_path)
+            raise
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        total = 0
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            if not name.endswith(".ast"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self.discard(path)
+            total -= size
+
+    def discard(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -1,4 +1,6 @@
-from test import run_test, run_generator_test, tests, code_gen_tests
+from test import (run_test, run_generator_test, tests, code_gen_tests, deep_expression_tests, lexer_tests,
+                  parser_tests, find_token_mismatch, find_parse_mismatch, find_cache_mismatch, find_pipeline_mismatch,
+                  analysis_tests, find_analysis_mismatch, optimizer_tests, find_optimizer_mismatch)
 import sys
 import xml.etree.ElementTree as ET
 import datetime
@@ -9,21 +11,18 @@ def run_test_ci(name, source_code, expected_pattern=None, expect_semantic_errors
     # Just print the test name without the full source code and details
     print(f"Running test: {name}...", end=" ")
     
-    from test import Lexer, Parser, SemanticAnalyzer
+    from test import Lexer, Parser, SemanticAnalyzer, contains
     
     syntax_pass = False
     semantic_pass = False
 
     try:
         lexer = Lexer(source_code)
-        tokens = lexer.tokenize()
-        parser = Parser(tokens)
+        parser = Parser(lexer.iter_tokens())
         ast = parser.parse()
         
-        ast_repr = str(ast)
-        
         if expected_pattern:
-            if expected_pattern in ast_repr:
+            if contains(ast, expected_pattern):
                 syntax_pass = True
             else:
                 print("❌ (syntax)")
@@ -61,11 +60,11 @@ def run_test_ci(name, source_code, expected_pattern=None, expect_semantic_errors
         print(f"❌ (error: {type(e).__name__})")
         return False
 
-def run_generator_test_ci(name, source_code, expected_output=None):
+def run_generator_test_ci(name, source_code, expected_output=None, opt_level=0):
     """Run a code generation test with minimal output for CI environments"""
-    print(f"Running code gen test: {name}...", end=" ")
+    print(f"Running {f'-O{opt_level} ' if opt_level else ''}code gen test: {name}...", end=" ")
     
-    from test import Lexer, Parser, SemanticAnalyzer, CodeGenerator
+    from test import Lexer, Parser, IRBuilder, CodeGenerator, optimize
     import tempfile, subprocess, os
     
     try:
@@ -74,7 +73,7 @@ def run_generator_test_ci(name, source_code, expected_output=None):
         tokens = lexer.tokenize()
         parser = Parser(tokens)
         ast = parser.parse()
-        analyzer = SemanticAnalyzer()
+        analyzer = IRBuilder()
         
         analysis_result = analyzer.analyze(ast)
 
@@ -82,20 +81,19 @@ def run_generator_test_ci(name, source_code, expected_output=None):
             print("❌ (analysis failed)")
             return False
             
-        generator = CodeGenerator(analysis_result['symbol_table'])
-        c_code = generator.generate(ast)
+        if opt_level:
+            optimize(analysis_result['ir'], opt_level)
+        generator = CodeGenerator()
+        c_code = generator.generate(analysis_result['ir'])
         
         # Only attempt to compile and run if there's expected output to verify
         if expected_output is not None:
-            # Save C code to a temporary file
-            with tempfile.NamedTemporaryFile(suffix='.c', delete=False) as temp_c_file:
-                temp_c_path = temp_c_file.name
-                temp_c_file.write(c_code.encode())
-            
-            # Compile the C code
-            temp_exe_path = temp_c_path + '.exe'
+            # Compile the C code, feeding it to gcc over stdin
+            fd, temp_exe_path = tempfile.mkstemp(suffix='.exe')
+            os.close(fd)
             compile_result = subprocess.run(
-                ['gcc', temp_c_path, '-o', temp_exe_path], 
+                ['gcc', '-x', 'c', '-', '-o', temp_exe_path],
+                input=c_code,
                 capture_output=True, 
                 text=True
             )
@@ -104,7 +102,7 @@ def run_generator_test_ci(name, source_code, expected_output=None):
                 print("❌ (compilation failed)")
                 
                 # Clean up
-                os.unlink(temp_c_path)
+                os.unlink(temp_exe_path)
                 return False
             
             # Run the compiled program
@@ -115,7 +113,6 @@ def run_generator_test_ci(name, source_code, expected_output=None):
             )
             
             # Clean up
-            os.unlink(temp_c_path)
             os.unlink(temp_exe_path)
             
             # Check output
@@ -134,6 +131,74 @@ def run_generator_test_ci(name, source_code, expected_output=None):
         print(f"❌ (error: {type(e).__name__})")
         return False
 
+def run_lexer_test_ci(name, source_code):
+    """Run a lexer engine test with minimal output for CI environments"""
+    print(f"Running lexer test: {name}...", end=" ")
+    
+    try:
+        mismatch = find_token_mismatch(source_code)
+        if mismatch:
+            print(f"❌ ({mismatch})")
+            return False
+        print("✅")
+        return True
+    except Exception as e:
+        print(f"❌ (error: {type(e).__name__})")
+        return False
+
+def run_parser_test_ci(name, source_code):
+    """Run a parser equivalence test with minimal output for CI environments"""
+    print(f"Running parser test: {name}...", end=" ")
+    
+    mismatch = find_parse_mismatch(source_code)
+    if mismatch:
+        print(f"❌ ({mismatch})")
+        return False
+    print("✅")
+    return True
+
+def run_cache_test_ci(name, source_code):
+    """Run an AST cache round trip check with minimal output for CI environments"""
+    print(f"Running cache test: {name}...", end=" ")
+    
+    mismatch = find_cache_mismatch(source_code)
+    if mismatch:
+        print(f"❌ ({mismatch})")
+        return False
+    print("✅")
+    return True
+
+def run_analysis_test_ci(name, source_code):
+    """Run a parallel and incremental analysis error check with minimal output for CI environments"""
+    print(f"Running analyzer equivalence test: {name}...", end=" ")
+    
+    mismatch = find_analysis_mismatch(source_code)
+    if mismatch:
+        print(f"❌ ({mismatch})")
+        return False
+    print("✅")
+    return True
+
+def run_pipeline_test_ci(name, source_code):
+    """Run an IR pipeline error and emission check with minimal output for CI environments"""
+    print(f"Running IR pipeline test: {name}...", end=" ")
+    
+    mismatch = find_pipeline_mismatch(source_code)
+    if mismatch:
+        print(f"❌ ({mismatch})")
+        return False
+    print("✅")
+    return True
+
+def run_optimizer_test_ci(test):
+    """Run an optimizer test with minimal output for CI environments"""
+    mismatch = find_optimizer_mismatch(test)
+    if mismatch:
+        print(f"Running optimizer test: {test['name']}... ❌ ({mismatch})")
+        return False
+    return run_generator_test_ci(test["name"], test["source"], test.get("expected_output"),
+                                 opt_level=test.get("opt_level", 1))
+
 def run_all_tests_with_junit():
     """Run all test cases with minimal console output and generate JUnit XML report"""
     # Initialize test counters
@@ -178,9 +243,9 @@ def run_all_tests_with_junit():
     # Run code generation tests
     print("\nRunning code generation tests...")
     gen_passed = 0
-    gen_total = len(code_gen_tests)
+    gen_total = len(code_gen_tests) + len(deep_expression_tests)
     
-    for test in code_gen_tests:
+    for test in code_gen_tests + deep_expression_tests:
         test_case = ET.SubElement(test_suite, "testcase")
         test_case.set("name", test["name"])
         test_case.set("classname", "CodeGenTests")
@@ -203,9 +268,140 @@ def run_all_tests_with_junit():
             failure = ET.SubElement(test_case, "failure")
             failure.set("message", f"Code generation test {test['name']} failed")
     
+    # Run lexer engine tests over every known source
+    print("\nRunning lexer tests...")
+    lex_passed = 0
+    lex_sources = lexer_tests + [{"name": test["name"], "source": test["source"]}
+                                 for test in tests + code_gen_tests]
+    lex_total = len(lex_sources)
+    
+    for test in lex_sources:
+        test_case = ET.SubElement(test_suite, "testcase")
+        test_case.set("name", test["name"])
+        test_case.set("classname", "LexerTests")
+        
+        start_time = datetime.datetime.now()
+        result = run_lexer_test_ci(test["name"], test["source"])
+        end_time = datetime.datetime.now()
+        
+        duration = (end_time - start_time).total_seconds()
+        test_case.set("time", str(duration))
+        
+        if result:
+            lex_passed += 1
+        else:
+            failure = ET.SubElement(test_case, "failure")
+            failure.set("message", f"Lexer test {test['name']} failed")
+    
+    # Run parser equivalence tests over every known source
+    print("\nRunning parser tests...")
+    parse_passed = 0
+    parse_sources = parser_tests + [{"name": test["name"], "source": test["source"]}
+                                    for test in tests + code_gen_tests]
+    # Expressions too deep to repr are checked through the cache alone
+    parse_checks = ([(test, run_parser_test_ci) for test in parse_sources]
+                    + [(test, run_cache_test_ci) for test in deep_expression_tests])
+    parse_total = len(parse_checks)
+    
+    for test, check in parse_checks:
+        test_case = ET.SubElement(test_suite, "testcase")
+        test_case.set("name", test["name"])
+        test_case.set("classname", "ParserTests")
+        
+        start_time = datetime.datetime.now()
+        result = check(test["name"], test["source"])
+        end_time = datetime.datetime.now()
+        
+        duration = (end_time - start_time).total_seconds()
+        test_case.set("time", str(duration))
+        
+        if result:
+            parse_passed += 1
+        else:
+            failure = ET.SubElement(test_case, "failure")
+            failure.set("message", f"Parser test {test['name']} failed")
+    
+    # Run parallel and incremental semantic analysis over every known source
+    print("\nRunning analyzer equivalence tests...")
+    analysis_passed = 0
+    analysis_sources = analysis_tests + tests + code_gen_tests
+    analysis_total = len(analysis_sources)
+    
+    for test in analysis_sources:
+        test_case = ET.SubElement(test_suite, "testcase")
+        test_case.set("name", test["name"])
+        test_case.set("classname", "AnalyzerTests")
+        
+        start_time = datetime.datetime.now()
+        result = run_analysis_test_ci(test["name"], test["source"])
+        end_time = datetime.datetime.now()
+        
+        duration = (end_time - start_time).total_seconds()
+        test_case.set("time", str(duration))
+        
+        if result:
+            analysis_passed += 1
+        else:
+            failure = ET.SubElement(test_case, "failure")
+            failure.set("message", f"Analyzer equivalence test {test['name']} failed")
+    
+    # Run the IR pipeline checks over the basic, code generation and analysis tests
+    print("\nRunning IR pipeline tests...")
+    pipeline_passed = 0
+    pipeline_sources = tests + code_gen_tests + deep_expression_tests + analysis_tests
+    pipeline_total = len(pipeline_sources)
+    
+    for test in pipeline_sources:
+        test_case = ET.SubElement(test_suite, "testcase")
+        test_case.set("name", test["name"])
+        test_case.set("classname", "PipelineTests")
+        
+        start_time = datetime.datetime.now()
+        result = run_pipeline_test_ci(test["name"], test["source"])
+        end_time = datetime.datetime.now()
+        
+        duration = (end_time - start_time).total_seconds()
+        test_case.set("time", str(duration))
+        
+        if result:
+            pipeline_passed += 1
+        else:
+            failure = ET.SubElement(test_case, "failure")
+            failure.set("message", f"IR pipeline test {test['name']} failed")
+    
+    # Run the optimization passes over the optimizer and code generation tests
+    print("\nRunning optimizer tests...")
+    opt_passed = 0
+    opt_runs = [(test, run_optimizer_test_ci) for test in optimizer_tests]
+    opt_runs += [(test, lambda test: run_generator_test_ci(test["name"], test["source"],
+                                                          test.get("expected_output"), opt_level=2))
+                 for test in code_gen_tests + deep_expression_tests]
+    opt_total = len(opt_runs)
+    
+    for test, run in opt_runs:
+        test_case = ET.SubElement(test_suite, "testcase")
+        test_case.set("name", test["name"])
+        test_case.set("classname", "OptimizerTests")
+        
+        start_time = datetime.datetime.now()
+        result = run(test)
+        end_time = datetime.datetime.now()
+        
+        duration = (end_time - start_time).total_seconds()
+        test_case.set("time", str(duration))
+        
+        if result:
+            opt_passed += 1
+        else:
+            failure = ET.SubElement(test_case, "failure")
+            failure.set("message", f"Optimizer test {test['name']} failed")
+    
+    all_passed = passed + gen_passed + lex_passed + parse_passed + analysis_passed + pipeline_passed + opt_passed
+    all_total = total + gen_total + lex_total + parse_total + analysis_total + pipeline_total + opt_total
+    
     # Update test counts in XML
-    test_suite.set("tests", str(total + gen_total))
-    test_suite.set("failures", str((total - passed) + (gen_total - gen_passed)))
+    test_suite.set("tests", str(all_total))
+    test_suite.set("failures", str(all_total - all_passed))
     
     # Print summary to console
     print(f"\nSUMMARY:")
@@ -213,14 +409,19 @@ def run_all_tests_with_junit():
     print(f"  - Syntax: {syntax_passed}/{total-semantic_total}")
     print(f"  - Semantics: {semantic_passed}/{semantic_total}")
     print(f"- Code generation: {gen_passed}/{gen_total} passed")
-    print(f"- Overall: {passed + gen_passed}/{total + gen_total} passed")
+    print(f"- Lexer engines: {lex_passed}/{lex_total} passed")
+    print(f"- Parser equivalence: {parse_passed}/{parse_total} passed")
+    print(f"- Analyzer equivalence: {analysis_passed}/{analysis_total} passed")
+    print(f"- IR pipeline: {pipeline_passed}/{pipeline_total} passed")
+    print(f"- Optimizer: {opt_passed}/{opt_total} passed")
+    print(f"- Overall: {all_passed}/{all_total} passed")
     
     # Write XML to file
     tree = ET.ElementTree(test_suite)
     tree.write("test-results.xml", encoding="utf-8", xml_declaration=True)
     
     # Return overall success/failure
-    return (passed + gen_passed) == (total + gen_total)
+    return all_passed == all_total
 
 if __name__ == "__main__":
     print("Running Transpiler CI tests...")
@@ -1,14 +1,29 @@
 #!/usr/bin/env python3
 
 import argparse
+import io
 import os
 import sys
 import subprocess
+import threading
 import traceback
 
 class HinglishCompiler:
-    def __init__(self, verbose=False):
+    def __init__(self, verbose=False, use_mmap=True, use_cache=True, cache_dir=None, lazy=False,
+                 use_pipe=True, opt_level=0, jobs=1):
         self.verbose = verbose
+        self.use_mmap = use_mmap  # Lex source files through a memory map
+        self.use_pipe = use_pipe  # Feed C to gcc over stdin unless the .c file is kept
+        self.opt_level = opt_level  # Optimisation passes to run over the IR (-O1, -O2)
+        self.lazy = lazy  # Drop functions main never calls before parsing their bodies
+        self.jobs = jobs  # Worker processes checking and lowering function bodies (0: one per CPU)
+        
+        # Parsed ASTs are cached on disk keyed by a hash of the source
+        if use_cache:
+            from cache import ASTCache
+            self.cache = ASTCache(cache_dir)
+        else:
+            self.cache = None
     
     def log(self, message):
         if self.verbose:
@@ -33,11 +48,25 @@ class HinglishCompiler:
         c_file = f"{base_name}.c"
         executable = output_file or base_name
         
-        # Step 1: Read source file
+        # Step 1: Look the source up in the AST cache; on a miss read the
+        # file, or map it and lex straight over the bytes
+        ast = None
+        cache_key = None
         try:
-            with open(input_file, 'r') as f:
-                source_code = f.read()
-                self.log(f"Read source file: {input_file} ({len(source_code)} bytes)")
+            if self.cache:
+                cache_key = self.cache.file_key(input_file, self.cache_variant())
+                ast = self.cache.load(cache_key)
+                if ast is not None:
+                    self.log(f"Loaded cached AST for: {input_file}")
+            
+            if ast is None and self.use_mmap:
+                from lexer import tokenize_mapped
+                tokens = tokenize_mapped(input_file)
+                self.log(f"Mapped source file: {input_file} ({len(tokens)} tokens)")
+            elif ast is None:
+                with open(input_file, 'r') as f:
+                    source_code = f.read()
+                    self.log(f"Read source file: {input_file} ({len(source_code)} bytes)")
         except FileNotFoundError:
             print(f"Error: Source file '{input_file}' not found")
             return False
@@ -47,15 +76,23 @@ class HinglishCompiler:
         
         # Step 2: Transpile to C
         try:
-            c_code = self.transpile(source_code)
-            if not c_code:
+            if ast is None:
+                if self.use_mmap:
+                    ast = self.parse_tokens(tokens)
+                else:
+                    ast = self.parse_tokens(self.lex(source_code))
+                self.cache_ast(cache_key, ast)
+            write_c = self.c_writer(ast)
+            if write_c is None:
                 return False
-                
             self.log(f"Successfully transpiled to C code")
             
-            # Write C code to file
-            with open(c_file, 'w') as f:
-                f.write(c_code)
+            # Stream the C code into the file one top-level declaration at a time;
+            # without one, gcc reads it from a pipe while it is generated
+            piped = self.use_pipe and not keep_c
+            if not piped:
+                with open(c_file, 'w', encoding='utf-8') as f:
+                    write_c(f)
                 self.log(f"Wrote C code to: {c_file}")
         except Exception as e:
             print(f"Error during transpilation: {str(e)}")
@@ -65,7 +102,10 @@ class HinglishCompiler:
         
         # Step 3: Compile C to executable
         try:
-            result = self.compile_with_gcc(c_file, executable)
+            if piped:
+                result = self.compile_piped(write_c, executable)
+            else:
+                result = self.compile_with_gcc(c_file, executable)
             if not result:
                 return False
             self.log(f"Compilation successful: {executable}")
@@ -76,7 +116,7 @@ class HinglishCompiler:
             return False
         
         # Step 4: Clean up C file if not keeping it
-        if not keep_c:
+        if not keep_c and not piped:
             try:
                 os.remove(c_file)
                 self.log(f"Removed intermediate C file: {c_file}")
@@ -124,39 +164,95 @@ class HinglishCompiler:
             return False
     
     def transpile(self, source_code):
-        """Transpile Hinglish code to C."""
-        # Import the components we need
+        """Transpile Hinglish code to C, reusing a cached AST when there is one."""
+        cache_key = self.cache.key(source_code, self.cache_variant()) if self.cache else None
+        ast = self.cache.load(cache_key) if self.cache else None
+        if ast is not None:
+            self.log("Loaded cached AST, skipping lexing and parsing")
+        else:
+            # Lexical analysis - tokens are usually produced on demand as the parser consumes them
+            self.log("Starting lexical analysis...")
+            ast = self.parse_tokens(self.lex(source_code))
+            self.cache_ast(cache_key, ast)
+        return self.transpile_ast(ast)
+    
+    def transpile_tokens(self, tokens):
+        """Transpile an already lexed token list, TokenBuffer or token iterator to C."""
+        return self.transpile_ast(self.parse_tokens(tokens))
+    
+    def lex(self, source_code):
+        """Tokens for the parser: produced on demand, or all up front for lazy parsing."""
         from lexer import Lexer
-        from parser import Parser
-        from generator import CodeGenerator
         
-        # Lexical analysis
-        self.log("Starting lexical analysis...")
         lexer = Lexer(source_code)
-        tokens = lexer.tokenize()
+        return lexer.tokenize_buffer() if self.lazy else lexer.iter_tokens()
+    
+    def parse_tokens(self, tokens):
+        """Parse tokens into a Program AST."""
+        from parser import Parser, prune_unreachable
         
-        # Parsing
         self.log("Parsing tokens to AST...")
-        parser = Parser(tokens)
+        parser = Parser(tokens, lazy=self.lazy)
         ast = parser.parse()
+        if self.lazy:
+            total = len(ast.statements)
+            ast = prune_unreachable(ast)
+            self.log(f"Kept {len(ast.statements)} of {total} top-level declarations reachable from main")
+        return ast
+    
+    def cache_variant(self):
+        """Lazy mode caches the pruned AST, so it gets keys of its own."""
+        return "lazy" if self.lazy else ""
+    
+    def cache_ast(self, cache_key, ast):
+        """Store a freshly parsed AST; a cache failure never fails the compile."""
+        if not self.cache:
+            return
+        try:
+            self.cache.store(cache_key, ast)
+            self.log(f"Cached AST in: {self.cache.directory}")
+        except Exception as e:
+            print(f"Warning: Could not cache AST: {str(e)}")
+    
+    def transpile_ast(self, ast):
+        """Run semantic analysis and code generation over a parsed AST."""
+        write_c = self.c_writer(ast)
+        if write_c is None:
+            return None
+        
+        out = io.StringIO()
+        write_c(out)
+        return out.getvalue()
+    
+    def c_writer(self, ast):
+        """Run semantic analysis over a parsed AST.
+        
+        Returns a function writing the program's C code to a text or binary
+        stream, or None when there were semantic errors and so no C code.
+        """
+        from generator import CodeGenerator
         
-        # Perform semantic analysis to get symbol table
+        # Semantic analysis lowers the AST to the typed IR the generator emits from
         self.log("Performing semantic analysis...")
-        try:
-            from sem_analyser import SemanticAnalyzer
-            analyzer = SemanticAnalyzer()
-            analysis_result = analyzer.analyze(ast)
-            symbol_table = analysis_result['symbol_table']
-        except ImportError:
-            self.log("Warning: Semantic analyzer not found, proceeding without symbol table")
-            symbol_table = {}
+        from ir import IRBuilder, ParallelIRBuilder
+        builder = IRBuilder() if self.jobs == 1 else ParallelIRBuilder(self.jobs or None)
+        result = builder.analyze(ast)
+        if not result['success']:
+            # The IR has placeholders where names did not resolve; gcc would
+            # only report the same errors again, less clearly
+            return None
+        ir = result['ir']
         
-        # Code generation - use the same generator as in run.py
-        self.log("Generating C code...")
-        generator = CodeGenerator(symbol_table)
-        c_code = generator.generate(ast)
+        if self.opt_level:
+            from optimizer import optimize, format_report
+            self.log(f"Optimising (-O{self.opt_level})...")
+            for line in format_report(optimize(ir, self.opt_level)):
+                self.log(f"  {line}")
         
-        return c_code
+        def write_c(stream):
+            self.log("Generating C code...")
+            CodeGenerator().generate_to(ir, stream)
+        return write_c
     
     def compile_with_gcc(self, c_file, output_file):
         """Compile C code with GCC."""
@@ -185,6 +281,54 @@ class HinglishCompiler:
         except FileNotFoundError:
             print("Error: GCC compiler not found. Please install GCC.")
             return False
+    
+    def compile_piped(self, write_c, output_file):
+        """Compile C code with GCC, writing it to gcc's stdin as it is generated."""
+        self.log(f"Compiling to {output_file} using GCC, reading C from a pipe...")
+        
+        cmd = ['gcc', '-x', 'c', '-', '-o', output_file]
+        self.log(f"Running command: {' '.join(cmd)}")
+        try:
+            process = subprocess.Popen(cmd, stdin=subprocess.PIPE,
+                                       stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        except FileNotFoundError:
+            print("Error: GCC compiler not found. Please install GCC.")
+            return False
+        
+        # Drain gcc's output while writing so neither side blocks on a full pipe
+        output = []
+        reader = threading.Thread(target=lambda: output.append(process.stdout.read()))
+        reader.start()
+        generation_error = None
+        try:
+            write_c(process.stdin)
+        except BrokenPipeError:
+            # gcc exited early; its output says why
+            pass
+        except Exception as e:
+            # gcc must not build the partial program it was sent
+            process.kill()
+            generation_error = e
+        except BaseException:
+            process.kill()
+            raise
+        finally:
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+            returncode = process.wait()
+            reader.join()
+        
+        if generation_error is not None:
+            print(f"Error generating C code: {str(generation_error)}")
+            if self.verbose:
+                traceback.print_exception(generation_error)
+            return False
+        if returncode != 0:
+            print(f"GCC compilation failed: {output[0].decode()}")
+            return False
+        return True
 
 
 def main():
@@ -195,21 +339,37 @@ def main():
 Examples:
   hpc hello.hp               # Compile hello.hp to executable 'hello'
   hpc hello.hp -o greet      # Compile hello.hp to executable 'greet'
-  hpc hello.hp --keep-c      # Keep the intermediate C file
+  hpc hello.hp --keep-c      # Write the intermediate C file and keep it
   hpc hello.hp -v            # Verbose output showing compilation steps
   hpc hello.hp --run         # Run the program after compilation
+  hpc hello.hp -O1 -v        # Fold constants, reporting what each pass did
+  hpc hello.hp -O2           # Also move loop-invariant code out of loops
+  hpc big.hp -j 4            # Check and lower function bodies in 4 processes
 """
     )
     
     parser.add_argument('input_file', help='Input .hp source file')
     parser.add_argument('-o', '--output', help='Output executable name')
-    parser.add_argument('--keep-c', action='store_true', help='Keep intermediate C file')
+    parser.add_argument('--keep-c', action='store_true', help='Write the intermediate C file and keep it')
     parser.add_argument('-v', '--verbose', action='store_true', help='Enable verbose output')
     parser.add_argument('--run', action='store_true', help='Run the executable after compilation')
+    parser.add_argument('--no-mmap', action='store_true', help='Read the source file into memory instead of mapping it')
+    parser.add_argument('-O', dest='opt_level', type=int, choices=[0, 1, 2], default=0,
+                        help='Optimisation level: -O1 folds and propagates constants, -O2 also hoists '
+                             'loop-invariant code (statistics with -v)')
+    parser.add_argument('--no-pipe', action='store_true', help='Write the C code to a temporary file for gcc instead of piping it')
+    parser.add_argument('--no-cache', action='store_true', help='Always lex and parse instead of using the AST cache')
+    parser.add_argument('--cache-dir', help='AST cache directory (default: ~/.cache/hpc)')
+    parser.add_argument('--lazy', action='store_true', help='Skip functions main never calls without parsing their bodies')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Check and lower function bodies in this many worker processes (0: one per CPU); '
+                             'programs with fewer than 64 functions per worker stay in one process')
     
     args = parser.parse_args()
     
-    compiler = HinglishCompiler(verbose=args.verbose)
+    compiler = HinglishCompiler(verbose=args.verbose, use_mmap=not args.no_mmap,
+                                use_cache=not args.no_cache, cache_dir=args.cache_dir, lazy=args.lazy,
+                                use_pipe=not args.no_pipe, opt_level=args.opt_level, jobs=args.jobs)
     success = compiler.compile(args.input_file, args.output, args.keep_c, args.run)
     
     return 0 if success else 1
@@ -0,0 +1,371 @@
+# ir.py
+
+from sem_analyser import *
+
+# C spelling of each Hinglish type; conditions are plain ints in C
+C_TYPES = {"ank": "int", "sankhya": "float", "vakya": "char*", "akshar": "char", "boolean": "int"}
+
+# printf conversion for each C type
+PRINTF_FORMATS = {"int": "%d", "float": "%f", "char*": "%s", "char": "%c"}
+
+# Value a declaration without an initializer starts with, by C type
+DEFAULT_VALUES = {"char*": '""', "char": "'\\0'"}
+
+C_ESCAPES = {"\\": "\\\\", "\n": "\\n", "\t": "\\t", "\r": "\\r", "\0": "\\0"}
+
+# Also spells the type of calls to functions without a return type
+C_TYPE_NAMES = dict(C_TYPES, void="void")
+C_TYPE_NAMES[None] = "void"
+
+def c_type(type_name):
+    """C type for a Hinglish type; void for functions without a return type"""
+    return C_TYPE_NAMES.get(type_name, "int")
+
+def c_literal(text, quote):
+    """text as a C string (quote '"') or character (quote "'") literal"""
+    escaped = "".join(C_ESCAPES.get(char, "\\" + char if char == quote else char) for char in text)
+    return f"{quote}{escaped}{quote}"
+
+
+# IR nodes. The IR is the analyzed program lowered for C: names are resolved
+# to Symbols, every expression carries its Hinglish type and its C type,
+# int -> float conversions are explicit Convert nodes, literals are C text,
+# logical operators are C operators and parentheses are gone.
+class IRNode(ASTNode):
+    __slots__ = ()
+
+# Expressions
+class Const(IRNode):
+    __slots__ = ('text', 'type', 'ctype')
+    def __init__(self, text, type):
+        self.text = text  # C spelling of the value
+        self.type = type
+        self.ctype = C_TYPE_NAMES.get(type, "int")
+
+class Ref(IRNode):
+    __slots__ = ('symbol', 'type', 'ctype')
+    def __init__(self, symbol, type):
+        self.symbol = symbol
+        self.type = type
+        self.ctype = C_TYPE_NAMES.get(type, "int")
+
+class Assign(IRNode):
+    __slots__ = ('symbol', 'value', 'type', 'ctype')
+    def __init__(self, symbol, value, type):
+        self.symbol = symbol
+        self.value = value
+        self.type = type
+        self.ctype = C_TYPE_NAMES.get(type, "int")
+
+class BinOp(IRNode):
+    __slots__ = ('op', 'left', 'right', 'type', 'ctype')
+    def __init__(self, op, left, right, type):
+        self.op = op  # C operator
+        self.left = left
+        self.right = right
+        self.type = type
+        self.ctype = C_TYPE_NAMES.get(type, "int")
+
+class UnOp(IRNode):
+    __slots__ = ('op', 'operand', 'type', 'ctype')
+    def __init__(self, op, operand, type):
+        self.op = op  # C operator
+        self.operand = operand
+        self.type = type
+        self.ctype = C_TYPE_NAMES.get(type, "int")
+
+class Convert(IRNode):
+    __slots__ = ('value', 'type', 'ctype')
+    def __init__(self, value, type):
+        self.value = value
+        self.type = type
+        self.ctype = C_TYPE_NAMES.get(type, "int")
+
+class FuncCall(IRNode):
+    __slots__ = ('symbol', 'args', 'type', 'ctype')
+    def __init__(self, symbol, args, type):
+        self.symbol = symbol
+        self.args = args
+        self.type = type
+        self.ctype = C_TYPE_NAMES.get(type, "int")
+
+# Statements; bodies are lists of statements
+class Module(IRNode):
+    __slots__ = ('body',)
+    def __init__(self, body):
+        self.body = body
+
+class Function(IRNode):
+    __slots__ = ('symbol', 'params', 'ctype', 'body')
+    def __init__(self, symbol, params, ctype, body):
+        self.symbol = symbol
+        self.params = params  # Symbols
+        self.ctype = ctype  # Return type
+        self.body = body
+
+class Declare(IRNode):
+    __slots__ = ('symbol', 'ctype', 'value')
+    def __init__(self, symbol, ctype, value):
+        self.symbol = symbol
+        self.ctype = ctype
+        self.value = value  # Initial value, explicit even when the source had none
+
+class ExprStmt(IRNode):
+    __slots__ = ('expr',)
+    def __init__(self, expr):
+        self.expr = expr
+
+class Print(IRNode):
+    __slots__ = ('conversion', 'expr')
+    def __init__(self, conversion, expr):
+        self.conversion = conversion  # printf conversion for expr's C type
+        self.expr = expr
+
+class If(IRNode):
+    __slots__ = ('condition', 'then_body', 'else_body')
+    def __init__(self, condition, then_body, else_body):
+        self.condition = condition
+        self.then_body = then_body
+        self.else_body = else_body  # None without an else branch
+
+class While(IRNode):
+    __slots__ = ('condition', 'body')
+    def __init__(self, condition, body):
+        self.condition = condition
+        self.body = body
+
+class For(IRNode):
+    __slots__ = ('init', 'condition', 'step', 'body')
+    def __init__(self, init, condition, step, body):
+        self.init = init  # Declare, ExprStmt or None
+        self.condition = condition
+        self.step = step
+        self.body = body
+
+class Return(IRNode):
+    __slots__ = ('value',)
+    def __init__(self, value):
+        self.value = value
+
+class Block(IRNode):
+    __slots__ = ('body',)
+    def __init__(self, body):
+        self.body = body
+
+# Visitor.fold walks IR operator chains without recursion too
+OPERATOR_OPERANDS.update({
+    BinOp: ('left', 'right'),
+    UnOp: ('operand',),
+    Convert: ('value',),
+})
+
+LOGICAL_C_OPERATORS = {"aur": "&&", "ya": "||"}
+UNARY_C_OPERATORS = {"nahi": "!", "-": "-"}
+NUMERIC_OPERATORS = {"+", "-", "*", "/", "%", "<", ">", "<=", ">=", "==", "!="}
+
+
+class IRBuilder(SemanticAnalyzer):
+    """Semantic analysis that lowers the AST to IR as it checks it.
+
+    Every check and error message is SemanticAnalyzer's; visits return IR
+    nodes instead of type names. A program with errors still lowers, with
+    placeholder symbols where names did not resolve.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.module = None
+
+    def analyze(self, program):
+        """SemanticAnalyzer.analyze, with the lowered Module under 'ir'"""
+        result = super().analyze(program)
+        result['ir'] = self.module
+        return result
+
+    def resolved(self, ident, name, type, kind):
+        """The Symbol ident refers to, or a stand-in for an undefined name"""
+        return self.symbols.resolve(ident) or Symbol(name, type, kind)
+
+    def convert(self, expr, type_name):
+        """expr converted to type_name where C would otherwise convert implicitly"""
+        if type_name == "sankhya" and expr.type == "ank":
+            if isinstance(expr, Const):
+                return Const(expr.text + ".0", "sankhya")
+            return Convert(expr, "sankhya")
+        return expr
+
+    def body_of(self, statement):
+        """Lowered statements of a branch or loop body; a block gives its contents"""
+        lowered = self.visit(statement)
+        return lowered.body if isinstance(lowered, Block) else [lowered]
+
+    def visit_Program(self, program):
+        """Lower the program node"""
+        self.module = Module([self.visit(statement) for statement in program.statements])
+        return self.module
+
+    def visit_FunctionDeclaration(self, func):
+        """Lower a function declaration"""
+        self.enter_function(func)
+        symbol = self.symbols.resolve(func.id)
+        params = [self.symbols.resolve(param.id) for param in func.params]
+        body = self.body_of(func.body)
+        self.exit_function()
+
+        # main returns 0 when it does not say otherwise
+        if func.name == "main" and not any(isinstance(stmt, Return) for stmt in body):
+            body.append(Return(Const("0", "ank")))
+        return_type = "int" if func.name == "main" else c_type(symbol.type)
+        return Function(symbol, params, return_type, body)
+
+    def visit_VarDeclaration(self, var_decl):
+        """Lower a variable declaration"""
+        self.check_redefinition(var_decl)
+        value = self.visit(var_decl.initializer) if var_decl.initializer else None
+        self.declare(var_decl, value.type if value else None)
+
+        symbol = self.symbols.resolve(var_decl.id)
+        ctype = c_type(symbol.type)
+        if value is None:
+            value = Const(DEFAULT_VALUES.get(ctype, "0"), symbol.type)
+        return Declare(symbol, ctype, self.convert(value, symbol.type))
+
+    def visit_BlockStatement(self, block):
+        """Lower a block statement"""
+        self.symbols.enter_scope()
+        body = [self.visit(statement) for statement in block.statements]
+        self.symbols.exit_scope()
+        return Block(body)
+
+    def visit_IfStatement(self, if_stmt):
+        """Lower an if statement"""
+        condition = self.visit(if_stmt.condition)
+        self.check_condition(condition.type, "if")
+        then_body = self.body_of(if_stmt.then_branch)
+        else_body = self.body_of(if_stmt.else_branch) if if_stmt.else_branch else None
+        return If(condition, then_body, else_body)
+
+    def visit_WhileStatement(self, while_stmt):
+        """Lower a while statement"""
+        condition = self.visit(while_stmt.condition)
+        self.check_condition(condition.type, "while")
+        return While(condition, self.body_of(while_stmt.body))
+
+    def visit_ForStatement(self, for_stmt):
+        """Lower a for statement"""
+        self.symbols.enter_scope()
+
+        init = self.visit(for_stmt.initializer) if for_stmt.initializer else None
+        condition = None
+        if for_stmt.condition:
+            condition = self.visit(for_stmt.condition)
+            self.check_condition(condition.type, "for")
+        step = self.visit(for_stmt.increment) if for_stmt.increment else None
+        body = self.body_of(for_stmt.body)
+
+        self.symbols.exit_scope()
+        return For(init, condition, step, body)
+
+    def visit_PrintStatement(self, print_stmt):
+        """Lower a print statement, choosing the conversion from the type"""
+        expr = self.visit(print_stmt.expression)
+        return Print(PRINTF_FORMATS.get(expr.ctype, "%d"), expr)
+
+    def visit_ReturnStatement(self, return_stmt):
+        """Lower a return statement"""
+        expected = self.expected_return(return_stmt)
+        if expected is None:
+            # A bare return, or a misplaced one that has been reported
+            return Return(None)
+
+        value = self.visit(return_stmt.value)
+        self.check_return_type(expected, value.type)
+        return Return(self.convert(value, expected))
+
+    def visit_ExpressionStatement(self, expr_stmt):
+        """Lower an expression statement"""
+        return ExprStmt(self.visit(expr_stmt.expression))
+
+    def visit_Assignment(self, assign):
+        """Lower an assignment"""
+        var_type = self.assignment_target(assign)
+        if var_type is None:
+            return Assign(Symbol(assign.name, "unknown", "variable"), Const("0", "unknown"), "unknown")
+
+        value = self.visit(assign.value)
+        self.check_assignment(assign, var_type, value.type)
+        return Assign(self.symbols.resolve(assign.id), self.convert(value, var_type), var_type)
+
+    def combine_Logical(self, logical, left, right):
+        type = SemanticAnalyzer.combine_Logical(self, logical, left.type, right.type)
+        return BinOp(LOGICAL_C_OPERATORS[logical.operator.value], left, right, type)
+
+    def combine_Binary(self, binary, left, right):
+        type = SemanticAnalyzer.combine_Binary(self, binary, left.type, right.type)
+        op = binary.operator.value
+        if op in NUMERIC_OPERATORS and "sankhya" in (left.type, right.type):
+            left, right = self.convert(left, "sankhya"), self.convert(right, "sankhya")
+        return BinOp(op, left, right, type)
+
+    def combine_Unary(self, unary, operand):
+        type = SemanticAnalyzer.combine_Unary(self, unary, operand.type)
+        return UnOp(UNARY_C_OPERATORS[unary.operator.value], operand, type)
+
+    def combine_Grouping(self, grouping, inner):
+        return inner
+
+    def visit_Call(self, call):
+        """Lower a function call"""
+        func_type, check_arguments = self.resolve_call(call)
+        callee = call.callee
+        name = callee.name if isinstance(callee, Variable) else ""
+        symbol = self.symbols.resolve(callee.id) if isinstance(callee, Variable) else None
+
+        if check_arguments:
+            args = [self.visit(arg) for arg in call.arguments]
+            self.check_arguments(call, [arg.type for arg in args])
+            if symbol is not None and symbol.params is not None and len(symbol.params) == len(args):
+                args = [self.convert(arg, param) for arg, param in zip(args, symbol.params)]
+        else:
+            # Calls the analyzer cannot check: lower the arguments without
+            # keeping any errors they would report
+            errors = len(self.errors)
+            args = [self.visit(arg) for arg in call.arguments]
+            del self.errors[errors:]
+        return FuncCall(symbol or Symbol(name, func_type, "function"), args, func_type)
+
+    def visit_Variable(self, variable):
+        """Lower a variable reference"""
+        symbol = self.symbols.resolve(variable.id)
+        if symbol is None or symbol.type is None:
+            # Undefined, or a void function: let the analyzer report it
+            type = SemanticAnalyzer.visit_Variable(self, variable)
+            return Ref(self.resolved(variable.id, variable.name, type, "variable"), type)
+        variable.type = symbol.type
+        return Ref(symbol, symbol.type)
+
+    def visit_Literal(self, literal):
+        """Lower a literal to its C spelling"""
+        type = SemanticAnalyzer.visit_Literal(self, literal)
+        value = str(literal.value)
+        if type == "vakya":
+            return Const(c_literal(value, '"'), type)
+        if type == "akshar":
+            return Const(c_literal(value, "'"), type)
+        return Const(value, type)
+
+class ParallelIRBuilder(ParallelSemanticAnalyzer, IRBuilder):
+    """IRBuilder with function bodies checked and lowered in worker processes.
+
+    Signatures and top-level statements are handled here in order, as in
+    ParallelSemanticAnalyzer; each worker runs an IRBuilder over its share
+    of the function bodies and sends back the errors and the lowered
+    Functions, which refer to this process's top-level Symbols. The errors
+    and the Module are the same as IRBuilder's.
+    """
+    function_analyzer = IRBuilder
+
+    def visit_Program(self, program):
+        """Lower the program, function bodies in parallel"""
+        self.module = Module(ParallelSemanticAnalyzer.visit_Program(self, program))
+        return self.module
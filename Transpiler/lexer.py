@@ -1,5 +1,11 @@
+import mmap
+import os
 import re
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum, auto
+from itertools import accumulate
 
 class TokenType(Enum):
     # Keywords
@@ -58,42 +64,353 @@ class TokenType(Enum):
     UNKNOWN = auto()
 
 class Token:
-    def __init__(self, token_type, value, line, column):
+    __slots__ = ('type', 'value', 'line', 'column', 'id')
+    
+    def __init__(self, token_type, value, line, column, ident=None):
         self.type = token_type
         self.value = value
         self.line = line
         self.column = column
+        self.id = ident  # Id in the lexer's NamePool for identifiers, else None
+    
+    def __repr__(self):
+        return f"Token({self.type}, '{self.value}', line={self.line}, col={self.column})"
+
+class TokenView:
+    """Token-compatible view of one entry in a TokenBuffer"""
+    __slots__ = ('buffer', 'index')
+    
+    def __init__(self, buffer, index):
+        self.buffer = buffer
+        self.index = index
+    
+    @property
+    def type(self):
+        return TOKEN_TYPES[self.buffer.kinds[self.index]]
+    
+    @property
+    def value(self):
+        return self.buffer.value(self.index)
+    
+    @property
+    def line(self):
+        return self.buffer.lines[self.index]
+    
+    @property
+    def column(self):
+        return self.buffer.column(self.index)
+    
+    @property
+    def id(self):
+        return self.buffer.ident(self.index)
+    
+    def __reduce__(self):
+        # Pickle as a standalone Token rather than dragging the whole buffer along
+        return Token, (self.type, self.value, self.line, self.column, self.id)
     
     def __repr__(self):
         return f"Token({self.type}, '{self.value}', line={self.line}, col={self.column})"
 
+class TokenBuffer:
+    """Struct-of-arrays token storage.
+    
+    Kinds (TokenType values), start/end offsets and line numbers live in
+    array('i') columns; values and columns are recomputed from the source
+    only when asked for, and identifiers are interned into names as they are.
+    """
+    
+    def __init__(self, source, names=None):
+        self.source = source  # str, or bytes-like (e.g. an mmap) holding UTF-8
+        self.binary = not isinstance(source, str)
+        self.names = names if names is not None else NamePool()
+        self.kinds = array('i')
+        self.starts = array('i')
+        self.ends = array('i')
+        self.lines = array('i')
+    
+    def append(self, token_type, start, end, line):
+        self.kinds.append(token_type.value)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.lines.append(line)
+    
+    def __len__(self):
+        return len(self.kinds)
+    
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.kinds)
+        if not 0 <= index < len(self.kinds):
+            raise IndexError("token index out of range")
+        return TokenView(self, index)
+    
+    def lexeme(self, index):
+        """Source text of token index"""
+        text = self.source[self.starts[index]:self.ends[index]]
+        return text.decode('utf-8') if self.binary else text
+    
+    def value(self, index):
+        """Slice (and unescape) the value of token index from the source"""
+        kind = self.kinds[index]
+        if kind == IDENTIFIER_KIND:
+            return self.names.names[self.ident(index)]
+        text = self.lexeme(index)
+        if kind == STRING_KIND or kind == CHAR_KIND:
+            return unescape(text[1:-1])
+        if kind == UNKNOWN_KIND and text[:1] in ('"', "'"):
+            # Unterminated string or character literal
+            return unescape(text[1:])
+        return text
+    
+    def ident(self, index):
+        """Id of identifier token index in names, or None for other tokens"""
+        if self.kinds[index] != IDENTIFIER_KIND:
+            return None
+        return self.names.intern(self.lexeme(index))
+    
+    def column(self, index):
+        """Column of token index, counted from the start of its first line"""
+        start = self.starts[index]
+        if not self.binary:
+            return start - (self.source.rfind('\n', 0, start) + 1) + 1
+        
+        # Offsets count bytes; columns count characters
+        line_start = self.source.rfind(b'\n', 0, start) + 1
+        prefix = self.source[line_start:start]
+        if prefix.isascii():
+            return start - line_start + 1
+        return len(prefix.decode('utf-8')) + 1
+
+class NamePool:
+    """Interns identifier names as small integer ids.
+    
+    Every identifier spelling is stored once; tokens, AST nodes and the
+    symbol table refer to names by id, and names[id] gives the shared string
+    back. Each lexer fills a pool of its own, so ids only mean something
+    among the tokens and nodes of one compilation, and a pool is freed along
+    with them.
+    """
+    
+    def __init__(self):
+        self.ids = {}
+        self.names = []
+    
+    def intern(self, name):
+        """Return the id of name, assigning the next free id if it is new"""
+        ident = self.ids.get(name)
+        if ident is None:
+            ident = len(self.names)
+            self.ids[name] = ident
+            self.names.append(name)
+        return ident
+    
+    def __len__(self):
+        return len(self.names)
+
+# Keyword mappings shared by both tokenizer engines
+KEYWORDS = {
+    'agar': TokenType.IF,
+    'nahi_to': TokenType.ELSE,
+    'jabtak': TokenType.WHILE,
+    'karo': TokenType.FOR,
+    'vidhi': TokenType.FUNCTION,
+    'wapas': TokenType.RETURN,
+    'ank': TokenType.INT,
+    'sankhya': TokenType.FLOAT,
+    'vakya': TokenType.STRING,
+    'akshar': TokenType.CHAR,
+    'likho': TokenType.PRINT,
+    
+    # Logical operators
+    'aur': TokenType.AND,
+    'ya': TokenType.OR,
+    'nahi': TokenType.NOT
+}
+
+OPERATORS = {
+    '==': TokenType.EQUALS,
+    '!=': TokenType.NOT_EQUALS,
+    '<=': TokenType.LESS_EQUAL,
+    '>=': TokenType.GREATER_EQUAL,
+    '+': TokenType.PLUS,
+    '-': TokenType.MINUS,
+    '*': TokenType.MULTIPLY,
+    '/': TokenType.DIVIDE,
+    '=': TokenType.ASSIGN,
+    '<': TokenType.LESS_THAN,
+    '>': TokenType.GREATER_THAN,
+    '(': TokenType.LEFT_PAREN,
+    ')': TokenType.RIGHT_PAREN,
+    '{': TokenType.LEFT_BRACE,
+    '}': TokenType.RIGHT_BRACE,
+    ';': TokenType.SEMICOLON,
+    ',': TokenType.COMMA
+}
+
+# One alternation covering every lexeme. The ASCII-only classes are exact
+# for ASCII input; anything touching a non-ASCII character is handed to
+# scan_unicode, which applies the same str.isalpha/isdigit/isspace rules
+# as the legacy scanner.
+TOKEN_PATTERN = re.compile(r"""
+    (?P<SKIP>(?:[ \t\n\r\x0b\x0c\x1c-\x1f]+|\#[^\n]*)+)
+  | (?:(?P<IDENT>[A-Za-z_][A-Za-z0-9_]*)|(?P<NUMBER>[0-9]+(?:\.[0-9]*)?))(?P<WIDE>[^\x00-\x7f])?
+  | (?P<STRING>"(?:[^"\\]|\\.)*(?:\\\Z)?(?P<STRING_END>")?)
+  | (?P<CHAR>'(?:\\.|.)?(?P<CHAR_END>')?)
+  | (?P<OP>[=!<>]=|[-+*/(){};,=<>])
+  | (?P<UNICODE>[^\x00-\x7f])
+  | (?P<OTHER>.)
+""", re.VERBOSE | re.DOTALL)
+
+# The same lexemes matched over raw bytes, for memory-mapped input
+BYTES_TOKEN_PATTERN = re.compile(TOKEN_PATTERN.pattern.encode('ascii'), re.VERBOSE | re.DOTALL)
+BYTES_KEYWORDS = {word.encode('ascii'): token_type for word, token_type in KEYWORDS.items()}
+BYTES_OPERATORS = {op.encode('ascii'): token_type for op, token_type in OPERATORS.items()}
+
+# A carriage return that text mode would turn into a line break of its own
+BYTES_LONE_CR = re.compile(rb'\r(?!\n)')
+
+# Just the lexemes that can hide a newline - string and character literals
+# and comments - plus the stretches between them, for finding split points
+SPLIT_PATTERN = re.compile(r"""
+    (?P<LITERAL>"(?:[^"\\]|\\.)*(?:\\\Z)?"?|'(?:\\.|.)?'?|\#[^\n]*)
+  | (?P<PLAIN>[^"'\#]+)
+""", re.VERBOSE | re.DOTALL)
+
+# TokenType lookup by TokenBuffer kind, plus the kinds compared most often
+TOKEN_TYPES = {token_type.value: token_type for token_type in TokenType}
+EOF_KIND = TokenType.EOF.value
+UNKNOWN_KIND = TokenType.UNKNOWN.value
+IDENTIFIER_KIND = TokenType.IDENTIFIER.value
+STRING_KIND = TokenType.STRING_LITERAL.value
+CHAR_KIND = TokenType.CHAR_LITERAL.value
+
+ESCAPE_PATTERN = re.compile(r'\\(.)', re.DOTALL)
+ESCAPES = {'n': '\n', 't': '\t'}
+
+def unescape(text):
+    """Resolve backslash escapes the way string and character literals do"""
+    if '\\' not in text:
+        return text
+    return ESCAPE_PATTERN.sub(lambda m: ESCAPES.get(m.group(1), m.group(1)), text)
+
+def scan_unicode(source, pos):
+    """Scan one lexeme at pos with the legacy character rules.
+    
+    Returns (token_type, end); token_type is None for a run of whitespace.
+    """
+    char = source[pos]
+    end = pos + 1
+    if char.isspace():
+        while end < len(source) and source[end].isspace():
+            end += 1
+        return None, end
+    if char.isalpha() or char == '_':
+        while end < len(source) and (source[end].isalnum() or source[end] == '_'):
+            end += 1
+        return KEYWORDS.get(source[pos:end], TokenType.IDENTIFIER), end
+    if char.isdigit():
+        is_float = False
+        while end < len(source) and (source[end].isdigit() or source[end] == '.'):
+            if source[end] == '.':
+                if is_float:
+                    break
+                is_float = True
+            end += 1
+        return TokenType.FLOAT_LITERAL if is_float else TokenType.INTEGER_LITERAL, end
+    return TokenType.UNKNOWN, end
+
+def scan(source, pos=0, line=1, line_start=0, final=True, names=None):
+    """Yield (type, value, start, end, line, column, id) for every token after pos.
+    
+    line/line_start describe the position pos sits on. Multi-line string and
+    character literals report the line they end on, like the legacy scanner.
+    Identifiers are interned into the NamePool names, which gives their id;
+    without a pool, and for every other token, id is None.
+    With final=False the source is only a prefix of the input: scanning stops
+    before any lexeme that runs into the end of it, no EOF token is produced,
+    and the (pos, line, line_start) to resume from is returned.
+    """
+    match = TOKEN_PATTERN.match
+    intern = names.intern if names is not None else None
+    length = len(source)
+    while pos < length:
+        m = match(source, pos)
+        kind = m.lastgroup
+        start = pos
+        pos = m.end()
+        
+        if pos == length and not final:
+            # The lexeme may continue in the next piece of input
+            pos = start
+            break
+        
+        if kind == 'SKIP':
+            if '\n' in m.group():
+                line += m.group().count('\n')
+                line_start = source.rfind('\n', start, pos) + 1
+            continue
+        
+        if kind == 'IDENT':
+            value = m.group()
+            token_type = KEYWORDS.get(value, TokenType.IDENTIFIER)
+            ident = None
+            if token_type is TokenType.IDENTIFIER and intern is not None:
+                ident = intern(value)
+                value = names.names[ident]
+            yield token_type, value, start, pos, line, start - line_start + 1, ident
+        elif kind == 'OP':
+            value = m.group()
+            yield OPERATORS[value], value, start, pos, line, start - line_start + 1, None
+        elif kind == 'NUMBER':
+            value = m.group()
+            token_type = TokenType.FLOAT_LITERAL if '.' in value else TokenType.INTEGER_LITERAL
+            yield token_type, value, start, pos, line, start - line_start + 1, None
+        elif kind == 'STRING' or kind == 'CHAR':
+            text = m.group()
+            column = start - line_start + 1
+            if '\n' in text:
+                line += text.count('\n')
+                line_start = source.rfind('\n', start, pos) + 1
+            if m.group(kind + '_END'):
+                token_type = TokenType.STRING_LITERAL if kind == 'STRING' else TokenType.CHAR_LITERAL
+                yield token_type, unescape(text[1:-1]), start, pos, line, column, None
+            else:
+                # Unterminated literal
+                yield TokenType.UNKNOWN, unescape(text[1:]), start, pos, line, column, None
+        elif kind == 'OTHER':
+            yield TokenType.UNKNOWN, m.group(), start, pos, line, start - line_start + 1, None
+        else:
+            # WIDE or UNICODE: the lexeme involves a non-ASCII character
+            token_type, pos = scan_unicode(source, start)
+            if pos == length and not final:
+                pos = start
+                break
+            if token_type is not None:
+                value, ident = source[start:pos], None
+                if token_type is TokenType.IDENTIFIER and intern is not None:
+                    ident = intern(value)
+                    value = names.names[ident]
+                yield token_type, value, start, pos, line, start - line_start + 1, ident
+            elif '\n' in source[start:pos]:
+                line += source.count('\n', start, pos)
+                line_start = source.rfind('\n', start, pos) + 1
+    
+    if final:
+        yield TokenType.EOF, "", pos, pos, line, pos - line_start + 1, None
+    return pos, line, line_start
+
 class Lexer:
-    def __init__(self, source_code):
+    def __init__(self, source_code, legacy=False, names=None):
         self.source = source_code
+        self.legacy = legacy  # Use the character-by-character scanner instead of TOKEN_PATTERN
+        self.names = names if names is not None else NamePool()  # Identifier ids for these tokens
         self.position = 0
         self.line = 1
         self.column = 1
         self.tokens = []
         
         # Define keyword mappings
-        self.keywords = {
-            'agar': TokenType.IF,
-            'nahi_to': TokenType.ELSE,
-            'jabtak': TokenType.WHILE,
-            'karo': TokenType.FOR,
-            'vidhi': TokenType.FUNCTION,
-            'wapas': TokenType.RETURN,
-            'ank': TokenType.INT,
-            'sankhya': TokenType.FLOAT,
-            'vakya': TokenType.STRING,
-            'akshar': TokenType.CHAR,
-            'likho': TokenType.PRINT,
-            
-            # Logical operators
-            'aur': TokenType.AND,
-            'ya': TokenType.OR,
-            'nahi': TokenType.NOT
-        }
+        self.keywords = KEYWORDS
 
     def peek(self):
         """Look at the current character without consuming it"""
@@ -134,6 +451,31 @@ class Lexer:
     
     def tokenize(self):
         """Convert the source code into tokens"""
+        if self.legacy:
+            return self.tokenize_legacy()
+        
+        self.tokens.extend(self.iter_tokens())
+        return self.tokens
+    
+    def iter_tokens(self):
+        """Yield tokens one at a time instead of building the whole list"""
+        if self.legacy:
+            yield from self.tokenize_legacy()
+            return
+        
+        for token_type, value, _, _, line, column, ident in scan(self.source, names=self.names):
+            yield Token(token_type, value, line, column, ident)
+    
+    def tokenize_buffer(self):
+        """Convert the source code into a compact TokenBuffer"""
+        buffer = TokenBuffer(self.source, self.names)
+        append = buffer.append
+        for token_type, _, start, end, line, _, _ in scan(self.source):
+            append(token_type, start, end, line)
+        return buffer
+    
+    def tokenize_legacy(self):
+        """Convert the source code into tokens one character at a time"""
         while self.position < len(self.source):
             # Skip whitespace
             self.skip_whitespace()
@@ -187,12 +529,15 @@ class Lexer:
             identifier += self.advance()
         
         # Check if it's a keyword
+        ident = None
         if identifier in self.keywords:
             token_type = self.keywords[identifier]
         else:
             token_type = TokenType.IDENTIFIER
+            ident = self.names.intern(identifier)
+            identifier = self.names.names[ident]
         
-        self.tokens.append(Token(token_type, identifier, self.line, start_column))
+        self.tokens.append(Token(token_type, identifier, self.line, start_column, ident))
     
     def tokenize_number(self):
         """Tokenize a number (integer or float)"""
@@ -328,15 +673,439 @@ class Lexer:
             else:
                 self.tokens.append(Token(TokenType.UNKNOWN, char, self.line, column))
 
-# Example usage
-def tokenize_file(file_path):
+class ChunkedText:
+    """Text held as a list of chunks of at most chunk_size characters.
+    
+    Replacing a span rebuilds only the chunks it touches and reading a span
+    joins only the chunks it covers, so neither copies the whole text.
+    """
+    
+    def __init__(self, text, chunk_size=1 << 16):
+        self.chunk_size = size = chunk_size
+        self.chunks = [text[i:i + size] for i in range(0, len(text), size)] or [""]
+        self.length = len(text)
+        self._offsets = None  # Offset of each chunk's first character, rebuilt after edits
+    
+    def __len__(self):
+        return self.length
+    
+    def __str__(self):
+        return "".join(self.chunks)
+    
+    def locate(self, offset):
+        """(chunk index, offset within that chunk) of a text offset"""
+        if self._offsets is None:
+            self._offsets = list(accumulate(map(len, self.chunks[:-1]), initial=0))
+        index = bisect_right(self._offsets, offset) - 1
+        return index, offset - self._offsets[index]
+    
+    def slice(self, start, end):
+        """The text from start to end, as a str"""
+        if start >= end:
+            return ""
+        first, head = self.locate(start)
+        last, tail = self.locate(end)
+        if first == last:
+            return self.chunks[first][head:tail]
+        return "".join([self.chunks[first][head:]] + self.chunks[first + 1:last] + [self.chunks[last][:tail]])
+    
+    def replace(self, start, end, text):
+        """Replace the text from start to end with text"""
+        first, head = self.locate(start)
+        last, tail = self.locate(end)
+        merged = self.chunks[first][:head] + text + self.chunks[last][tail:]
+        size = self.chunk_size
+        pieces = [merged[i:i + size] for i in range(0, len(merged), size)]
+        if not pieces and len(self.chunks) == last - first + 1:
+            pieces = [""]
+        self.chunks[first:last + 1] = pieces
+        self.length += len(text) - (end - start)
+        self._offsets = None
+    
+    def find(self, char, start):
+        """Offset of the first char at or after start, or -1"""
+        index, pos = self.locate(start)
+        base = start - pos
+        chunks = self.chunks
+        while index < len(chunks):
+            found = chunks[index].find(char, pos)
+            if found != -1:
+                return base + found
+            base += len(chunks[index])
+            index += 1
+            pos = 0
+        return -1
+    
+    def rfind(self, char, end):
+        """Offset of the last char before end, or -1"""
+        index, pos = self.locate(end)
+        base = end - pos
+        chunks = self.chunks
+        while index >= 0:
+            found = chunks[index].rfind(char, 0, pos)
+            if found != -1:
+                return base + found
+            index -= 1
+            pos = len(chunks[index]) if index >= 0 else 0
+            base -= pos
+        return -1
+
+class IncrementalLexer:
+    """Keeps a token list up to date as the source is edited.
+    
+    An edit re-scans from the end of the last token before it until the new
+    tokens line up with the old ones again on a later line, and splices the
+    result in. Tokens after the splice share a pending offset/line shift that
+    is only applied to the tokens between successive edit points (or when
+    tokens are read), and the source is kept as ChunkedText and scanned a
+    window at a time, so the cost of an edit follows the size of the edit
+    and the distance from the previous one, not the size of the file.
+    
+    Every identifier typed on the way to a finished one (n, na, nam, ...)
+    lands in the name pool, so once the pool holds twice the names it did
+    after the last rebuild, and at least compact_after, edit() rebuilds it
+    from the live tokens; names then refers to a new NamePool.
+    """
+    
+    def __init__(self, source, chunk_size=1 << 16, compact_after=1 << 12):
+        self.text = ChunkedText(source, chunk_size)
+        self.names = NamePool()
+        self._tokens = []
+        self.starts = []
+        self.ends = []
+        for token_type, value, start, end, line, column, ident in scan(source, names=self.names):
+            self._tokens.append(Token(token_type, value, line, column, ident))
+            self.starts.append(start)
+            self.ends.append(end)
+        self.compact_after = compact_after
+        self._compact_at = max(2 * len(self.names), compact_after)
+        
+        # Tokens from _shift_from on are stale by (_shift_offset, _shift_line)
+        self._shift_from = len(self._tokens)
+        self._shift_offset = 0
+        self._shift_line = 0
+    
+    @property
+    def tokens(self):
+        """The full, up to date token list"""
+        self._settle(len(self._tokens))
+        return self._tokens
+    
+    def tokens_in(self, first, stop):
+        """Up to date tokens[first:stop], settling no more than needed"""
+        self._settle(stop)
+        return self._tokens[first:stop]
+    
+    def iter_tokens(self, first=0, chunk=64):
+        """Yield up to date tokens from index first on, settling chunk by chunk"""
+        count = len(self._tokens)
+        while first < count:
+            stop = min(first + chunk, count)
+            self._settle(stop)
+            yield from self._tokens[first:stop]
+            first = stop
+    
+    def edit(self, offset, deleted, inserted):
+        """Replace deleted characters at offset with inserted text.
+        
+        Returns (first, removed, added): the index of the first replaced
+        token, how many old tokens were replaced, and the new tokens.
+        """
+        text = self.text
+        if offset < 0 or deleted < 0 or offset + deleted > len(text):
+            raise ValueError(f"Edit ({offset}, {deleted}) is outside the source")
+        
+        delta = len(inserted) - deleted
+        line_delta = inserted.count('\n') - text.slice(offset, offset + deleted).count('\n')
+        edit_end = offset + len(inserted)
+        text.replace(offset, offset + deleted, inserted)
+        
+        # First token that ends at or after the edit; everything before it is
+        # unaffected, including the lookahead character that ended it
+        first = self._find_end(offset)
+        self._move_shift(first)
+        shift_offset = self._shift_offset
+        
+        if first > 0:
+            restart = self.ends[first - 1]
+            line = self._tokens[first - 1].line
+        else:
+            restart, line = 0, 1
+        line_start = text.rfind('\n', restart) + 1
+        
+        # Old tokens can be reused once a new token starts where an old one
+        # did (in shifted coordinates) on a line after the edit
+        newline = text.find('\n', edit_end)
+        resync_after = newline if newline != -1 else len(text)
+        
+        tokens, starts, ends = [], [], []
+        old = first
+        old_count = len(self._tokens)
+        stop = old_count
+        window = resync_after - restart + 1024
+        for token_type, value, start, end, token_line, column, ident in self._scan(restart, line, line_start, window):
+            if start > resync_after:
+                old_start = start - delta - shift_offset
+                while old < old_count and self.starts[old] < old_start:
+                    old += 1
+                if old < old_count and self.starts[old] == old_start:
+                    stop = old
+                    break
+            tokens.append(Token(token_type, value, token_line, column, ident))
+            starts.append(start)
+            ends.append(end)
+        
+        self._tokens[first:stop] = tokens
+        self.starts[first:stop] = starts
+        self.ends[first:stop] = ends
+        
+        # Reused tokens keep their stored positions; record how far off they are
+        self._shift_from = first + len(tokens)
+        if stop < old_count:
+            self._shift_offset = shift_offset + delta
+            self._shift_line += line_delta
+        else:
+            self._shift_offset = self._shift_line = 0
+        
+        if len(self.names) > self._compact_at:
+            self.compact()
+        return first, stop - first, tokens
+    
+    def compact(self):
+        """Move the tokens onto a new NamePool holding only the names they use"""
+        old_names = self.names.names
+        names = NamePool()
+        moved = [None] * len(old_names)  # old id -> new id
+        for token in self._tokens:
+            ident = token.id
+            if ident is not None:
+                if moved[ident] is None:
+                    moved[ident] = names.intern(old_names[ident])
+                token.id = moved[ident]
+        self.names = names
+        self._compact_at = max(2 * len(names), self.compact_after)
+    
+    @property
+    def source(self):
+        """The whole source text, joined from its chunks"""
+        return str(self.text)
+    
+    def _scan(self, pos, line, line_start, window):
+        """scan() over the source from pos, reading it a window at a time
+        (each twice the last) rather than as one string"""
+        text = self.text
+        while True:
+            end = min(pos + window, len(text))
+            final = end == len(text)
+            tokens = scan(text.slice(pos, end), 0, line, line_start - pos, final, self.names)
+            while True:
+                try:
+                    token_type, value, start, stop, token_line, column, ident = next(tokens)
+                except StopIteration as done:
+                    resume, line, line_start = done.value
+                    break
+                yield token_type, value, pos + start, pos + stop, token_line, column, ident
+            if final:
+                return
+            line_start += pos
+            pos += resume
+            window *= 2
+    
+    def _find_end(self, offset):
+        """Index of the first token whose end is at or after offset"""
+        split = self._shift_from
+        if split > 0 and self.ends[split - 1] >= offset:
+            return bisect_left(self.ends, offset, 0, split)
+        return bisect_left(self.ends, offset - self._shift_offset, split, len(self.ends))
+    
+    def _settle(self, stop):
+        """Make sure tokens before stop carry their real positions"""
+        if stop > self._shift_from:
+            self._move_shift(stop)
+    
+    def _move_shift(self, index):
+        """Move the start of the stale region to index"""
+        shift_offset, shift_line = self._shift_offset, self._shift_line
+        if shift_offset or shift_line:
+            if index > self._shift_from:
+                indices, sign = range(self._shift_from, index), 1
+            else:
+                indices, sign = range(index, self._shift_from), -1
+            shift_offset *= sign
+            shift_line *= sign
+            tokens, starts, ends = self._tokens, self.starts, self.ends
+            for k in indices:
+                starts[k] += shift_offset
+                ends[k] += shift_offset
+                tokens[k].line += shift_line
+        self._shift_from = index
+
+def scan_bytes(data, buffer):
+    """Append the tokens of bytes-like data to a TokenBuffer.
+    
+    Returns False, with buffer partly filled, as soon as a lexeme outside a
+    string or comment involves a non-ASCII byte, whose character rules only
+    exist on decoded text, or a literal holds a carriage return, which text
+    mode would drop from its value.
+    """
+    match = BYTES_TOKEN_PATTERN.match
+    append = buffer.append
+    pos, line, length = 0, 1, len(data)
+    while pos < length:
+        m = match(data, pos)
+        kind = m.lastgroup
+        start = pos
+        pos = m.end()
+        
+        if kind == 'SKIP':
+            line += m.group().count(b'\n')
+        elif kind == 'IDENT':
+            append(BYTES_KEYWORDS.get(m.group(), TokenType.IDENTIFIER), start, pos, line)
+        elif kind == 'OP':
+            append(BYTES_OPERATORS[m.group()], start, pos, line)
+        elif kind == 'NUMBER':
+            is_float = b'.' in m.group()
+            append(TokenType.FLOAT_LITERAL if is_float else TokenType.INTEGER_LITERAL, start, pos, line)
+        elif kind == 'STRING' or kind == 'CHAR':
+            text = m.group()
+            if b'\r' in text or (kind == 'CHAR' and not text.isascii()):
+                # Text mode drops the \r from the value, and the byte pattern
+                # would split a multi-byte character
+                return False
+            line += text.count(b'\n')
+            if m.group(kind + '_END'):
+                token_type = TokenType.STRING_LITERAL if kind == 'STRING' else TokenType.CHAR_LITERAL
+            else:
+                token_type = TokenType.UNKNOWN
+            append(token_type, start, pos, line)
+        elif kind == 'OTHER':
+            append(TokenType.UNKNOWN, start, pos, line)
+        else:
+            return False
+    
+    append(TokenType.EOF, pos, pos, line)
+    return True
+
+def tokenize_mapped(file_path):
+    """Tokenize a file through a read-only memory map.
+    
+    Returns a TokenBuffer whose offsets point into the map; values are decoded
+    (as UTF-8) only when a consumer asks for them. CRLF line breaks are
+    lexed like LF ones. Input the byte scanner cannot reproduce exactly -
+    carriage returns that text mode would translate into something else,
+    or non-ASCII lexemes - and files that cannot be mapped are read as text.
+    """
+    with open(file_path, 'rb') as file:
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            data = b""  # Empty files cannot be mapped
+        except OSError:
+            data = None  # Pipes, character devices, ...
+    
+    if data is not None and BYTES_LONE_CR.search(data) is None:
+        buffer = TokenBuffer(data)
+        if scan_bytes(data, buffer):
+            return buffer
+    
     with open(file_path, 'r') as file:
-        source_code = file.read()
+        return Lexer(file.read()).tokenize_buffer()
+
+def find_split_points(source, parts):
+    """Offsets that divide source into about `parts` chunks of whole lines.
     
-    lexer = Lexer(source_code)
-    tokens = lexer.tokenize()
+    Each offset follows a newline that lies outside every string, character
+    literal and comment, so lexing the chunks separately gives the same
+    tokens as lexing the whole source.
+    """
+    points = []
+    step = len(source) // parts
+    target = step
+    for m in SPLIT_PATTERN.finditer(source):
+        if len(points) == parts - 1:
+            break
+        if m.end() <= target or m.lastgroup != 'PLAIN':
+            continue
+        newline = source.find('\n', max(target, m.start()), m.end())
+        if newline != -1:
+            points.append(newline + 1)
+            target = max(target + step, newline + 1)
+    return points
+
+def _lex_chunk(chunk):
+    """Worker: lex one chunk into compact columns that are cheap to send back"""
+    kinds, lines, columns = array('i'), array('i'), array('i')
+    values = []
+    for token_type, value, _, _, line, column, _ in scan(chunk):
+        kinds.append(token_type.value)
+        values.append(value)
+        lines.append(line)
+        columns.append(column)
+    return kinds, values, lines, columns
+
+def tokenize_parallel(source, workers=None, min_chunk=1 << 18, names=None):
+    """Lex source in chunks across worker processes.
+    
+    Produces exactly the token list Lexer(source, names=names).tokenize()
+    does. Sources too small to be worth splitting are lexed in this process.
+    """
+    workers = workers or os.cpu_count() or 1
+    parts = min(workers, len(source) // min_chunk)
+    if names is None:
+        names = NamePool()
+    if parts < 2:
+        return Lexer(source, names=names).tokenize()
+    
+    bounds = [0] + find_split_points(source, parts) + [len(source)]
+    chunks = [source[start:end] for start, end in zip(bounds, bounds[1:])]
+    
+    tokens = []
+    line_offset = 0
+    intern = names.intern
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(_lex_chunk, chunks)
+        for index, (chunk, (kinds, values, lines, columns)) in enumerate(zip(chunks, results)):
+            # Every chunk but the last ends with its own EOF token to drop
+            count = len(kinds) if index == len(chunks) - 1 else len(kinds) - 1
+            # Workers leave identifiers to be interned here, in one pool for every chunk
+            ids = [intern(value) if kind == IDENTIFIER_KIND else None
+                   for kind, value in zip(kinds, values)]
+            tokens.extend(Token(TOKEN_TYPES[kinds[i]], values[i] if ids[i] is None else names.names[ids[i]],
+                                lines[i] + line_offset, columns[i], ids[i])
+                          for i in range(count))
+            line_offset += chunk.count('\n')
     return tokens
 
+# Example usage
+def tokenize_file(file_path):
+    return list(tokenize_mapped(file_path))
+
+def tokenize_stream(stream, chunk_size=1 << 16, names=None):
+    """Yield tokens from a text stream (stdin, a socket file, ...) as it is read"""
+    if names is None:
+        names = NamePool()
+    buffer = ""
+    pos, line, line_start = 0, 1, 0
+    while True:
+        chunk = stream.read(chunk_size)
+        
+        # Keep only the unfinished tail of the previous chunk; line_start may go
+        # negative, which keeps column arithmetic relative to the new buffer right
+        buffer = buffer[pos:] + chunk
+        line_start -= pos
+        
+        scanner = scan(buffer, 0, line, line_start, not chunk, names)
+        while True:
+            try:
+                token_type, value, _, _, token_line, column, ident = next(scanner)
+            except StopIteration as stop:
+                pos, line, line_start = stop.value
+                break
+            yield Token(token_type, value, token_line, column, ident)
+        
+        if not chunk:
+            return
+
 # Test function
 if __name__ == "__main__":
     # You can add a simple test here if needed
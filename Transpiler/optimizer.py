@@ -0,0 +1,636 @@
+# optimizer.py
+
+from ir import *
+
+# Folded values stay strictly inside int's range; INT_MIN is left out
+# because C reads "-2147483648" as the negation of a long
+INT_MAX = 2**31 - 1
+
+BOOLEAN_OPERATORS = {
+    "<": lambda a, b: a < b,
+    ">": lambda a, b: a > b,
+    "<=": lambda a, b: a <= b,
+    ">=": lambda a, b: a >= b,
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "&&": lambda a, b: bool(a) and bool(b),
+    "||": lambda a, b: bool(a) or bool(b),
+}
+
+# Largest magnitude a float holds exactly, for folding int -> float conversions
+FLOAT_EXACT = 2**24
+
+
+def int_value(expr):
+    """The value of an int constant (ank or boolean), or None"""
+    if type(expr) is not Const or expr.type not in ("ank", "boolean"):
+        return None
+    text = expr.text
+    if text.startswith("(") and text.endswith(")"):
+        text = text[1:-1]
+    try:
+        value = int(text)
+    except ValueError:
+        return None
+    # Only canonical decimal spellings: "010" is octal in C
+    if str(value) != text or not -INT_MAX <= value <= INT_MAX:
+        return None
+    return value
+
+
+def int_constant(value, type):
+    """A Const for an int value, negative values parenthesised"""
+    return Const(str(value) if value >= 0 else f"({value})", type)
+
+
+def c_division(a, b):
+    """a / b and a % b as C computes them on ints, truncating toward zero"""
+    quotient = abs(a) // abs(b)
+    if (a < 0) != (b < 0):
+        quotient = -quotient
+    return quotient, a - b * quotient
+
+
+def evaluate(op, a, b):
+    """The value of a C int operation on constants, or None where folding
+    it could change what the program does"""
+    if op in BOOLEAN_OPERATORS:
+        return int(BOOLEAN_OPERATORS[op](a, b))
+    if op == "+":
+        value = a + b
+    elif op == "-":
+        value = a - b
+    elif op == "*":
+        value = a * b
+    elif op in ("/", "%"):
+        if b == 0:
+            # Division by zero stays in the program, as written
+            return None
+        quotient, remainder = c_division(a, b)
+        value = quotient if op == "/" else remainder
+    else:
+        return None
+    return value if -INT_MAX <= value <= INT_MAX else None
+
+
+def walk(node):
+    """Every IR node in node (a node or a list of nodes), without recursion"""
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, IRNode):
+            yield node
+            stack.extend(getattr(node, field) for field in type(node).__slots__)
+
+
+def assigned_symbols(node):
+    """Symbols assigned anywhere in node"""
+    return {expr.symbol for expr in walk(node) if type(expr) is Assign}
+
+
+def declared_symbols(node):
+    """Symbols of the variables declared anywhere in node"""
+    return {declare.symbol for declare in walk(node) if type(declare) is Declare}
+
+
+# Operations that cannot trap or have side effects, on the C types where
+# that holds; moving one changes nothing but when it is computed
+HOISTABLE_TYPES = {"int", "float"}
+TRAPPING_OPERATORS = {"/", "%"}
+
+
+def closed_under_calls(module, allowed):
+    """Symbols of the functions every node of whose body passes allowed and
+    that call only such functions; recursion never qualifies"""
+    functions = {func.symbol: func for func in module.body if type(func) is Function}
+    callees = {}
+    for symbol, func in functions.items():
+        called = set()
+        for node in walk(func.body):
+            if type(node) is FuncCall:
+                called.add(node.symbol)
+            elif not allowed(node):
+                break
+        else:
+            callees[symbol] = called
+
+    # A function qualifies once everything it calls does
+    closed = set()
+    changed = True
+    while changed:
+        changed = False
+        for symbol, called in callees.items():
+            if symbol not in closed and called <= closed:
+                closed.add(symbol)
+                changed = True
+    return closed
+
+
+def pure_functions(module, mutable_globals):
+    """Symbols of the functions a call to which can be moved freely: no
+    output, no loops or recursion (so they always return), no division (so
+    they cannot trap), no assignments to globals and no reads of globals
+    that are ever assigned, and calling only such functions"""
+    def allowed(node):
+        kind = type(node)
+        return not (kind in (Print, While, For)
+                    or (kind is BinOp and node.op in TRAPPING_OPERATORS)
+                    or (kind in (Ref, Assign) and node.symbol in mutable_globals)
+                    or (kind is Assign and node.symbol.kind != "variable"))
+    return closed_under_calls(module, allowed)
+
+
+def returning_functions(module):
+    """Symbols of the functions that always return: no loops or recursion"""
+    return closed_under_calls(module, lambda node: type(node) not in (While, For))
+
+
+# Signed int overflow is undefined behaviour in C, so an operation that can
+# overflow may only be computed where the program computes it anyway
+OVERFLOWING_OPERATORS = {"+", "-", "*"}
+
+
+def may_overflow(node):
+    """Whether node is an int operation that can overflow"""
+    kind = type(node)
+    return (((kind is BinOp and node.op in OVERFLOWING_OPERATORS) or (kind is UnOp and node.op == "-"))
+            and node.ctype == "int")
+
+
+class ConstantFolder(Visitor):
+    """Constant folding and propagation over an IR Module, in place.
+
+    Int (ank and boolean) operations on constants are computed at compile
+    time as C would compute them, except where that could change behaviour:
+    results outside int's range, and division or remainder by zero, are left
+    for run time. An ank variable that is never assigned after its
+    declaration and is initialised to a constant has its uses replaced by
+    the constant and its declaration dropped. An if whose condition folds
+    keeps only the branch that runs, still in braces; a while whose
+    condition folds to false is removed.
+    """
+
+    name = "constant folding"
+
+    def __init__(self):
+        super().__init__()
+        self.stats = {"expressions folded": 0, "constants propagated": 0,
+                      "declarations removed": 0, "branches pruned": 0, "loops removed": 0}
+        self.assigned = set()
+        self.constants = {}  # Symbol -> Const it always holds
+
+    def run(self, module):
+        self.assigned = assigned_symbols(module)
+        self.constants = {}
+        self.visit(module)
+        return module
+
+    def body(self, statements):
+        """Optimised statements, leaving out those that became nothing"""
+        body = []
+        for statement in statements:
+            statement = self.visit(statement)
+            if statement is not None:
+                body.append(statement)
+        return body
+
+    def generic_visit(self, node):
+        raise Exception(f"No visit method defined for {type(node).__name__}")
+
+    def visit_Module(self, module):
+        module.body = self.body(module.body)
+        return module
+
+    def visit_Function(self, func):
+        func.body = self.body(func.body)
+        return func
+
+    def visit_Declare(self, declare):
+        """Fold the initial value; a declaration of a constant goes away"""
+        if self.declare(declare):
+            self.stats["declarations removed"] += 1
+            return None
+        return declare
+
+    def declare(self, declare):
+        """Fold a declaration's initial value, and record the variable as a
+        constant if it always holds it. Returns whether it was recorded."""
+        declare.value = self.visit(declare.value)
+        symbol = declare.symbol
+        if symbol.type == "ank" and symbol not in self.assigned and int_value(declare.value) is not None:
+            self.constants[symbol] = declare.value
+            return True
+        return False
+
+    def visit_ExprStmt(self, expr_stmt):
+        expr_stmt.expr = self.visit(expr_stmt.expr)
+        return expr_stmt
+
+    def visit_Print(self, print_stmt):
+        print_stmt.expr = self.visit(print_stmt.expr)
+        return print_stmt
+
+    def visit_If(self, if_stmt):
+        """Fold the condition; a constant one keeps only the branch that runs"""
+        if_stmt.condition = self.visit(if_stmt.condition)
+        value = int_value(if_stmt.condition)
+        if value is None:
+            if_stmt.then_body = self.body(if_stmt.then_body)
+            if if_stmt.else_body is not None:
+                if_stmt.else_body = self.body(if_stmt.else_body)
+            return if_stmt
+
+        self.stats["branches pruned"] += 1
+        taken = if_stmt.then_body if value else if_stmt.else_body
+        body = self.body(taken) if taken is not None else []
+        # The branch keeps its braces, and so its own scope
+        return Block(body) if body else None
+
+    def visit_While(self, while_stmt):
+        """Fold the condition; a loop that never runs goes away"""
+        while_stmt.condition = self.visit(while_stmt.condition)
+        if int_value(while_stmt.condition) == 0:
+            self.stats["loops removed"] += 1
+            return None
+        while_stmt.body = self.body(while_stmt.body)
+        return while_stmt
+
+    def visit_For(self, for_stmt):
+        """Fold the parts of a for loop; its initializer stays in place"""
+        init = for_stmt.init
+        if isinstance(init, Declare):
+            self.declare(init)
+        elif init is not None:
+            self.visit(init)
+        if for_stmt.condition is not None:
+            for_stmt.condition = self.visit(for_stmt.condition)
+        if for_stmt.step is not None:
+            for_stmt.step = self.visit(for_stmt.step)
+        for_stmt.body = self.body(for_stmt.body)
+        return for_stmt
+
+    def visit_Return(self, return_stmt):
+        if return_stmt.value is not None:
+            return_stmt.value = self.visit(return_stmt.value)
+        return return_stmt
+
+    def visit_Block(self, block):
+        block.body = self.body(block.body)
+        return block if block.body else None
+
+    def visit_Const(self, const):
+        return const
+
+    def visit_Ref(self, ref):
+        """A reference to a constant becomes the constant"""
+        value = self.constants.get(ref.symbol)
+        if value is None:
+            return ref
+        self.stats["constants propagated"] += 1
+        return Const(value.text, ref.type)
+
+    def visit_Assign(self, assign):
+        assign.value = self.visit(assign.value)
+        return assign
+
+    def visit_FuncCall(self, call):
+        call.args = [self.visit(arg) for arg in call.args]
+        return call
+
+    def folded(self, value, type):
+        self.stats["expressions folded"] += 1
+        return int_constant(value, type)
+
+    # BinOp, UnOp and Convert nodes are walked by Visitor.fold without
+    # recursion; each combine_ method folds one node given its folded operands
+    def combine_BinOp(self, binop, left, right):
+        binop.left, binop.right = left, right
+        a = int_value(left)
+        if a is None:
+            return binop
+        # C never evaluates the right operand here, whatever it is
+        if (binop.op == "&&" and a == 0) or (binop.op == "||" and a != 0):
+            return self.folded(int(a != 0), binop.type)
+        b = int_value(right)
+        if b is None:
+            return binop
+        value = evaluate(binop.op, a, b)
+        return binop if value is None else self.folded(value, binop.type)
+
+    def combine_UnOp(self, unop, operand):
+        unop.operand = operand
+        value = int_value(operand)
+        if value is None:
+            return unop
+        if unop.op == "!":
+            return self.folded(int(not value), unop.type)
+        if unop.op == "-":
+            return self.folded(-value, unop.type)
+        return unop
+
+    def combine_Convert(self, convert, value):
+        convert.value = value
+        number = int_value(value)
+        if number is None or convert.type != "sankhya" or abs(number) > FLOAT_EXACT:
+            return convert
+        self.stats["expressions folded"] += 1
+        return Const(f"{number}.0" if number >= 0 else f"({number}.0)", "sankhya")
+
+
+class LoopInvariantHoister(Visitor):
+    """Loop-invariant code motion for karo and jabtak loops, in place.
+
+    An int or float expression in a loop's condition, step or body whose
+    operands no statement in the loop assigns is computed once into a
+    temporary declared before the loop; the temporaries and the loop are
+    wrapped in a block of their own. Division and remainder are never
+    moved, since they can trap, and calls only to functions pure_functions
+    proves pure. Int arithmetic that can overflow moves only from code that
+    always runs once the loop is reached: its condition, and the body of a
+    loop certain to run at least once, outside agar branches and nested
+    loops and before anything that may not finish. A global is invariant
+    only in loops that call nothing impure. Inner loops are handled first,
+    so an expression invariant in several nested loops moves out of all of
+    them.
+    """
+
+    name = "loop-invariant code motion"
+
+    def __init__(self):
+        super().__init__()
+        self.stats = {"loops optimized": 0, "expressions hoisted": 0, "calls hoisted": 0}
+        self.globals = set()
+        self.pure = set()
+        self.returning = set()
+        self.overflow_free = set()
+        self.names = set()
+        self.temporaries = 0
+        self.temporary_symbols = set()
+        # The loop being optimized
+        self.variant = set()  # Symbols assigned or declared inside it
+        self.calls_impure = False
+        self.hoisted = []  # Declarations of its temporaries
+        self.moved = set()  # Inner loops' temporaries it moves out too
+        self.always = False  # Whether the statement being visited always runs
+        self.facts = {}  # id(node) -> (invariant, may overflow), per expression
+
+    def run(self, module):
+        self.globals = declared_symbols([stmt for stmt in module.body if type(stmt) is Declare])
+        self.pure = pure_functions(module, self.globals & assigned_symbols(module))
+        self.returning = returning_functions(module)
+        self.overflow_free = closed_under_calls(module, lambda node: not may_overflow(node))
+        self.names = {node.symbol.name for node in walk(module) if hasattr(node, "symbol")}
+        self.names.update(param.name for func in module.body if type(func) is Function for param in func.params)
+        for func in module.body:
+            if type(func) is Function:
+                func.body = self.hoist_loops(func.body)
+        return module
+
+    def hoist_loops(self, statements):
+        """statements with every loop in them, innermost first, optimized"""
+        return [self.hoist_loops_in(statement) for statement in statements]
+
+    def hoist_loops_in(self, statement):
+        kind = type(statement)
+        if kind is Block:
+            statement.body = self.hoist_loops(statement.body)
+        elif kind is If:
+            statement.then_body = self.hoist_loops(statement.then_body)
+            if statement.else_body is not None:
+                statement.else_body = self.hoist_loops(statement.else_body)
+        elif kind is While or kind is For:
+            statement.body = self.hoist_loops(statement.body)
+            return self.hoist(statement)
+        return statement
+
+    def hoist(self, loop):
+        """loop, or a block of the temporaries it no longer computes and loop"""
+        self.variant = assigned_symbols(loop) | declared_symbols(loop)
+        self.calls_impure = any(type(node) is FuncCall and node.symbol not in self.pure for node in walk(loop))
+        self.hoisted = []
+        self.moved = set()
+        runs = self.runs_once(loop)
+
+        # A for loop's initializer runs once anyway
+        self.always = True
+        loop.condition = self.expression(loop.condition) if loop.condition is not None else None
+        if type(loop) is For and loop.step is not None:
+            self.always = runs and self.finishes(loop.body)
+            loop.step = self.expression(loop.step)
+        self.statements(loop.body, runs)
+        if self.moved:
+            loop.body = self.without_moved(loop.body)
+
+        if not self.hoisted:
+            return loop
+        self.stats["loops optimized"] += 1
+        return Block(self.hoisted + [loop])
+
+    def runs_once(self, loop):
+        """Whether loop's body certainly runs at least once: its condition is
+        absent or constant, or a for loop compares the constant its
+        initializer declares with a constant"""
+        condition = loop.condition
+        if condition is None:
+            return True
+        value = int_value(condition)
+        init = getattr(loop, "init", None)
+        if value is None and type(init) is Declare and type(condition) is BinOp:
+            start = int_value(init.value)
+            operands = [start if type(operand) is Ref and operand.symbol is init.symbol else int_value(operand)
+                        for operand in (condition.left, condition.right)]
+            if start is not None and None not in operands:
+                value = evaluate(condition.op, *operands)
+        return bool(value)
+
+    def finishes(self, node):
+        """Whether node (a node or a list of statements) certainly runs to its
+        end: no return, no loop and no call that may not return"""
+        for inner in walk(node):
+            kind = type(inner)
+            if kind is Return or kind is While or kind is For or (kind is FuncCall and inner.symbol not in self.returning):
+                return False
+        return True
+
+    def statements(self, statements, always):
+        """Visit statements, which all run if always is true and the ones
+        before each finish"""
+        for statement in statements:
+            self.always = always
+            self.visit(statement)
+            always = always and self.finishes(statement)
+
+    def temporary(self, expr):
+        """A Ref to a new temporary holding expr, declared before the loop"""
+        name = f"_inv{self.temporaries}"
+        while name in self.names:
+            self.temporaries += 1
+            name = f"_inv{self.temporaries}"
+        self.temporaries += 1
+        symbol = Symbol(name, expr.type, "variable")
+        self.temporary_symbols.add(symbol)
+        self.hoisted.append(Declare(symbol, expr.ctype, expr))
+        self.stats["expressions hoisted"] += 1
+        self.stats["calls hoisted"] += sum(1 for node in walk(expr) if type(node) is FuncCall)
+        return Ref(symbol, expr.type)
+
+    def expression(self, expr):
+        """expr with its largest invariant parts moved out of the loop"""
+        self.visit(expr)
+        expr = self.rewrite(expr, self.always and self.finishes(expr))
+        self.facts.clear()
+        return expr
+
+    def rewrite(self, expr, always):
+        """expr, top-down and without recursion, with each largest invariant
+        part replaced by a temporary. Parts that may overflow move only where
+        always says they always run; the right operand of && and || never
+        does."""
+        root = [expr]
+        stack = [(root, 0, always)]
+        while stack:
+            owner, key, always = stack.pop()
+            node = owner[key] if type(owner) is list else getattr(owner, key)
+            invariant, overflows = self.facts.get(id(node), (False, False))
+            if invariant and (always or not overflows):
+                if type(node) is not Const and type(node) is not Ref:
+                    if type(owner) is list:
+                        owner[key] = self.temporary(node)
+                    else:
+                        setattr(owner, key, self.temporary(node))
+                continue
+            kind = type(node)
+            if kind is BinOp:
+                stack.append((node, "right", always and node.op not in ("&&", "||")))
+                stack.append((node, "left", always))
+            elif kind is UnOp:
+                stack.append((node, "operand", always))
+            elif kind is Convert or kind is Assign:
+                stack.append((node, "value", always))
+            elif kind is FuncCall:
+                stack.extend((node.args, index, always) for index in reversed(range(len(node.args))))
+        return root[0]
+
+    def generic_visit(self, node):
+        raise Exception(f"No visit method defined for {type(node).__name__}")
+
+    def without_moved(self, statements):
+        return [stmt for stmt in statements if type(stmt) is not Declare or stmt.symbol not in self.moved]
+
+    # Statements inside the loop: their expressions are rewritten in place
+    def visit_Declare(self, declare):
+        if declare.symbol not in self.temporary_symbols:
+            declare.value = self.expression(declare.value)
+            return
+        # An inner loop's temporary that is invariant here too moves out
+        # whole, rather than being copied into another temporary
+        invariant, overflows = self.visit(declare.value)
+        always = self.always and self.finishes(declare.value)
+        if invariant and (always or not overflows):
+            self.hoisted.append(declare)
+            self.moved.add(declare.symbol)
+            self.variant.discard(declare.symbol)
+        else:
+            declare.value = self.rewrite(declare.value, always)
+        self.facts.clear()
+
+    def visit_ExprStmt(self, expr_stmt):
+        expr_stmt.expr = self.expression(expr_stmt.expr)
+
+    def visit_Print(self, print_stmt):
+        print_stmt.expr = self.expression(print_stmt.expr)
+
+    def visit_If(self, if_stmt):
+        if_stmt.condition = self.expression(if_stmt.condition)
+        self.statements(if_stmt.then_body + (if_stmt.else_body or []), False)
+
+    def visit_While(self, while_stmt):
+        while_stmt.condition = self.expression(while_stmt.condition)
+        self.statements(while_stmt.body, False)
+
+    def visit_For(self, for_stmt):
+        if for_stmt.init is not None:
+            self.visit(for_stmt.init)
+        if for_stmt.condition is not None:
+            for_stmt.condition = self.expression(for_stmt.condition)
+        self.always = False
+        if for_stmt.step is not None:
+            for_stmt.step = self.expression(for_stmt.step)
+        self.statements(for_stmt.body, False)
+
+    def visit_Return(self, return_stmt):
+        if return_stmt.value is not None:
+            return_stmt.value = self.expression(return_stmt.value)
+
+    def visit_Block(self, block):
+        self.statements(block.body, self.always)
+        if self.moved:
+            block.body = self.without_moved(block.body)
+
+    # Expressions: each visit records and returns (invariant, may overflow)
+    def fact(self, node, invariant, overflows):
+        self.facts[id(node)] = (invariant, overflows)
+        return invariant, overflows
+
+    def visit_Const(self, const):
+        return self.fact(const, True, False)
+
+    def visit_Ref(self, ref):
+        symbol = ref.symbol
+        variant = symbol in self.variant or (symbol in self.globals and self.calls_impure)
+        return self.fact(ref, not variant, False)
+
+    def visit_Assign(self, assign):
+        self.visit(assign.value)
+        return False, False
+
+    def visit_FuncCall(self, call):
+        results = [self.visit(arg) for arg in call.args]
+        invariant = (call.symbol in self.pure and call.ctype in HOISTABLE_TYPES
+                     and all(invariant for invariant, _ in results))
+        overflows = call.symbol not in self.overflow_free or any(overflows for _, overflows in results)
+        return self.fact(call, invariant, overflows)
+
+    def operation(self, node, results):
+        """(invariant, may overflow) for an operator node given its operands'"""
+        invariant = (node.ctype in HOISTABLE_TYPES and getattr(node, "op", None) not in TRAPPING_OPERATORS
+                     and all(invariant for invariant, _ in results))
+        overflows = may_overflow(node) or any(overflows for _, overflows in results)
+        return self.fact(node, invariant, overflows)
+
+    # BinOp, UnOp and Convert nodes are walked by Visitor.fold without recursion
+    def combine_BinOp(self, binop, left, right):
+        return self.operation(binop, (left, right))
+
+    def combine_UnOp(self, unop, operand):
+        return self.operation(unop, (operand,))
+
+    def combine_Convert(self, convert, value):
+        return self.operation(convert, (value,))
+
+
+# Passes in the order they run, each with the lowest -O level that enables it
+PASSES = [
+    (1, ConstantFolder),
+    (2, LoopInvariantHoister),
+]
+
+
+def optimize(module, level=1):
+    """Run the passes enabled at an optimisation level over an IR Module, in
+    place. Returns [(pass name, {statistic: count})] in the order they ran."""
+    report = []
+    for min_level, pass_class in PASSES:
+        if level >= min_level:
+            optimizer = pass_class()
+            optimizer.run(module)
+            report.append((optimizer.name, optimizer.stats))
+    return report
+
+
+def format_report(report):
+    """Lines describing what each optimisation pass did"""
+    return [f"{name}: " + ", ".join(f"{count} {statistic}" for statistic, count in stats.items())
+            for name, stats in report]
@@ -1,36 +1,67 @@
 # parser.py
 
+import os
+import re
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+
 from lexer import *
+from util import gc_paused
 
-# AST Node Definitions
+# AST Node Definitions. Every node declares __slots__, so nodes carry no
+# per-instance __dict__; fields() lists a node's attributes in slot order.
 class ASTNode:
-    pass
+    __slots__ = ()
+    FIELDS = None  # Attribute names when they differ from __slots__
+
+    def fields(self):
+        """(name, value) pairs for every attribute that has been set"""
+        names = self.FIELDS or self.__slots__
+        return [(name, getattr(self, name)) for name in names if hasattr(self, name)]
+
+class NamedNode(ASTNode):
+    """Node carrying an interned identifier: id is the name's id in the
+    NamePool of the tokens it was parsed from"""
+    __slots__ = ()
+
+    def __getstate__(self):
+        # Pickle fields() rather than the slots, so unparsed bodies parse first
+        return dict(self.fields())
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
 
 class Program(ASTNode):
+    __slots__ = ('statements',)
     def __init__(self, statements):
         self.statements = statements
     def __repr__(self):
         return f"Program({self.statements})"
 
 class ExpressionStatement(ASTNode):
+    __slots__ = ('expression',)
     def __init__(self, expression):
         self.expression = expression
     def __repr__(self):
         return f"ExprStmt({self.expression})"
 
 class PrintStatement(ASTNode):
+    __slots__ = ('expression',)
     def __init__(self, expression):
         self.expression = expression
     def __repr__(self):
         return f"Print({self.expression})"
 
 class BlockStatement(ASTNode):
+    __slots__ = ('statements',)
     def __init__(self, statements):
         self.statements = statements
     def __repr__(self):
         return f"Block({self.statements})"
 
 class IfStatement(ASTNode):
+    __slots__ = ('condition', 'then_branch', 'else_branch')
     def __init__(self, condition, then_branch, else_branch):
         self.condition = condition
         self.then_branch = then_branch
@@ -39,6 +70,7 @@ class IfStatement(ASTNode):
         return f"If({self.condition}, {self.then_branch}, {self.else_branch})"
 
 class WhileStatement(ASTNode):
+    __slots__ = ('condition', 'body')
     def __init__(self, condition, body):
         self.condition = condition
         self.body = body
@@ -46,6 +78,7 @@ class WhileStatement(ASTNode):
         return f"While({self.condition}, {self.body})"
 
 class ForStatement(ASTNode):
+    __slots__ = ('initializer', 'condition', 'increment', 'body')
     def __init__(self, initializer, condition, increment, body):
         self.initializer = initializer
         self.condition = condition
@@ -55,6 +88,7 @@ class ForStatement(ASTNode):
         return f"For({self.initializer}, {self.condition}, {self.increment}, {self.body})"
 
 class Binary(ASTNode):
+    __slots__ = ('left', 'operator', 'right')
     def __init__(self, left, operator, right):
         self.left = left
         self.operator = operator
@@ -63,6 +97,7 @@ class Binary(ASTNode):
         return f"Binary({self.left}, {self.operator.value}, {self.right})"
 
 class Unary(ASTNode):
+    __slots__ = ('operator', 'right')
     def __init__(self, operator, right):
         self.operator = operator
         self.right = right
@@ -70,61 +105,93 @@ class Unary(ASTNode):
         return f"Unary({self.operator.value}, {self.right})"
 
 class Grouping(ASTNode):
+    __slots__ = ('expression',)
     def __init__(self, expression):
         self.expression = expression
     def __repr__(self):
         return f"Grouping({self.expression})"
 
 class Literal(ASTNode):
+    __slots__ = ('value',)
     def __init__(self, value):
         self.value = value
     def __repr__(self):
         return f"Literal({self.value})"
 
-class Variable(ASTNode):
+class Variable(NamedNode):
+    # type is filled in by the semantic analyzer and stays unset until then
+    __slots__ = ('id', 'name', 'type')
     def __init__(self, token):
+        self.id = token.id
         self.name = token.value
     def __repr__(self):
         return f"Variable({self.name})"
 
-class Assignment(ASTNode):
-    def __init__(self, name, value):
-        self.name = name
+class Assignment(NamedNode):
+    __slots__ = ('id', 'name', 'value')
+    def __init__(self, target, value):
+        self.id = target.id
+        self.name = target.name
         self.value = value
     def __repr__(self):
         return f"Assign({self.name}, {self.value})"
 
-class VarDeclaration(ASTNode):
+class VarDeclaration(NamedNode):
+    __slots__ = ('var_type', 'id', 'name', 'initializer')
     def __init__(self, var_type, name, initializer):
         self.var_type = var_type
-        self.name = name
+        self.id = name.id
+        self.name = name.value
         self.initializer = initializer
     def __repr__(self):
         return f"VarDecl({self.var_type.value}, {self.name}, {self.initializer})"
 
-class FunctionDeclaration(ASTNode):
-    def __init__(self, name, params, return_type, body):
-        self.name = name
+class FunctionDeclaration(NamedNode):
+    __slots__ = ('id', 'name', 'params', 'return_type', '_body', 'body_source')
+    FIELDS = ('id', 'name', 'params', 'return_type', 'body')
+    def __init__(self, name, params, return_type, body, body_source=None):
+        self.id = name.id
+        self.name = name.value
         self.params = params
         self.return_type = return_type
-        self.body = body
+        self._body = body
+        # (tokens, start, end, legacy) while a lazily parsed body is still unparsed
+        self.body_source = body_source
+    @property
+    def body(self):
+        """The BlockStatement body, parsed from body_source on first access"""
+        if self._body is None and self.body_source is not None:
+            tokens, start, end, legacy = self.body_source
+            parser = Parser(tokens, legacy=legacy, lazy=True)
+            parser.current = start
+            self._body = BlockStatement(parser.block())
+            self.body_source = None
+        return self._body
+    @body.setter
+    def body(self, body):
+        self._body = body
+        self.body_source = None
     def __repr__(self):
         return f"FuncDecl({self.name}, {self.params}, {self.return_type}, {self.body})"
 
 class ReturnStatement(ASTNode):
+    __slots__ = ('value',)
     def __init__(self, value):
         self.value = value
     def __repr__(self):
         return f"Return({self.value})"
 
-class Parameter(ASTNode):
+class Parameter(NamedNode):
+    __slots__ = ('type', 'id', 'name')
     def __init__(self, type_token, name):
         self.type = type_token
-        self.name = name
+        self.id = name.id
+        self.name = name.value
     def __repr__(self):
         return f"Param({self.type.value}, {self.name})"
 
 class Logical(ASTNode):
+    __slots__ = ('left', 'operator', 'right')
     def __init__(self, left, operator, right):
         self.left = left
         self.operator = operator
@@ -133,6 +200,7 @@ class Logical(ASTNode):
         return f"Logical({self.left}, {self.operator.value}, {self.right})"
 
 class Call(ASTNode):
+    __slots__ = ('callee', 'arguments')
     def __init__(self, callee, arguments):
         self.callee = callee  # The function being called
         self.arguments = arguments  # List of argument expressions
@@ -140,11 +208,243 @@ class Call(ASTNode):
         return f"Call({self.callee}, {self.arguments})"
 
 
+def node_classes(base=ASTNode):
+    """Every concrete AST node class below base"""
+    classes = []
+    for cls in base.__subclasses__():
+        classes.append(cls)
+        classes.extend(node_classes(cls))
+    return classes
+
+def flatten_tree(root):
+    """The nodes under root as flat records, built without recursion so that
+    pickling them never recurses down a deep tree either.
+    
+    Each record is (class, fields that are not nodes, {field: position of
+    the node or [positions of the nodes] it holds}) and comes after the
+    records of every node it holds; build_tree() reverses this.
+    """
+    records = []
+    positions = {}  # id(node) -> its record's position
+    stack = [(root, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if id(node) in positions:
+            continue
+        if not expanded:
+            stack.append((node, True))
+            for name, value in node.fields():
+                if isinstance(value, ASTNode):
+                    stack.append((value, False))
+                elif isinstance(value, list):
+                    stack.extend((item, False) for item in value if isinstance(item, ASTNode))
+            continue
+        
+        state = dict(node.fields())
+        links = {}
+        for name, value in state.items():
+            if isinstance(value, ASTNode):
+                links[name] = positions[id(value)]
+            elif isinstance(value, list) and value and all(isinstance(item, ASTNode) for item in value):
+                links[name] = [positions[id(item)] for item in value]
+        for name in links:
+            del state[name]
+        positions[id(node)] = len(records)
+        records.append((type(node), state, links))
+    return records
+
+def renumber(node, names):
+    """Re-intern the names of every NamedNode under node (a node or a list
+    of them) into the NamePool names, for putting nodes parsed against
+    different pools into one tree"""
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, ASTNode):
+            if isinstance(node, NamedNode):
+                node.id = names.intern(node.name)
+                node.name = names.names[node.id]
+            stack.extend(value for _, value in node.fields())
+
+def build_tree(records):
+    """The root node of records made by flatten_tree()"""
+    nodes = []
+    for cls, state, links in records:
+        for name, link in links.items():
+            state[name] = nodes[link] if type(link) is int else [nodes[position] for position in link]
+        node = cls.__new__(cls)
+        for name, value in state.items():
+            setattr(node, name, value)
+        nodes.append(node)
+    return nodes[-1]
+
+# Operator nodes and their operand fields, in evaluation order
+OPERATOR_OPERANDS = {
+    Binary: ('left', 'right'),
+    Logical: ('left', 'right'),
+    Unary: ('right',),
+    Grouping: ('expression',),
+}
+
+class Visitor:
+    """Base class for AST walks.
+    
+    visit(node) calls visit_<ClassName>(node), or generic_visit(node) when
+    there is no such method. The class name -> method lookup happens once:
+    each visitor class keeps a node type -> function table, and each
+    instance binds it into a type -> bound method dict on creation.
+    
+    A visitor that defines combine_<ClassName>(node, *operand_results) for
+    an OPERATOR_OPERANDS node type has those nodes visited by fold() instead,
+    which keeps its own work stack, so a chain of thousands of terms needs
+    no extra Python stack.
+    """
+    _tables = {}  # Visitor class -> ({node type: function}, {node type: function})
+    
+    def __init__(self):
+        cls = type(self)
+        tables = Visitor._tables.get(cls)
+        if tables is None:
+            tables = Visitor._tables[cls] = (
+                {node_type: cls.method_for(node_type) for node_type in node_classes()},
+                {node_type: getattr(cls, f"combine_{node_type.__name__}")
+                 for node_type in OPERATOR_OPERANDS if hasattr(cls, f"combine_{node_type.__name__}")},
+            )
+        visits, combines = tables
+        self.dispatch = {node_type: function.__get__(self, cls) for node_type, function in visits.items()}
+        # node type -> (bound combine method, first operand field, second operand field or None)
+        self.combiners = {node_type: (function.__get__(self, cls),) + (OPERATOR_OPERANDS[node_type] + (None,))[:2]
+                          for node_type, function in combines.items()}
+        for node_type in self.combiners:
+            self.dispatch[node_type] = self.fold
+    
+    @classmethod
+    def method_for(cls, node_type):
+        return getattr(cls, f"visit_{node_type.__name__}", cls.generic_visit)
+    
+    def visit(self, node):
+        """Visit a node in the AST"""
+        method = self.dispatch.get(type(node))
+        if method is None:
+            # Lists and other non-node values are rare; resolve them by name
+            method = self.dispatch[type(node)] = self.method_for(type(node)).__get__(self, type(self))
+        return method(node)
+    
+    def fold(self, node):
+        """Evaluate an operator tree bottom-up without recursing down it.
+        
+        The chain of first operands (the left spine of a left-associative
+        chain, or nested unary and grouping nodes) is collected on a work
+        stack, the innermost operand is visited, and the results are combined
+        on the way back out, visiting each right operand in turn: the same
+        order nested visit() calls would use. Each operator node becomes
+        combine_<ClassName>(node, *operand results). Right operands nest only
+        as deep as the parser's own recursion through parentheses allows.
+        """
+        combiners, visit = self.combiners, self.visit
+        spine = []
+        entry = combiners.get(type(node))
+        while entry is not None:
+            combine, first, second = entry
+            spine.append((node, combine, second))
+            node = getattr(node, first)
+            entry = combiners.get(type(node))
+        
+        result = visit(node)
+        while spine:
+            node, combine, second = spine.pop()
+            if second is None:
+                result = combine(node, result)
+            else:
+                result = combine(node, result, visit(getattr(node, second)))
+        return result
+    
+    def generic_visit(self, node):
+        """Default handler for unhandled node types"""
+        pass
+
+
+class TokenWindow:
+    """List-like lookahead buffer over a token iterator.
+    
+    The parser only ever looks at the current and previous token, so older
+    tokens are dropped and memory stays constant in the length of the input.
+    """
+    TRIM_AFTER = 64  # Discard consumed tokens in batches of this size
+    
+    def __init__(self, tokens):
+        self.iterator = iter(tokens)
+        self.buffer = []
+        self.base = 0  # Stream index of buffer[0]
+    
+    def __getitem__(self, index):
+        offset = index - self.base
+        if offset < 0:
+            raise IndexError(f"Token {index} has already been discarded")
+        
+        buffer = self.buffer
+        while offset >= len(buffer):
+            buffer.append(next(self.iterator))
+        
+        if offset > self.TRIM_AFTER:
+            # Keep the token before index so previous() still works
+            del buffer[:offset - 1]
+            self.base += offset - 1
+            offset = 1
+        return buffer[offset]
+
+
 # Parser Implementation
+# Pratt parser tables: infix binding powers keyed on TokenType (higher binds
+# tighter). Assignment is right-associative; every other operator is left-
+# associative. A LEFT_PAREN after an operand is a call, the tightest of all.
+ASSIGNMENT_POWER = 1
+UNARY_POWER = 8
+CALL_POWER = 9
+BINDING_POWERS = {
+    TokenType.ASSIGN: ASSIGNMENT_POWER,
+    TokenType.OR: 2,
+    TokenType.AND: 3,
+    TokenType.EQUALS: 4,
+    TokenType.NOT_EQUALS: 4,
+    TokenType.LESS_THAN: 5,
+    TokenType.GREATER_THAN: 5,
+    TokenType.LESS_EQUAL: 5,
+    TokenType.GREATER_EQUAL: 5,
+    TokenType.PLUS: 6,
+    TokenType.MINUS: 6,
+    TokenType.MULTIPLY: 7,
+    TokenType.DIVIDE: 7,
+    TokenType.MODULO: 7,
+    TokenType.LEFT_PAREN: CALL_POWER,
+}
+LOGICAL_OPERATORS = {TokenType.OR, TokenType.AND}
+PREFIX_OPERATORS = {TokenType.MINUS, TokenType.NOT}
+LITERAL_TYPES = {TokenType.INTEGER_LITERAL, TokenType.FLOAT_LITERAL,
+                 TokenType.STRING_LITERAL, TokenType.CHAR_LITERAL}
+
 class Parser:
-    def __init__(self, tokens):
-        self.tokens = tokens
+    def __init__(self, tokens, legacy=False, lazy=False):
+        # Token lists are indexed directly; any other iterable is read lazily,
+        # unless lazy function bodies need to come back to it later
+        if isinstance(tokens, (list, TokenBuffer)):
+            self.tokens = tokens
+        elif lazy:
+            self.tokens = tokens = list(tokens)
+        else:
+            self.tokens = TokenWindow(tokens)
         self.current = 0
+        
+        # A TokenBuffer lets check() compare integer kinds without building tokens
+        self.kinds = tokens.kinds if isinstance(tokens, TokenBuffer) else None
+        
+        # legacy selects the original one-method-per-precedence-level expression chain
+        self.legacy = legacy
+        
+        # lazy skips function bodies by brace matching and parses them on first use
+        self.lazy = lazy
 
     def parse(self):
         statements = []
@@ -161,7 +461,7 @@ class Parser:
 
     def var_declaration(self):
         var_type = self.previous()
-        name = self.consume(TokenType.IDENTIFIER, "Expect variable name.").value
+        name = self.consume(TokenType.IDENTIFIER, "Expect variable name.")
         
         initializer = None
         if self.match(TokenType.ASSIGN):
@@ -171,7 +471,7 @@ class Parser:
         return VarDeclaration(var_type, name, initializer)
 
     def function_declaration(self):
-        name = self.consume(TokenType.IDENTIFIER, "Expect function name.").value
+        name = self.consume(TokenType.IDENTIFIER, "Expect function name.")
         self.consume(TokenType.LEFT_PAREN, "Expect '(' after function name.")
         
         parameters = []
@@ -184,7 +484,7 @@ class Parser:
                 # Use the new consume_any method
                 type_tokens = [TokenType.INT, TokenType.FLOAT, TokenType.STRING, TokenType.CHAR]
                 param_type = self.consume_any(type_tokens, "Expect parameter type.")
-                param_name = self.consume(TokenType.IDENTIFIER, "Expect parameter name.").value
+                param_name = self.consume(TokenType.IDENTIFIER, "Expect parameter name.")
                 parameters.append(Parameter(param_type, param_name))
                 
                 if not self.match(TokenType.COMMA):
@@ -201,6 +501,12 @@ class Parser:
                                          "Expect return type.")
         
         self.consume(TokenType.LEFT_BRACE, "Expect '{' before function body.")
+        if self.lazy:
+            end = self.find_closing_brace()
+            if end is not None:
+                start, self.current = self.current, end + 1
+                return FunctionDeclaration(name, parameters, return_type, None,
+                                           (self.tokens, start, end, self.legacy))
         body = BlockStatement(self.block())
         
         return FunctionDeclaration(name, parameters, return_type, body)
@@ -291,7 +597,42 @@ class Parser:
         return statements
 
     def expression(self):
-        return self.assignment()
+        if self.legacy:
+            return self.assignment()
+        return self.parse_precedence(0)
+
+    def parse_precedence(self, min_power):
+        """Pratt loop: parse an expression whose operators bind tighter than min_power"""
+        token_type = self.peek_type()
+        if token_type in LITERAL_TYPES:
+            self.current += 1
+            expr = Literal(self.previous().value)
+        elif token_type is TokenType.IDENTIFIER:
+            self.current += 1
+            expr = Variable(self.previous())
+        elif token_type in PREFIX_OPERATORS:
+            operator = self.advance()
+            expr = Unary(operator, self.parse_precedence(UNARY_POWER))
+        else:
+            expr = self.primary()
+        
+        while True:
+            token_type = self.peek_type()
+            power = BINDING_POWERS.get(token_type)
+            if power is None or power <= min_power:
+                return expr
+            operator = self.advance()
+            if token_type is TokenType.LEFT_PAREN:
+                expr = self.finish_call(expr)
+            elif token_type is TokenType.ASSIGN:
+                value = self.parse_precedence(power - 1)
+                if not isinstance(expr, Variable):
+                    self.error(operator, "Invalid assignment target.")
+                expr = Assignment(expr, value)
+            elif token_type in LOGICAL_OPERATORS:
+                expr = Logical(expr, operator, self.parse_precedence(power))
+            else:
+                expr = Binary(expr, operator, self.parse_precedence(power))
 
     def assignment(self):
         expr = self.logical_or()
@@ -299,7 +640,7 @@ class Parser:
             equals = self.previous()
             value = self.assignment()
             if isinstance(expr, Variable):
-                return Assignment(expr.name, value)
+                return Assignment(expr, value)
             self.error(equals, "Invalid assignment target.")
         return expr
 
@@ -406,6 +747,25 @@ class Parser:
             self.error(token, "Expect expression.")
 
     # Utility methods
+    def find_closing_brace(self):
+        """Index of the '}' closing the block whose '{' was just consumed, or
+        None if the tokens run out first"""
+        left, right, eof = TokenType.LEFT_BRACE.value, TokenType.RIGHT_BRACE.value, EOF_KIND
+        kinds, tokens = self.kinds, self.tokens
+        depth = 1
+        index = self.current
+        while True:
+            kind = kinds[index] if kinds is not None else tokens[index].type._value_
+            if kind == left:
+                depth += 1
+            elif kind == right:
+                depth -= 1
+                if depth == 0:
+                    return index
+            elif kind == eof:
+                return None
+            index += 1
+
     def match(self, *token_types):
         for t in token_types:
             if self.check(t):
@@ -426,6 +786,9 @@ class Parser:
         self.error(self.peek(), message)
 
     def check(self, token_type):
+        if self.kinds is not None:
+            kind = self.kinds[self.current]
+            return kind == token_type._value_ and kind != EOF_KIND
         if self.is_at_end():
             return False
         return self.peek().type == token_type
@@ -436,33 +799,298 @@ class Parser:
         return self.previous()
 
     def is_at_end(self):
+        if self.kinds is not None:
+            return self.kinds[self.current] == EOF_KIND
         return self.peek().type == TokenType.EOF
 
     def peek(self):
         return self.tokens[self.current]
 
+    def peek_type(self):
+        if self.kinds is not None:
+            return TOKEN_TYPES[self.kinds[self.current]]
+        return self.tokens[self.current].type
+
     def previous(self):
         return self.tokens[self.current - 1]
 
     def error(self, token, message):
         raise Exception(f"[line {token.line}] Error at '{token.value}': {message}")
-def print_ast(node, indent=0):
-    prefix = '  ' * indent
-    if isinstance(node, list):
-        for item in node:
-            print_ast(item, indent)
-        return
-
-    print(f"{prefix}{node.__class__.__name__}")
-
-    # Go deeper for composite nodes
-    for attr in vars(node):
-        value = getattr(node, attr)
-        if isinstance(value, ASTNode) or isinstance(value, list):
-            print(f"{prefix}  {attr}:")
-            print_ast(value, indent + 2)
+
+
+class IncrementalParser:
+    """Keeps a Program AST up to date as the source is edited.
+    
+    Tokens come from an IncrementalLexer. An edit re-parses the top-level
+    declarations whose tokens it touched, starting with the one holding the
+    token before the edit, and stops as soon as a declaration would start
+    where an old one did after the edit. All other declarations are reused
+    as they are.
+    """
+    
+    def __init__(self, source, compact_after=1 << 12):
+        self.lexer = IncrementalLexer(source, compact_after=compact_after)
+        self._program = Program([])
+        self.starts = []  # Token index where each top-level declaration starts
+        self.stale = True  # The AST does not match the tokens (after a parse error)
+        self.parse_all()
+    
+    @property
+    def source(self):
+        return self.lexer.source
+    
+    @property
+    def names(self):
+        """The NamePool the AST's ids come from; a new one after the lexer compacts"""
+        return self.lexer.names
+    
+    @property
+    def program(self):
+        """The up to date AST; reused nodes hold lexer tokens, so they are settled first"""
+        self.lexer.tokens
+        return self._program
+    
+    def edit(self, offset, deleted, inserted):
+        """Replace deleted characters at offset with inserted text.
+        
+        Returns (first, removed, added): the index of the first replaced
+        top-level declaration, how many were replaced, and the new ones.
+        A parse error propagates and leaves the AST stale until an edit
+        that parses again.
+        """
+        names = self.lexer.names
+        first, removed, added = self.lexer.edit(offset, deleted, inserted)
+        if self.stale or not self.starts:
+            return self.parse_all()
+        
+        # Declarations holding the token before the edit through the first
+        # token after it; their token ranges may have changed shape
+        starts = self.starts
+        decl = max(bisect_right(starts, max(first - 1, 0)) - 1, 0)
+        result = self.reparse(decl, first + len(added), len(added) - removed)
+        if self.lexer.names is not names:
+            # The lexer compacted its name pool; move the reused declarations onto it
+            renumber(self._program, self.lexer.names)
+        return result
+    
+    def update(self, source):
+        """Replace the whole source, re-parsing only around the changed span"""
+        old = self.lexer.source
+        prefix = 0
+        limit = min(len(old), len(source))
+        while prefix < limit and old[prefix] == source[prefix]:
+            prefix += 1
+        suffix = 0
+        limit -= prefix
+        while suffix < limit and old[-1 - suffix] == source[-1 - suffix]:
+            suffix += 1
+        return self.edit(prefix, len(old) - prefix - suffix, source[prefix:len(source) - suffix])
+    
+    def parse_all(self):
+        """Parse every declaration from scratch"""
+        removed = len(self.starts)
+        del self.starts[:]
+        del self._program.statements[:]
+        decl, _, added = self.reparse(0, 0, 0)
+        return decl, removed, added
+    
+    def reparse(self, decl, edit_end, delta):
+        """Parse from declaration decl until the parse lines up with the old
+        declarations again at or after token edit_end (new indices); delta is
+        the change in token count."""
+        starts, statements = self.starts, self._program.statements
+        start = starts[decl] if decl < len(starts) else 0
+        parser = Parser(self.lexer.iter_tokens(start))
+        
+        new_starts, new_statements = [], []
+        stop = len(starts)
+        self.stale = True
+        while not parser.is_at_end():
+            position = start + parser.current
+            if position >= edit_end:
+                old = bisect_left(starts, position - delta, decl)
+                if old < stop and starts[old] == position - delta:
+                    stop = old
+                    break
+            new_starts.append(position)
+            new_statements.append(parser.declaration())
+        self.stale = False
+        
+        # Declarations from stop on are reused; their tokens moved by delta
+        if delta:
+            for index in range(stop, len(starts)):
+                starts[index] += delta
+        starts[decl:stop] = new_starts
+        statements[decl:stop] = new_statements
+        return decl, stop - decl, new_statements
+
+LEFT_PAREN_KIND = TokenType.LEFT_PAREN.value
+
+def called_names(node):
+    """Names called as NAME(...) anywhere inside node.
+    
+    A lazily parsed function body that is still unparsed is scanned token
+    by token for IDENTIFIER '(' pairs rather than parsed.
+    """
+    names = set()
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, FunctionDeclaration) and node.body_source is not None:
+            tokens, start, end, _ = node.body_source
+            if isinstance(tokens, TokenBuffer):
+                kinds = tokens.kinds
+            else:
+                kinds = [token.type._value_ for token in tokens[start:end + 1]]
+                tokens, start, end = tokens[start:end + 1], 0, end - start
+            for index in range(start, end):
+                if kinds[index] == IDENTIFIER_KIND and kinds[index + 1] == LEFT_PAREN_KIND:
+                    names.add(tokens[index].value)
+        elif isinstance(node, ASTNode):
+            if isinstance(node, Call) and isinstance(node.callee, Variable):
+                names.add(node.callee.name)
+            stack.extend(value for _, value in node.fields())
+    return names
+
+def prune_unreachable(program):
+    """Program without the top-level functions that main can never call.
+    
+    Other top-level statements are kept, and count as roots along with main.
+    Without a main function nothing is removed. Pair with Parser(lazy=True)
+    so the bodies of pruned functions are never parsed at all.
+    """
+    functions = {}
+    roots = {"main"}
+    for statement in program.statements:
+        if isinstance(statement, FunctionDeclaration):
+            functions.setdefault(statement.name, []).append(statement)
         else:
-            print(f"{prefix}  {attr}: {value}")
+            roots |= called_names(statement)
+    if "main" not in functions:
+        return program
+    
+    reachable = set()
+    pending = [name for name in roots if name in functions]
+    while pending:
+        name = pending.pop()
+        if name in reachable:
+            continue
+        reachable.add(name)
+        for func in functions[name]:
+            pending.extend(callee for callee in called_names(func) if callee in functions)
+    
+    return Program([statement for statement in program.statements
+                    if not isinstance(statement, FunctionDeclaration) or statement.name in reachable])
+
+# Braces and the vidhi keyword, within the stretches SPLIT_PATTERN finds
+# between literals and comments
+DECLARATION_PATTERN = re.compile(r"[{}]|(?<![A-Za-z0-9_])(?:%s)(?![A-Za-z0-9_])" % "|".join(
+    re.escape(word) for word, token_type in KEYWORDS.items() if token_type is TokenType.FUNCTION))
+
+def find_declaration_offsets(source):
+    """Offsets of the vidhi keywords that start top-level declarations.
+    
+    A regex pre-pass over the source text that only skips literals and
+    comments and tracks brace depth, so finding split points costs far less
+    than lexing; the parser proper decides whether the spans between them
+    really are whole declarations.
+    """
+    offsets = []
+    depth = 0
+    for segment in SPLIT_PATTERN.finditer(source):
+        if segment.lastgroup != 'PLAIN':
+            continue
+        for m in DECLARATION_PATTERN.finditer(source, segment.start(), segment.end()):
+            text = m.group()
+            if text == "{":
+                depth += 1
+            elif text == "}":
+                depth -= 1
+            elif depth == 0:
+                offsets.append(m.start())
+    return offsets
+
+def _parse_chunk(chunk):
+    """Worker: lex and parse one run of whole declarations, or return None on error"""
+    text, line, column = chunk
+    # A line_start before the text makes the first token report its real column
+    tokens = [Token(token_type, value, token_line, token_column, ident)
+              for token_type, value, _, _, token_line, token_column, ident
+              in scan(text, 0, line, 1 - column, names=NamePool())]
+    try:
+        return Parser(tokens).parse().statements
+    except Exception:
+        return None
+
+def parse_parallel(source, workers=None, min_declarations=64):
+    """Parse source with its top-level declarations split across worker processes.
+    
+    Builds the same Program as Parser(...).parse(). Split points come from
+    find_declaration_offsets(), so each token is lexed once, by the worker
+    whose chunk holds it; each worker interns names in a pool of its own, so
+    they are interned again here into one pool for the whole program. When
+    any chunk fails to parse, the whole source is parsed again in this
+    process so the error is exactly the one the serial parser reports.
+    """
+    offsets = find_declaration_offsets(source)
+    workers = workers or os.cpu_count() or 1
+    parts = min(workers, len(offsets) // min_declarations)
+    if parts < 2:
+        return Parser(Lexer(source).tokenize_buffer()).parse()
+    
+    # Chunk boundaries at declaration starts, roughly equal in size
+    bounds = [0]
+    for part in range(1, parts):
+        offset = offsets[min(bisect_left(offsets, part * len(source) // parts), len(offsets) - 1)]
+        if offset > bounds[-1]:
+            bounds.append(offset)
+    bounds.append(len(source))
+    
+    chunks = []
+    for begin, end in zip(bounds, bounds[1:]):
+        line = source.count('\n', 0, begin) + 1
+        column = begin - source.rfind('\n', 0, begin)
+        chunks.append((source[begin:end], line, column))
+    
+    statements = []
+    names = NamePool()
+    with ProcessPoolExecutor(max_workers=workers) as executor, gc_paused():
+        for chunk_statements in executor.map(_parse_chunk, chunks):
+            if chunk_statements is None:
+                return Parser(Lexer(source).tokenize_buffer()).parse()
+            renumber(chunk_statements, names)
+            statements.extend(chunk_statements)
+    return Program(statements)
+
+class ASTPrinter(Visitor):
+    """Prints a tree outline of a node, one attribute per line"""
+    
+    def __init__(self, indent=0):
+        super().__init__()
+        self.indent = indent
+    
+    def visit_list(self, items):
+        for item in items:
+            self.visit(item)
+    
+    def generic_visit(self, node):
+        prefix = '  ' * self.indent
+        print(f"{prefix}{node.__class__.__name__}")
+        
+        # Go deeper for composite nodes
+        for attr, value in node.fields():
+            if isinstance(value, ASTNode) or isinstance(value, list):
+                print(f"{prefix}  {attr}:")
+                self.indent += 2
+                self.visit(value)
+                self.indent -= 2
+            else:
+                print(f"{prefix}  {attr}: {value}")
+
+def print_ast(node, indent=0):
+    ASTPrinter(indent).visit(node)
 
 
 # Example of usage with your lexer
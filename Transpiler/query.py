@@ -0,0 +1,90 @@
+# query.py
+
+from lexer import Token, TokenView
+from parser import ASTNode
+
+class AnyValue:
+    """Wildcard that matches any field value"""
+    def __repr__(self):
+        return "ANY"
+
+ANY = AnyValue()
+
+class Pattern:
+    """Structural pattern for an AST node.
+    
+    Pattern(Binary, Pattern(Variable, "x"), "<", Pattern(Literal, "10"))
+    matches a Binary node field by field. Positional arguments follow the
+    node's fields in constructor order (the interned id is skipped), keyword
+    arguments name fields directly, and fields left out match anything.
+    Field patterns can be nested Patterns, lists (matched element by element,
+    same length), ANY, or plain values; a token field matches its text.
+    """
+    
+    def __init__(self, node_type, *args, **fields):
+        self.node_type = node_type
+        names = [name for name in (node_type.FIELDS or node_type.__slots__) if name != 'id']
+        if len(args) > len(names):
+            raise TypeError(f"{node_type.__name__} has only {len(names)} fields")
+        self.fields = dict(zip(names, args))
+        self.fields.update(fields)
+    
+    def matches(self, node):
+        """Whether node itself matches this pattern"""
+        if not isinstance(node, self.node_type):
+            return False
+        for name, expected in self.fields.items():
+            if not match_value(getattr(node, name, None), expected):
+                return False
+        return True
+    
+    def __repr__(self):
+        parts = [repr(value) for value in self.fields.values()]
+        return f"{self.node_type.__name__}({', '.join(parts)})"
+
+def match_value(value, expected):
+    """Match one field value against a field pattern"""
+    if expected is ANY:
+        return True
+    if isinstance(expected, Pattern):
+        return expected.matches(value)
+    if isinstance(expected, list):
+        return (isinstance(value, list) and len(value) == len(expected)
+                and all(match_value(item, pattern) for item, pattern in zip(value, expected)))
+    if isinstance(value, (Token, TokenView)):
+        return value.value == expected
+    return value == expected
+
+# Per node class: the fields that can hold child nodes or lists of them,
+# last first so pushing them onto a stack visits them in source order
+CHILD_FIELDS = {}
+
+def child_fields(node_type):
+    names = CHILD_FIELDS.get(node_type)
+    if names is None:
+        names = tuple(name for name in reversed(node_type.FIELDS or node_type.__slots__)
+                      if name not in ('id', 'name'))
+        CHILD_FIELDS[node_type] = names
+    return names
+
+def find(node, pattern):
+    """First node at or below node (depth first, source order) that matches pattern, or None"""
+    node_type = pattern.node_type
+    stack = [node]
+    pop, push = stack.pop, stack.append
+    while stack:
+        node = pop()
+        if type(node) is list:
+            stack.extend(reversed(node))
+            continue
+        if isinstance(node, node_type) and pattern.matches(node):
+            return node
+        for name in CHILD_FIELDS.get(type(node)) or child_fields(type(node)):
+            value = getattr(node, name, None)
+            if type(value) is list or isinstance(value, ASTNode):
+                push(value)
+    return None
+
+def contains(node, pattern):
+    """Whether any node in the tree matches pattern; stops at the first match"""
+    return find(node, pattern) is not None
@@ -1,37 +1,172 @@
+import gc
+import io
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
 from parser import *
 
+class ScopeView:
+    """Read-only dict-like view of the bindings made in one scope"""
+    __slots__ = ('table', 'depth')
+    
+    def __init__(self, table, depth):
+        self.table = table
+        self.depth = depth
+    
+    def binding(self, ident):
+        """The (depth, type) binding ident has in this scope, or None"""
+        for binding in reversed(self.table.bindings.get(ident, ())):
+            if binding[0] <= self.depth:
+                return binding if binding[0] == self.depth else None
+        return None
+    
+    def __contains__(self, ident):
+        return self.binding(ident) is not None
+    
+    def __getitem__(self, ident):
+        binding = self.binding(ident)
+        if binding is None:
+            raise KeyError(ident)
+        return binding[1]
+    
+    def get(self, ident, default=None):
+        binding = self.binding(ident)
+        return default if binding is None else binding[1]
+    
+    def keys(self):
+        table = self.table
+        marks = table.marks
+        start = marks[self.depth - 1] if self.depth > 0 else 0
+        stop = marks[self.depth] if self.depth < len(marks) else len(table.undo)
+        return table.undo[start:stop]
+    
+    def items(self):
+        return [(ident, self[ident]) for ident in self.keys()]
+    
+    def __iter__(self):
+        return iter(self.keys())
+    
+    def __len__(self):
+        return len(self.keys())
+
+class ScopeList:
+    """Sequence of ScopeViews, global scope first, built on demand"""
+    __slots__ = ('table',)
+    
+    def __init__(self, table):
+        self.table = table
+    
+    def __len__(self):
+        return len(self.table.marks) + 1
+    
+    def __getitem__(self, index):
+        count = len(self)
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError("scope index out of range")
+        return ScopeView(self.table, index)
+
+class Symbol:
+    """A resolved declaration: what every use of a name in its scope refers to"""
+    __slots__ = ('name', 'type', 'kind', 'params')
+    
+    def __init__(self, name, type, kind, params=None):
+        self.name = name
+        self.type = type  # Hinglish type name, or None for a void function
+        self.kind = kind  # "function", "param" or "variable"
+        self.params = params  # Parameter types of a function, None otherwise
+    
+    def __repr__(self):
+        return f"Symbol({self.kind} {self.name}: {self.type})"
+
 class SymbolTable:
-    """Tracks variables and their types in different scopes"""
+    """Tracks variables and their types in different scopes.
+    
+    Names are identifier ids from the NamePool the AST was parsed against.
+    Every id maps to a stack of (scope depth, type, symbol) bindings whose
+    top is the visible one, and a flat undo log records which ids each open
+    scope defined, so define, lookup and exit_scope cost O(1) per binding
+    whatever the nesting depth.
+    """
     
     def __init__(self):
-        self.scopes = [{}]  # Start with global scope
+        self.bindings = {}  # ident -> [(depth, type, symbol), ...], innermost last
+        self.undo = []  # idents defined, in order, across all open scopes
+        self.marks = []  # len(undo) when each scope above the global one opened
+    
+    @property
+    def depth(self):
+        """Depth of the current scope; the global scope is 0"""
+        return len(self.marks)
+    
+    @property
+    def scopes(self):
+        """Compatibility view: one dict-like view per open scope, global first"""
+        return ScopeList(self)
     
     def enter_scope(self):
         """Create a new scope for a block"""
-        self.scopes.append({})
+        self.marks.append(len(self.undo))
     
     def exit_scope(self):
         """Exit the current scope"""
-        if len(self.scopes) > 1:  # Never remove global scope
-            self.scopes.pop()
+        if self.marks:  # Never remove global scope
+            mark = self.marks.pop()
+            undo, bindings = self.undo, self.bindings
+            while len(undo) > mark:
+                ident = undo.pop()
+                stack = bindings[ident]
+                stack.pop()
+                if not stack:
+                    del bindings[ident]
+    
+    def define(self, ident, var_type, symbol=None):
+        """Define a variable in current scope, optionally with its Symbol"""
+        depth = len(self.marks)
+        binding = (depth, var_type, symbol)
+        stack = self.bindings.get(ident)
+        if stack is None:
+            self.bindings[ident] = [binding]
+        elif stack[-1][0] == depth:
+            # Redefinition in the same scope replaces the binding
+            stack[-1] = binding
+            return
+        else:
+            stack.append(binding)
+        self.undo.append(ident)
     
-    def define(self, name, var_type):
-        """Define a variable in current scope"""
-        self.scopes[-1][name] = var_type
+    def defined_here(self, ident):
+        """Whether ident is already defined in the current scope"""
+        stack = self.bindings.get(ident)
+        return stack is not None and stack[-1][0] == len(self.marks)
     
-    def lookup(self, name):
+    def lookup(self, ident):
         """Look up a variable in all scopes, from innermost to outermost"""
-        for scope in reversed(self.scopes):
-            if name in scope:
-                return scope[name]
-        return None
+        stack = self.bindings.get(ident)
+        return stack[-1][1] if stack else None
+    
+    def resolve(self, ident):
+        """The Symbol ident currently refers to, or None"""
+        stack = self.bindings.get(ident)
+        return stack[-1][2] if stack else None
+
+class TypeToken:
+    """Token-like stand-in for a return type the source leaves implicit"""
+    __slots__ = ('value',)
+    
+    def __init__(self, value):
+        self.value = value
 
 class SemanticError(Exception):
     """Exception raised for semantic errors"""
     pass
 
-class SemanticAnalyzer:
+class SemanticAnalyzer(Visitor):
     def __init__(self):
+        super().__init__()
         self.symbols = SymbolTable()
         self.current_function = None
         self.errors = []
@@ -62,12 +197,6 @@ class SemanticAnalyzer:
                 'symbol_table': self.symbols
             }
     
-    def visit(self, node):
-        """Visit a node in the AST"""
-        method_name = f'visit_{type(node).__name__}'
-        method = getattr(self, method_name, self.generic_visit)
-        return method(node)
-    
     def generic_visit(self, node):
         """Default handler for unhandled node types"""
         pass
@@ -79,48 +208,60 @@ class SemanticAnalyzer:
     
     def visit_FunctionDeclaration(self, func):
         """Visit function declaration"""
+        self.enter_function(func)
+        self.visit(func.body)
+        self.exit_function()
+    
+    def enter_function(self, func):
+        """Define func and open its scope with the parameters in it"""
         self.current_function = func
+        self.define_function(func)
         
-        # Create a special Token-like object for return type
-        class TypeToken:
-            def __init__(self, value):
-                self.value = value
+        # Process function body with new scope
+        self.symbols.enter_scope()
         
+        # Add parameters to scope
+        for param in func.params:
+            self.symbols.define(param.id, param.type.value, Symbol(param.name, param.type.value, "param"))
+    
+    def define_function(self, func):
+        """Add func's signature to the current scope"""
         # Special case for main function - default to ank (int) return type
         if func.name == "main" and func.return_type is None:
-            self.current_function.return_type = TypeToken("ank")
+            func.return_type = TypeToken("ank")
         
         # Determine return type - default to "ank" for main function
         return_type = func.return_type.value if func.return_type else ("ank" if func.name == "main" else None)
         
         # Add function to symbol table
-        self.symbols.define(func.name, return_type)
-        
-        # Process function body with new scope
-        self.symbols.enter_scope()
-        
-        # Add parameters to scope
-        for param in func.params:
-            self.symbols.define(param.name, param.type.value)
-        
-        self.visit(func.body)
+        params = tuple(param.type.value for param in func.params)
+        self.symbols.define(func.id, return_type, Symbol(func.name, return_type, "function", params))
+    
+    def exit_function(self):
+        """Close the scope opened by enter_function"""
         self.symbols.exit_scope()
         self.current_function = None
     
     def visit_VarDeclaration(self, var_decl):
         """Visit variable declaration"""
-        # Check if variable is already defined in current scope
-        if var_decl.name in self.symbols.scopes[-1]:
+        self.check_redefinition(var_decl)
+        init_type = self.visit(var_decl.initializer) if var_decl.initializer else None
+        self.declare(var_decl, init_type)
+    
+    def check_redefinition(self, var_decl):
+        """Check if variable is already defined in current scope"""
+        if self.symbols.defined_here(var_decl.id):
             self.errors.append(f"Variable '{var_decl.name}' is already defined in this scope")
-        
-        # Validate initializer if present
+    
+    def declare(self, var_decl, init_type):
+        """Validate the initializer's type, if there is one, and define the variable"""
         if var_decl.initializer:
-            init_type = self.visit(var_decl.initializer)
             if not self.check_type_compatibility(var_decl.var_type.value, init_type):
                 self.errors.append(f"Cannot assign {init_type} to variable '{var_decl.name}' of type {var_decl.var_type.value}")
         
         # Add to symbol table
-        self.symbols.define(var_decl.name, var_decl.var_type.value)
+        var_type = var_decl.var_type.value
+        self.symbols.define(var_decl.id, var_type, Symbol(var_decl.name, var_type, "variable"))
     
     def visit_BlockStatement(self, block):
         """Visit block statement"""
@@ -131,9 +272,7 @@ class SemanticAnalyzer:
     
     def visit_IfStatement(self, if_stmt):
         """Visit if statement"""
-        cond_type = self.visit(if_stmt.condition)
-        if cond_type != "boolean":
-            self.errors.append(f"Condition in if statement must be a boolean expression")
+        self.check_condition(self.visit(if_stmt.condition), "if")
         
         self.visit(if_stmt.then_branch)
         if if_stmt.else_branch:
@@ -141,9 +280,7 @@ class SemanticAnalyzer:
     
     def visit_WhileStatement(self, while_stmt):
         """Visit while statement"""
-        cond_type = self.visit(while_stmt.condition)
-        if cond_type != "boolean":
-            self.errors.append(f"Condition in while statement must be a boolean expression")
+        self.check_condition(self.visit(while_stmt.condition), "while")
         
         self.visit(while_stmt.body)
     
@@ -155,9 +292,7 @@ class SemanticAnalyzer:
             self.visit(for_stmt.initializer)
         
         if for_stmt.condition:
-            cond_type = self.visit(for_stmt.condition)
-            if cond_type != "boolean":
-                self.errors.append(f"Condition in for statement must be a boolean expression")
+            self.check_condition(self.visit(for_stmt.condition), "for")
         
         if for_stmt.increment:
             self.visit(for_stmt.increment)
@@ -165,15 +300,27 @@ class SemanticAnalyzer:
         self.visit(for_stmt.body)
         self.symbols.exit_scope()
     
+    def check_condition(self, cond_type, statement):
+        """Conditions of if, while and for statements must be boolean"""
+        if cond_type != "boolean":
+            self.errors.append(f"Condition in {statement} statement must be a boolean expression")
+    
     def visit_PrintStatement(self, print_stmt):
         """Visit print statement"""
         self.visit(print_stmt.expression)
     
     def visit_ReturnStatement(self, return_stmt):
         """Visit return statement"""
+        expected = self.expected_return(return_stmt)
+        if expected is not None:
+            self.check_return_type(expected, self.visit(return_stmt.value))
+    
+    def expected_return(self, return_stmt):
+        """Check where a return may appear; the type its value must have, or
+        None when there is no value to check"""
         if not self.current_function:
             self.errors.append(f"Return statement outside of function")
-            return
+            return None
         
         expected_type = self.current_function.return_type
         if expected_type is None:  # void function
@@ -183,9 +330,13 @@ class SemanticAnalyzer:
             if return_stmt.value is None:
                 self.errors.append(f"Function must return a value of type {expected_type.value}")
             else:
-                return_type = self.visit(return_stmt.value)
-                if not self.check_type_compatibility(expected_type.value, return_type):
-                    self.errors.append(f"Return type mismatch: expected {expected_type.value}, got {return_type}")
+                return expected_type.value
+        return None
+    
+    def check_return_type(self, expected, return_type):
+        """The returned value must fit the function's return type"""
+        if not self.check_type_compatibility(expected, return_type):
+            self.errors.append(f"Return type mismatch: expected {expected}, got {return_type}")
     
     def visit_ExpressionStatement(self, expr_stmt):
         """Visit expression statement"""
@@ -193,31 +344,37 @@ class SemanticAnalyzer:
     
     def visit_Assignment(self, assign):
         """Visit assignment"""
-        var_type = self.symbols.lookup(assign.name)
+        var_type = self.assignment_target(assign)
         if var_type is None:
-            self.errors.append(f"Variable '{assign.name}' is not defined")
             return "unknown"
         
-        value_type = self.visit(assign.value)
+        self.check_assignment(assign, var_type, self.visit(assign.value))
+        return var_type
+    
+    def assignment_target(self, assign):
+        """Type of the assigned variable, or None (and an error) if it is undefined"""
+        var_type = self.symbols.lookup(assign.id)
+        if var_type is None:
+            self.errors.append(f"Variable '{assign.name}' is not defined")
+        return var_type
+    
+    def check_assignment(self, assign, var_type, value_type):
+        """The assigned value must fit the variable's type"""
         if not self.check_type_compatibility(var_type, value_type):
             self.errors.append(f"Cannot assign {value_type} to variable '{assign.name}' of type {var_type}")
-        
-        return var_type
     
-    def visit_Logical(self, logical):
-        """Visit logical expression"""
-        left_type = self.visit(logical.left)
-        right_type = self.visit(logical.right)
-        
+    # Binary, Logical, Unary and Grouping nodes are walked by Visitor.fold
+    # without recursion; each combine_ method checks one node given the
+    # types of its operands
+    def combine_Logical(self, logical, left_type, right_type):
+        """Type of a logical expression from its operand types"""
         if left_type != "boolean" or right_type != "boolean":
             self.errors.append(f"Logical operators require boolean operands")
         
         return "boolean"
     
-    def visit_Binary(self, binary):
-        """Visit binary expression"""
-        left_type = self.visit(binary.left)
-        right_type = self.visit(binary.right)
+    def combine_Binary(self, binary, left_type, right_type):
+        """Type of a binary expression from its operand types"""
         op = binary.operator.value
         
         # Comparison operators
@@ -244,9 +401,8 @@ class SemanticAnalyzer:
         
         return "unknown"
     
-    def visit_Unary(self, unary):
-        """Visit unary expression"""
-        operand_type = self.visit(unary.right)
+    def combine_Unary(self, unary, operand_type):
+        """Type of a unary expression from its operand type"""
         op = unary.operator.value
         
         if op == "-":
@@ -262,31 +418,51 @@ class SemanticAnalyzer:
     
     def visit_Call(self, call):
         """Visit function call"""
+        func_type, check_arguments = self.resolve_call(call)
+        if check_arguments:
+            self.check_arguments(call, [self.visit(arg) for arg in call.arguments])
+        return func_type
+    
+    def resolve_call(self, call):
+        """Return type of a call, and whether its arguments are type-checked"""
         callee = call.callee
         if not isinstance(callee, Variable):
             self.errors.append(f"Cannot call a non-function value")
-            return "unknown"
+            return "unknown", False
         
         func_name = callee.name
-        func_type = self.symbols.lookup(func_name)
+        symbol = self.symbols.resolve(callee.id)
+        if symbol is not None and symbol.kind == "function":
+            return symbol.type or "void", True
         
+        func_type = self.symbols.lookup(callee.id)
         if func_type is None:
             # Special case for built-in likho function
             if func_name == "likho":
-                for arg in call.arguments:
-                    self.visit(arg)
-                return "void"
+                return "void", True
             
             self.errors.append(f"Function '{func_name}' is not defined")
-            return "unknown"
+            return "unknown", False
         
-        # TODO: Check argument count and types when we have function parameters
+        return func_type, False
+    
+    def check_arguments(self, call, arg_types):
+        """Arguments must match the called function's parameters in number and type"""
+        symbol = self.symbols.resolve(call.callee.id)
+        if symbol is None or symbol.params is None:
+            return  # likho takes anything
         
-        return func_type
+        name, params = call.callee.name, symbol.params
+        if len(arg_types) != len(params):
+            self.errors.append(f"Function '{name}' expects {len(params)} arguments, got {len(arg_types)}")
+            return
+        for position, (param_type, arg_type) in enumerate(zip(params, arg_types), 1):
+            if not self.check_type_compatibility(param_type, arg_type):
+                self.errors.append(f"Cannot pass {arg_type} as argument {position} of '{name}', which expects {param_type}")
     
     def visit_Variable(self, variable):
         """Visit variable reference"""
-        var_type = self.symbols.lookup(variable.name)
+        var_type = self.symbols.lookup(variable.id)
         if var_type is None:
             self.errors.append(f"Variable '{variable.name}' is not defined")
             return "unknown"
@@ -310,9 +486,9 @@ class SemanticAnalyzer:
             return "vakya"
         return "unknown"
     
-    def visit_Grouping(self, grouping):
-        """Visit expression grouping"""
-        return self.visit(grouping.expression)
+    def combine_Grouping(self, grouping, inner_type):
+        """A grouping has the type of its expression"""
+        return inner_type
     
     # Helper methods
     def is_float(self, value):
@@ -341,6 +517,282 @@ class SemanticAnalyzer:
         return False
 
 
+# The job forked analysis workers inherit: (analyzer class to check with,
+# program statements, position of each function among them, top-level
+# definitions visible to each function, top-level definitions in order as
+# (ident, type, symbol))
+_analysis_job = None
+
+def _check_functions(bounds):
+    """Check the bodies of functions first..last-1 of _analysis_job; an
+    (errors, visit result) pair per function"""
+    analyzer_class, statements, functions, visible, definitions = _analysis_job
+    first, last = bounds
+    analyzer = analyzer_class()
+    # Every signature is among the definitions replayed below, so a function
+    # is not defined again on entry and its body, the IR and every caller
+    # share one Symbol for it
+    analyzer.define_function = lambda func: None
+    replayed = 0
+    results = []
+    for index in range(first, last):
+        # Bring the global scope up to where this function was declared
+        for ident, var_type, symbol in definitions[replayed:visible[index]]:
+            analyzer.symbols.define(ident, var_type, symbol)
+        replayed = visible[index]
+        
+        value = analyzer.visit(statements[functions[index]])
+        results.append((analyzer.errors, value))
+        analyzer.errors = []
+    return results
+
+class DefinitionPickler(pickle.Pickler):
+    """Pickles the top-level Symbols of the analysis job as their positions
+    in its definitions, so the parent gets its own objects back"""
+    
+    def __init__(self, file, definitions):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.positions = {id(symbol): position for position, (_, _, symbol) in enumerate(definitions)}
+    
+    def persistent_id(self, obj):
+        return self.positions.get(id(obj)) if type(obj) is Symbol else None
+
+class DefinitionUnpickler(pickle.Unpickler):
+    """Reads DefinitionPickler's output against this process's definitions"""
+    
+    def __init__(self, file, definitions):
+        super().__init__(file)
+        self.definitions = definitions
+    
+    def persistent_load(self, position):
+        return self.definitions[position][2]
+
+def _check_functions_pickled(bounds):
+    """Worker: _check_functions, pickled by DefinitionPickler. Returns
+    (flattened, data); results too deep to pickle have their trees
+    flattened by flatten_tree() first."""
+    results = _check_functions(bounds)
+    definitions = _analysis_job[-1]
+    data = io.BytesIO()
+    try:
+        DefinitionPickler(data, definitions).dump(results)
+        return False, data.getvalue()
+    except RecursionError:
+        data = io.BytesIO()
+        DefinitionPickler(data, definitions).dump(
+            [(errors, flatten_tree(value) if isinstance(value, ASTNode) else value) for errors, value in results])
+        return True, data.getvalue()
+
+class ParallelSemanticAnalyzer(SemanticAnalyzer):
+    """Two-phase semantic analysis with function bodies checked in parallel.
+    
+    Phase one walks the top-level statements in order, recording every
+    function's signature and checking everything else. Phase two checks
+    function bodies in forked worker processes, each seeing exactly the
+    top-level names declared before its function, and the errors are merged
+    back in source order: the result is the same as SemanticAnalyzer's.
+    Small programs, and platforms without fork, are checked in this process.
+    
+    Workers check with an instance of function_analyzer, and what its visits
+    return comes back too (with the top-level Symbols as this process's own
+    objects): visit_Program returns the visit result of every top-level
+    statement in order. ir.ParallelIRBuilder uses this to lower function
+    bodies in the workers.
+    """
+    function_analyzer = SemanticAnalyzer
+    
+    def __init__(self, workers=None, min_functions=64):
+        super().__init__()
+        self.workers = workers or os.cpu_count() or 1
+        self.min_functions = min_functions  # Fewer functions per worker than this is not worth a process
+    
+    def visit_Program(self, program):
+        """Check signatures and top-level statements, then function bodies"""
+        global _analysis_job
+        statements = program.statements
+        functions, visible, definitions = [], [], []
+        statement_results = []  # Per statement (errors, visit result); None for functions
+        
+        for position, statement in enumerate(statements):
+            if isinstance(statement, FunctionDeclaration):
+                self.define_function(statement)
+                functions.append(position)
+                statement_results.append(None)
+            else:
+                first_error = len(self.errors)
+                value = self.visit(statement)
+                statement_results.append((self.errors[first_error:], value))
+                del self.errors[first_error:]
+            
+            if isinstance(statement, (FunctionDeclaration, VarDeclaration)):
+                ident = statement.id
+                definitions.append((ident, self.symbols.lookup(ident), self.symbols.resolve(ident)))
+            if isinstance(statement, FunctionDeclaration):
+                visible.append(len(definitions))
+        
+        _analysis_job = (self.function_analyzer, statements, functions, visible, definitions)
+        try:
+            function_results = iter(self.check_functions(len(functions), definitions))
+        finally:
+            _analysis_job = None
+        
+        values = []
+        for result in statement_results:
+            errors, value = next(function_results) if result is None else result
+            self.errors.extend(errors)
+            values.append(value)
+        return values
+    
+    def check_functions(self, count, definitions):
+        """(errors, visit result) for the job's count functions, in order"""
+        parts = min(self.workers, count // self.min_functions)
+        if parts < 2 or "fork" not in multiprocessing.get_all_start_methods():
+            return _check_functions((0, count))
+        
+        bounds = [count * part // parts for part in range(parts + 1)]
+        results = []
+        context = multiprocessing.get_context("fork")
+        # Frozen objects are never scanned by the workers' collectors, so the
+        # AST pages they inherit stay shared instead of being copied
+        gc.freeze()
+        try:
+            with ProcessPoolExecutor(max_workers=parts, mp_context=context) as executor:
+                for flattened, data in executor.map(_check_functions_pickled, zip(bounds, bounds[1:])):
+                    chunk = DefinitionUnpickler(io.BytesIO(data), definitions).load()
+                    if flattened:
+                        chunk = [(errors, build_tree(value) if isinstance(value, list) else value)
+                                 for errors, value in chunk]
+                    results.extend(chunk)
+        finally:
+            gc.unfreeze()
+        return results
+
+
+def binding_key(binding):
+    """What code using a binding depends on: its type, and a function's signature"""
+    depth, var_type, symbol = binding
+    return (var_type, symbol.kind, symbol.params) if symbol else (var_type,)
+
+class DependencyTable(SymbolTable):
+    """A SymbolTable that notes every global binding read through it.
+    
+    reads maps each id looked up while it named a global (or nothing) to
+    binding_key of what it named at the first read, or None. Reads that
+    find a local or parameter are not noted.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self.reads = {}
+    
+    def global_key(self, ident):
+        """binding_key of the global ident names, or None when it names no global"""
+        stack = self.bindings.get(ident)
+        if not stack or stack[-1][0]:
+            return None
+        return binding_key(stack[-1])
+    
+    def note(self, ident):
+        stack = self.bindings.get(ident)
+        if not stack:
+            self.reads.setdefault(ident, None)
+        elif not stack[-1][0]:
+            self.reads.setdefault(ident, binding_key(stack[-1]))
+    
+    def defined_here(self, ident):
+        if not self.marks:
+            self.note(ident)
+        return super().defined_here(ident)
+    
+    def lookup(self, ident):
+        self.note(ident)
+        return super().lookup(ident)
+    
+    def resolve(self, ident):
+        self.note(ident)
+        return super().resolve(ident)
+
+class IncrementalAnalyzer(SemanticAnalyzer):
+    """Semantic analysis that re-checks only what an edit can have affected.
+    
+    Meant for the ASTs an IncrementalParser keeps, where unchanged top-level
+    declarations are the same objects from one edit to the next. For every
+    top-level statement the analyzer stores its errors, the global bindings
+    it read (types and function signatures) and the globals it defines. A
+    statement is checked again only when it is a new object or one of those
+    bindings now differs where it stands, such as a caller of a function
+    whose signature changed; otherwise its stored errors are reused, and the
+    type annotations on its nodes are still in place.
+    
+    The stored reads and definitions are keyed by name pool ids, so analyze()
+    takes the parser's NamePool too: once the lexer compacts it every name
+    has a new id, and nothing stored before then is reused.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self.cache = {}  # id(statement) -> (statement, errors, reads, definitions)
+        self.names = None  # The NamePool the cached ids come from
+        self.rechecked = 0  # Statements checked again by the last analyze()
+    
+    def analyze(self, program, names=None):
+        """SemanticAnalyzer.analyze, reusing the results of unchanged statements
+        when names is the same NamePool as last time"""
+        if names is not self.names:
+            self.cache = {}
+            self.names = names
+        self.symbols = DependencyTable()
+        self.current_function = None
+        self.errors = []
+        return super().analyze(program)
+    
+    def visit_Program(self, program):
+        """Check the statements an edit can have affected, reuse the rest"""
+        symbols, cache = self.symbols, self.cache
+        self.cache = {}
+        self.rechecked = 0
+        for statement in program.statements:
+            entry = cache.get(id(statement))
+            if entry is None or entry[0] is not statement or not self.reuse(entry):
+                entry = self.check(statement)
+            self.cache[id(statement)] = entry
+            self.errors.extend(entry[1])
+    
+    def reuse(self, entry):
+        """Define the globals of an unaffected statement and return True, or return False"""
+        statement, errors, reads, definitions = entry
+        global_key = self.symbols.global_key
+        # A function's body sees its own signature; anything else reads
+        # globals before it defines its own
+        if isinstance(statement, FunctionDeclaration):
+            self.define_all(definitions)
+            return all(global_key(ident) == key for ident, key in reads.items())
+        if any(global_key(ident) != key for ident, key in reads.items()):
+            return False
+        self.define_all(definitions)
+        return True
+    
+    def define_all(self, definitions):
+        for ident, var_type, symbol in definitions:
+            self.symbols.define(ident, var_type, symbol)
+    
+    def check(self, statement):
+        """Check statement from scratch; its cache entry"""
+        symbols = self.symbols
+        symbols.reads = {}
+        first_error = len(self.errors)
+        self.visit(statement)
+        errors = self.errors[first_error:]
+        del self.errors[first_error:]
+        self.rechecked += 1
+        
+        definitions = []
+        if isinstance(statement, (FunctionDeclaration, VarDeclaration)):
+            ident = statement.id
+            definitions.append((ident, SymbolTable.lookup(symbols, ident), SymbolTable.resolve(symbols, ident)))
+        return statement, errors, symbols.reads, definitions
+
+
 if __name__ == "__main__":
     from lexer import Lexer
     from parser import Parser
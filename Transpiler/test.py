@@ -1,9 +1,18 @@
-from lexer import Lexer, TokenType
-from parser import Parser
-from sem_analyser import SemanticAnalyzer
+from lexer import Lexer, TokenType, IncrementalLexer, tokenize_stream, tokenize_mapped, tokenize_parallel
+from parser import (Parser, IncrementalParser, parse_parallel, ASTNode, BlockStatement, Binary, ForStatement,
+                    FunctionDeclaration, Grouping, IfStatement, Literal, Logical, NamedNode, Parameter,
+                    PrintStatement, Unary, VarDeclaration, Variable, WhileStatement)
+from query import Pattern, contains
+from sem_analyser import SemanticAnalyzer, ParallelSemanticAnalyzer, IncrementalAnalyzer
+from ir import IRBuilder, ParallelIRBuilder
 from generator import CodeGenerator
+from optimizer import optimize
+from cache import ASTCache
+from compiler import HinglishCompiler
+import contextlib
 import subprocess
 import os
+import io
 import tempfile
 
 def run_test(name, source_code, expected_pattern=None, expect_semantic_errors=None):
@@ -21,20 +30,17 @@ def run_test(name, source_code, expected_pattern=None, expect_semantic_errors=No
     # Syntax/parsing phase
     try:
         lexer = Lexer(source_code)
-        tokens = lexer.tokenize()
-        parser = Parser(tokens)
+        parser = Parser(lexer.iter_tokens())
         ast = parser.parse()
         
-        print("\nPARSER OUTPUT:")
-        ast_repr = str(ast)
-        print(ast_repr)
-        
         if expected_pattern:
-            if expected_pattern in ast_repr:
-                print(f"\n✅ SYNTAX: Found expected pattern: '{expected_pattern}'")
+            if contains(ast, expected_pattern):
+                print(f"\n✅ SYNTAX: Found expected pattern: {expected_pattern}")
                 syntax_pass = True
             else:
-                print(f"\n❌ SYNTAX: Expected pattern not found: '{expected_pattern}'")
+                print(f"\n❌ SYNTAX: Expected pattern not found: {expected_pattern}")
+                print("\nPARSER OUTPUT:")
+                print(ast)
         else:
             print("\n✅ SYNTAX: Parsing completed without errors")
             syntax_pass = True
@@ -74,10 +80,13 @@ def run_test(name, source_code, expected_pattern=None, expect_semantic_errors=No
         print(f"\n❌ ERROR: {e}")
         return False
 
-def run_generator_test(name, source_code, expected_output=None):
-    """Run a full transpilation test focusing only on program output validation"""
+def run_generator_test(name, source_code, expected_output=None, opt_level=0):
+    """Run a full transpilation test focusing only on program output validation.
+    
+    With opt_level, the IR is optimized before C is generated from it.
+    """
     print(f"\n{'=' * 50}")
-    print(f"CODE GENERATION TEST: {name}")
+    print(f"{f'-O{opt_level} ' if opt_level else ''}CODE GENERATION TEST: {name}")
     print(f"{'=' * 50}")
     
     print("SOURCE CODE:")
@@ -89,7 +98,7 @@ def run_generator_test(name, source_code, expected_output=None):
         tokens = lexer.tokenize()
         parser = Parser(tokens)
         ast = parser.parse()
-        analyzer = SemanticAnalyzer()
+        analyzer = IRBuilder()
         
         analysis_result = analyzer.analyze(ast)
 
@@ -97,20 +106,19 @@ def run_generator_test(name, source_code, expected_output=None):
             print("Semantic analysis failed!")
             return
             
-        generator = CodeGenerator(analysis_result['symbol_table'])
-        c_code = generator.generate(ast)
+        if opt_level:
+            optimize(analysis_result['ir'], opt_level)
+        generator = CodeGenerator()
+        c_code = generator.generate(analysis_result['ir'])
         
         # Only attempt to compile and run if there's expected output to verify
         if expected_output is not None:
-            # Save C code to a temporary file
-            with tempfile.NamedTemporaryFile(suffix='.c', delete=False) as temp_c_file:
-                temp_c_path = temp_c_file.name
-                temp_c_file.write(c_code.encode())
-            
-            # Compile the C code
-            temp_exe_path = temp_c_path + '.exe'
+            # Compile the C code, feeding it to gcc over stdin
+            fd, temp_exe_path = tempfile.mkstemp(suffix='.exe')
+            os.close(fd)
             compile_result = subprocess.run(
-                ['gcc', temp_c_path, '-o', temp_exe_path], 
+                ['gcc', '-x', 'c', '-', '-o', temp_exe_path],
+                input=c_code,
                 capture_output=True, 
                 text=True
             )
@@ -122,7 +130,7 @@ def run_generator_test(name, source_code, expected_output=None):
                 print(f"```\n{c_code}\n```")
                 
                 # Clean up
-                os.unlink(temp_c_path)
+                os.unlink(temp_exe_path)
                 return False
             
             # Run the compiled program
@@ -136,7 +144,6 @@ def run_generator_test(name, source_code, expected_output=None):
             print(f"```\n{run_result.stdout}\n```")
             
             # Clean up
-            os.unlink(temp_c_path)
             os.unlink(temp_exe_path)
             
             # Check output
@@ -157,6 +164,430 @@ def run_generator_test(name, source_code, expected_output=None):
         print(f"\n❌ ERROR: {e}")
         return False
 
+def token_key(tokens):
+    """Reduce tokens to comparable (type, value, line, column) tuples"""
+    return [(t.type, t.value, t.line, t.column) for t in tokens]
+
+def find_id_mismatch(tokens):
+    """Return the first identifier token whose id is missing or is shared
+    with a different name, or whose name has another id elsewhere, or None"""
+    ids, names = {}, {}
+    for token in tokens:
+        if token.type is TokenType.IDENTIFIER:
+            if token.id is None or ids.setdefault(token.value, token.id) != token.id \
+                    or names.setdefault(token.id, token.value) != token.value:
+                return token
+    return None
+
+def tokenize_through_mmap(source_code, newline="\n"):
+    """Write a source to a temporary file with the given line breaks and
+    tokenize it memory-mapped"""
+    with tempfile.NamedTemporaryFile(suffix='.hp', delete=False) as temp_file:
+        temp_file.write(source_code.replace("\n", newline).encode('utf-8'))
+    try:
+        return tokenize_mapped(temp_file.name)
+    finally:
+        os.unlink(temp_file.name)
+
+def find_crlf_fallback(source_code):
+    """Return a description if a source the byte scanner maps is read as text
+    once its line breaks are CRLF, or None. Only a line break inside a
+    literal may send it to the text path."""
+    buffer = tokenize_through_mmap(source_code)
+    if not buffer.binary or any("\n" in buffer.lexeme(index) for index in range(len(buffer))):
+        return None
+    if not tokenize_through_mmap(source_code, "\r\n").binary:
+        return "mmap crlf: read as text although only the line breaks changed"
+    return None
+
+def tokenize_incrementally(source_code):
+    """Reach a source through a series of edits on an IncrementalLexer"""
+    third = len(source_code) // 3
+    # Small chunks make the edits and re-scans cross chunk boundaries,
+    # and a tiny compact_after rebuilds the name pool after almost every edit
+    lexer = IncrementalLexer(source_code[:third] + source_code[2 * third:], chunk_size=7, compact_after=1)
+    lexer.edit(third, 0, source_code[third:2 * third])
+    if source_code:
+        # Change a character near the start and put it back, moving the
+        # pending shift back and forth across the file
+        lexer.edit(1, 0, "x\n")
+        lexer.edit(len(source_code) // 2, 0, "")
+        lexer.edit(1, 2, "")
+    return lexer.tokens
+
+def token_streams(source_code):
+    """Tokenize a source with every non-legacy engine, keyed by engine name"""
+    return {
+        "regex": Lexer(source_code).tokenize(),
+        "iter_tokens": list(Lexer(source_code).iter_tokens()),
+        "stream": list(tokenize_stream(io.StringIO(source_code), chunk_size=7)),
+        "buffer": list(Lexer(source_code).tokenize_buffer()),
+        "mmap": list(tokenize_through_mmap(source_code)),
+        "mmap crlf": list(tokenize_through_mmap(source_code, "\r\n")),
+        "incremental": tokenize_incrementally(source_code),
+        "parallel": tokenize_parallel(source_code, workers=3, min_chunk=16),
+    }
+
+def find_token_mismatch(source_code):
+    """Return a description of the first disagreement with the legacy scanner, or None"""
+    legacy = Lexer(source_code, legacy=True).tokenize()
+    expected = token_key(legacy)
+    for engine, tokens in [("legacy", legacy)] + list(token_streams(source_code).items()):
+        token = find_id_mismatch(tokens)
+        if token is not None:
+            return f"{engine}: {token} has id {token.id}, which disagrees with other tokens"
+        actual = token_key(tokens)
+        if actual != expected:
+            for index, (want, got) in enumerate(zip(expected, actual)):
+                if want != got:
+                    return f"{engine}: token {index} is {got}, expected {want}"
+            return f"{engine}: produced {len(actual)} tokens, expected {len(expected)}"
+    return find_crlf_fallback(source_code)
+
+def run_lexer_test(name, source_code):
+    """Check that every tokenizer engine matches the legacy scanner"""
+    print(f"\n{'=' * 50}")
+    print(f"LEXER TEST: {name}")
+    print(f"{'=' * 50}")
+    
+    try:
+        mismatch = find_token_mismatch(source_code)
+        if mismatch:
+            print(f"\n❌ TOKENS: {mismatch}")
+            return False
+        print("\n✅ TOKENS: All engines agree with the legacy scanner")
+        return True
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        return False
+
+def parse_outcome(source_code, legacy):
+    """Repr of the parsed AST, or the parse error message"""
+    try:
+        return repr(Parser(Lexer(source_code).tokenize(), legacy=legacy).parse())
+    except Exception as e:
+        return f"error: {e}"
+
+def parse_through_cache(source_code):
+    """Repr of an AST parsed from a TokenBuffer after a round trip through ASTCache"""
+    try:
+        ast = Parser(Lexer(source_code).tokenize_buffer()).parse()
+    except Exception as e:
+        return f"error: {e}"
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ASTCache(cache_dir)
+        key = cache.key(source_code)
+        cache.store(key, ast)
+        return repr(cache.load(key))
+
+def find_cache_mismatch(source_code):
+    """Return how the C generated from an AST loaded back from ASTCache
+    differs from the C generated from the parsed AST, or None; comparing C
+    rather than repr() works on expressions too deep to repr"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        ast = Parser(Lexer(source_code).tokenize()).parse()
+        expected = CodeGenerator().generate(IRBuilder().analyze(ast)['ir'])
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = ASTCache(cache_dir)
+            key = cache.key(source_code)
+            cache.store(key, ast)
+            loaded = cache.load(key)
+            source_path = os.path.join(cache_dir, "source.hp")
+            with open(source_path, 'w', encoding='utf-8', newline='') as f:
+                f.write(source_code)
+            if cache.file_key(source_path) != key:
+                return "file_key() differs from key() for the same source"
+        if loaded is None:
+            return "the AST was not cached"
+        actual = CodeGenerator().generate(IRBuilder().analyze(loaded)['ir'])
+    if actual != expected:
+        return f"cached AST generated {actual[:200]}, expected {expected[:200]}"
+    return None
+
+def parse_incrementally(source_code):
+    """Repr of the AST an IncrementalParser reaches through a series of edits"""
+    third = len(source_code) // 3
+    parser = IncrementalParser("", compact_after=1)
+    edits = [(0, 0, source_code[:third] + source_code[2 * third:]),
+             (third, 0, source_code[third:2 * third]),
+             (1, 0, "}\n"), (1, 2, "")]
+    outcome = None
+    for edit in edits:
+        try:
+            parser.edit(*edit)
+            outcome = repr(parser.program)
+        except Exception as e:
+            outcome = f"error: {e}"
+    return outcome
+
+def find_node_id_mismatch(node, names=None):
+    """Return the first named node under node whose id is shared with a
+    different name, or whose name has another id elsewhere (or in the
+    NamePool names, when given), or None"""
+    ids, spellings = {}, {}
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, ASTNode):
+            if isinstance(node, NamedNode):
+                expected = names.ids.get(node.name) if names is not None else ids.setdefault(node.name, node.id)
+                if expected != node.id or spellings.setdefault(node.id, node.name) != node.name:
+                    return node
+            stack.extend(value for _, value in node.fields())
+    return None
+
+def find_name_pool_growth(source_code):
+    """Type declarations one character at a time at the end of a source in
+    an IncrementalParser and return how its name pool kept the half-typed
+    names, or which AST node's id disagrees with the pool, or None"""
+    compact_after = 16
+    try:
+        parser = IncrementalParser(source_code, compact_after=compact_after)
+        for number in range(20):
+            offset = len(parser.source) + len("\nank ")
+            parser.edit(len(parser.source), 0, "\nank x;")
+            for index, char in enumerate(f"naam_number_{number}"):
+                parser.edit(offset + index, 0, char)
+        program = parser.program
+    except Exception:
+        return None  # Does not parse
+    
+    names = parser.lexer.names
+    live = {token.value for token in parser.lexer.tokens if token.type is TokenType.IDENTIFIER}
+    if len(names) > max(2 * len(live), compact_after):
+        return f"the name pool holds {len(names)} names for {len(live)} in use"
+    node = find_node_id_mismatch(program, names)
+    if node is not None:
+        return f"{node!r} has id {node.id}, but the name pool gives {names.ids.get(node.name)}"
+    return None
+
+def parse_in_parallel(source_code):
+    """Repr of the AST parse_parallel builds with every declaration in its own
+    chunk, or which node's id disagrees with the rest of the tree"""
+    try:
+        program = parse_parallel(source_code, workers=3, min_declarations=1)
+    except Exception as e:
+        return f"error: {e}"
+    node = find_node_id_mismatch(program)
+    if node is not None:
+        return f"{node!r} with id {node.id}, which disagrees with other nodes"
+    return repr(program)
+
+def parse_lazily(source_code):
+    """Repr of an AST whose function bodies are skipped and parsed when first read"""
+    try:
+        return repr(Parser(Lexer(source_code).tokenize_buffer(), lazy=True).parse())
+    except Exception as e:
+        return f"error: {e}"
+
+def find_parse_mismatch(source_code):
+    """Return a description of how any other way of parsing differs from the legacy chain, or None"""
+    expected = parse_outcome(source_code, legacy=True)
+    actual = parse_outcome(source_code, legacy=False)
+    if actual != expected:
+        return f"pratt gave {actual[:200]}, expected {expected[:200]}"
+    cached = parse_through_cache(source_code)
+    if cached != expected:
+        return f"cached AST is {cached[:200]}, expected {expected[:200]}"
+    incremental = parse_incrementally(source_code)
+    if incremental != expected:
+        return f"incremental parse gave {incremental[:200]}, expected {expected[:200]}"
+    parallel = parse_in_parallel(source_code)
+    if parallel != expected:
+        return f"parallel parse gave {parallel[:200]}, expected {expected[:200]}"
+    lazy = parse_lazily(source_code)
+    if lazy != expected:
+        return f"lazy parse gave {lazy[:200]}, expected {expected[:200]}"
+    return find_name_pool_growth(source_code)
+
+def run_parser_test(name, source_code):
+    """Check that the Pratt expression parser matches the legacy chain"""
+    print(f"\n{'=' * 50}")
+    print(f"PARSER TEST: {name}")
+    print(f"{'=' * 50}")
+    
+    mismatch = find_parse_mismatch(source_code)
+    if mismatch:
+        print(f"\n❌ AST: {mismatch}")
+        return False
+    print("\n✅ AST: Pratt parser agrees with the legacy chain")
+    return True
+
+def run_cache_test(name, source_code):
+    """Check that an AST survives a round trip through ASTCache"""
+    print(f"\n{'=' * 50}")
+    print(f"CACHE TEST: {name}")
+    print(f"{'=' * 50}")
+    
+    mismatch = find_cache_mismatch(source_code)
+    if mismatch:
+        print(f"\n❌ Cache: {mismatch}")
+        return False
+    print("\n✅ Cache: the loaded AST generates the same C")
+    return True
+
+def find_pipeline_mismatch(source_code):
+    """Return how IRBuilder or ParallelIRBuilder disagrees with
+    SemanticAnalyzer's errors, how the compiler's C differs from the
+    generator's (it must keep none when there are errors), how C streamed by
+    generate_to() differs from generate()'s, or how the C of IR lowered in
+    worker processes differs, before or after -O2, or None"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        expected = SemanticAnalyzer().analyze(Parser(Lexer(source_code).tokenize()).parse())['errors']
+        lowered = IRBuilder().analyze(Parser(Lexer(source_code).tokenize()).parse())
+        # One function per worker, so every program with two functions goes through the pool
+        parallel = ParallelIRBuilder(workers=2, min_functions=1).analyze(Parser(Lexer(source_code).tokenize()).parse())
+        compiled = HinglishCompiler(use_cache=False).transpile_ast(Parser(Lexer(source_code).tokenize()).parse())
+    if lowered['errors'] != expected:
+        return f"IR builder reported {lowered['errors']}, expected {expected}"
+    if parallel['errors'] != expected:
+        return f"parallel IR builder reported {parallel['errors']}, expected {expected}"
+    if expected and compiled is not None:
+        return "compiler kept C code despite semantic errors"
+    if expected:
+        return None
+    
+    c_code = CodeGenerator().generate(lowered['ir'])
+    if compiled != c_code:
+        return "compiler generated different C from the generator"
+    text, data = io.StringIO(), io.BytesIO()
+    CodeGenerator().generate_to(lowered['ir'], text)
+    CodeGenerator().generate_to(lowered['ir'], data)
+    if text.getvalue() != c_code:
+        return "C streamed to a text stream differs from generate()"
+    if data.getvalue() != c_code.encode('utf-8'):
+        return "C streamed to a binary stream differs from generate()"
+    
+    if CodeGenerator().generate(parallel['ir']) != c_code:
+        return "IR lowered in worker processes generated different C"
+    # -O2 relies on calls and references sharing the top-level Symbols
+    optimize(lowered['ir'], 2)
+    optimize(parallel['ir'], 2)
+    if CodeGenerator().generate(parallel['ir']) != CodeGenerator().generate(lowered['ir']):
+        return "IR lowered in worker processes generated different C at -O2"
+    return None
+
+def find_incremental_mismatch(source_code):
+    """Follow an IncrementalParser through the edits parse_incrementally makes,
+    then through edits that leave the source's declarations unchanged while
+    the lexer compacts its name pool, and return how IncrementalAnalyzer's
+    errors after any of them differ from a fresh analysis, or None"""
+    third = len(source_code) // 3
+    edits = [(0, 0, source_code[:third] + source_code[2 * third:]),
+             (third, 0, source_code[third:2 * third]),
+             (1, 0, "}\n"), (1, 2, "")]
+    mismatch = check_incremental_edits(IncrementalParser("", compact_after=1), edits)
+    if mismatch:
+        return mismatch
+    
+    # Dropping the first declaration frees the first id, so a compaction
+    # moves every name; renaming the last declaration adds a name per edit
+    # until the pool has doubled and compacts
+    dead = "ank dead_first = 0;\n"
+    parser = IncrementalParser(dead + source_code + "\nank renamed = 0;", compact_after=1)
+    offset = len(source_code) + len("\nank ")
+    edits = [(0, len(dead), ""), (offset, len("renamed"), "renamed_0")]
+    edits += [(offset, len(f"renamed_{n}"), f"renamed_{n + 1}") for n in range(len(parser.names))]
+    return check_incremental_edits(parser, edits)
+
+def check_incremental_edits(parser, edits):
+    """Make each edit on parser and return how IncrementalAnalyzer's errors
+    after any of them differ from a fresh analysis, or None"""
+    analyzer = IncrementalAnalyzer()
+    try:
+        analyzer.analyze(parser.program, parser.names)
+    except Exception:
+        pass
+    for number, edit in enumerate(edits, 1):
+        try:
+            parser.edit(*edit)
+            program = parser.program
+        except Exception:
+            continue
+        errors = analyzer.analyze(program, parser.names)['errors']
+        expected = SemanticAnalyzer().analyze(Parser(Lexer(parser.source).tokenize()).parse())['errors']
+        if errors != expected:
+            return f"incremental analysis reported {errors} after edit {number}, expected {expected}"
+        
+        analyzer.analyze(program, parser.names)
+        if analyzer.rechecked:
+            return f"incremental analysis re-checked {analyzer.rechecked} statements with nothing changed"
+    return None
+
+def find_analysis_mismatch(source_code):
+    """Return how parallel or incremental analysis differs from SemanticAnalyzer's errors, or None"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            expected = SemanticAnalyzer().analyze(Parser(Lexer(source_code).tokenize()).parse())['errors']
+        except Exception:
+            expected = None  # Does not parse
+        if expected is not None:
+            # One function per worker, so every program with two functions goes through the pool
+            errors = ParallelSemanticAnalyzer(workers=2, min_functions=1).analyze(
+                Parser(Lexer(source_code).tokenize()).parse())['errors']
+            if errors != expected:
+                return f"parallel analysis reported {errors}, expected {expected}"
+        return find_incremental_mismatch(source_code)
+
+def run_analysis_test(name, source_code):
+    """Check that parallel and incremental analysis report exactly the serial analyzer's errors"""
+    print(f"\n{'=' * 50}")
+    print(f"ANALYZER EQUIVALENCE TEST: {name}")
+    print(f"{'=' * 50}")
+    
+    mismatch = find_analysis_mismatch(source_code)
+    if mismatch:
+        print(f"\n❌ SEMANTICS: {mismatch}")
+        return False
+    print("\n✅ SEMANTICS: Parallel and incremental analysis agree with the serial analyzer")
+    return True
+
+def find_optimizer_mismatch(test):
+    """Return which of an optimizer test's expected_code snippets its
+    optimized C lacks, or which unexpected_code snippets it still has, or None"""
+    result = IRBuilder().analyze(Parser(Lexer(test["source"]).tokenize()).parse())
+    if not result['success']:
+        return f"analysis failed: {result['errors']}"
+    optimize(result['ir'], test.get("opt_level", 1))
+    c_code = CodeGenerator().generate(result['ir'])
+    for snippet in test.get("expected_code", []):
+        if snippet not in c_code:
+            return f"'{snippet}' not in the optimized C"
+    for snippet in test.get("unexpected_code", []):
+        if snippet in c_code:
+            return f"'{snippet}' still in the optimized C"
+    return None
+
+def run_optimizer_test(test):
+    """Check what an optimizer test's -O1 C contains, then its output"""
+    print(f"\n{'=' * 50}")
+    print(f"OPTIMIZER TEST: {test['name']}")
+    print(f"{'=' * 50}")
+    
+    mismatch = find_optimizer_mismatch(test)
+    if mismatch:
+        print(f"\n❌ OPTIMIZED C: {mismatch}")
+        return False
+    print("\n✅ OPTIMIZED C: Contains what the optimizations should leave")
+    return run_generator_test(test["name"], test["source"], test.get("expected_output"),
+                              opt_level=test.get("opt_level", 1))
+
+def run_pipeline_test(name, source_code):
+    """Check that lowering reports exactly the analyzer's errors and that the
+    compiler only emits C for programs without any"""
+    print(f"\n{'=' * 50}")
+    print(f"IR PIPELINE TEST: {name}")
+    print(f"{'=' * 50}")
+    
+    mismatch = find_pipeline_mismatch(source_code)
+    if mismatch:
+        print(f"\n❌ SEMANTICS: {mismatch}")
+        return False
+    print("\n✅ SEMANTICS: IR builder and compiler agree with the analyzer")
+    return True
+
 # Test cases
 tests = [
     # Basic syntax tests
@@ -171,7 +602,7 @@ tests = [
             wapas 0;
         }
         """,
-        "expected": "VarDecl(ank, x, Literal(5))"
+        "expected": Pattern(VarDeclaration, "ank", "x", Pattern(Literal, "5"))
     },
     {
         "name": "Print Statements",
@@ -183,7 +614,7 @@ tests = [
             wapas 0;
         }
         """,
-        "expected": "Print(Literal(Hello, world!))"
+        "expected": Pattern(PrintStatement, Pattern(Literal, "Hello, world!"))
     },
     {
         "name": "If-Else Statements",
@@ -198,7 +629,7 @@ tests = [
             wapas 0;
         }
         """,
-        "expected": "If(Binary(Variable(x), <, Literal(10))"
+        "expected": Pattern(IfStatement, Pattern(Binary, Pattern(Variable, "x"), "<", Pattern(Literal, "10")))
     },
     {
         "name": "Logical Operators",
@@ -215,7 +646,10 @@ tests = [
             wapas 0;
         }
         """,
-        "expected": "Logical(Binary(Variable(x), >=, Literal(5)), aur, Binary(Variable(y), <=, Literal(4.0)))"
+        "expected": Pattern(Logical,
+                            Pattern(Binary, Pattern(Variable, "x"), ">=", Pattern(Literal, "5")),
+                            "aur",
+                            Pattern(Binary, Pattern(Variable, "y"), "<=", Pattern(Literal, "4.0")))
     },
     {
         "name": "While Loops",
@@ -229,7 +663,7 @@ tests = [
             wapas 0;
         }
         """,
-        "expected": "While(Binary(Variable(x), >, Literal(0))"
+        "expected": Pattern(WhileStatement, Pattern(Binary, Pattern(Variable, "x"), ">", Pattern(Literal, "0")))
     },
     {
         "name": "For Loops",
@@ -241,7 +675,9 @@ tests = [
             wapas 0;
         }
         """,
-        "expected": "For(VarDecl(ank, i, Literal(0)), Binary(Variable(i), <, Literal(5))"
+        "expected": Pattern(ForStatement,
+                            Pattern(VarDeclaration, "ank", "i", Pattern(Literal, "0")),
+                            Pattern(Binary, Pattern(Variable, "i"), "<", Pattern(Literal, "5")))
     },
     {
         "name": "Complex Expressions",
@@ -256,7 +692,7 @@ tests = [
             wapas 0;
         }
         """,
-        "expected": "Unary(nahi, Grouping(Binary(Variable(a), <, Variable(b))))"
+        "expected": Pattern(Unary, "nahi", Pattern(Grouping, Pattern(Binary, Pattern(Variable, "a"), "<", Pattern(Variable, "b"))))
     },
     
     # Semantic tests
@@ -268,7 +704,7 @@ tests = [
             wapas 0;
         }
         """,
-        "expected": "VarDecl(ank, x, Literal(This is not an integer))",
+        "expected": Pattern(VarDeclaration, "ank", "x", Pattern(Literal, "This is not an integer")),
         "expect_semantic_errors": ["Cannot assign", "to variable 'x' of type ank"]
     },
     {
@@ -279,7 +715,7 @@ tests = [
             wapas 0;
         }
         """,
-        "expected": "Print(Variable(undefined_var))",
+        "expected": Pattern(PrintStatement, Pattern(Variable, "undefined_var")),
         "expect_semantic_errors": ["Variable 'undefined_var' is not defined"]
     },
     {
@@ -293,7 +729,7 @@ tests = [
             wapas 0;
         }
         """,
-        "expected": "If(Binary(Variable(x), +, Literal(3))",
+        "expected": Pattern(IfStatement, Pattern(Binary, Pattern(Variable, "x"), "+", Pattern(Literal, "3"))),
         "expect_semantic_errors": ["Condition in if statement must be a boolean expression"]
     },
     {
@@ -306,7 +742,7 @@ tests = [
             wapas 0;
         }
         """,
-        "expected": "Binary(Variable(x), +, Variable(msg))",
+        "expected": Pattern(Binary, Pattern(Variable, "x"), "+", Pattern(Variable, "msg")),
         "expect_semantic_errors": ["Cannot assign vakya to variable 'result'"]
     },
     {
@@ -322,7 +758,7 @@ tests = [
             wapas 0;
         }
         """,
-        "expected": "FuncDecl(add, [Param(ank, a), Param(ank, b)], Token(TokenType.INT, 'ank'"
+        "expected": Pattern(FunctionDeclaration, "add", [Pattern(Parameter, "ank", "a"), Pattern(Parameter, "ank", "b")], "ank")
     },
     {
         "name": "Nested Scope Variables",
@@ -337,7 +773,7 @@ tests = [
             wapas 0;
         }
         """,
-        "expected": "Block([VarDecl(ank, x, Literal(20)), Print(Variable(x))])"
+        "expected": Pattern(BlockStatement, [Pattern(VarDeclaration, "ank", "x", Pattern(Literal, "20")), Pattern(PrintStatement, Pattern(Variable, "x"))])
     },
     {
         "name": "Complex Type Checking",
@@ -355,8 +791,40 @@ tests = [
             wapas 0;
         }
         """,
-        "expected": "Binary(Variable(a), ==, Variable(ch))",
+        "expected": Pattern(Binary, Pattern(Variable, "a"), "==", Pattern(Variable, "ch")),
         "expect_semantic_errors": ["Cannot compare"]
+    },
+    {
+        "name": "Function Argument Checking",
+        "source": """
+        vidhi scale(ank x, sankhya factor) sankhya {
+            wapas x * factor;
+        }
+        
+        vidhi main() {
+            sankhya a = scale(2, 3);
+            sankhya b = scale(2);
+            sankhya c = scale("two", 1.5);
+            wapas 0;
+        }
+        """,
+        "expected": Pattern(FunctionDeclaration, "scale", [Pattern(Parameter, "ank", "x"), Pattern(Parameter, "sankhya", "factor")], "sankhya"),
+        "expect_semantic_errors": ["Function 'scale' expects 2 arguments, got 1",
+                                   "Cannot pass vakya as argument 1 of 'scale', which expects ank"]
+    },
+    {
+        "name": "Calling a Void Function",
+        "source": """
+        vidhi greet(vakya name) {
+            likho(name);
+        }
+        
+        vidhi main() {
+            greet("duniya");
+            wapas 0;
+        }
+        """,
+        "expected": Pattern(FunctionDeclaration, "greet", [Pattern(Parameter, "vakya", "name")], None)
     }
 ]
 
@@ -563,6 +1031,302 @@ code_gen_tests = [
     }
 ]
 
+# Machine-generated programs whose expressions nest far deeper than the
+# Python recursion limit; they only go through code generation
+deep_expression_tests = [
+    {
+        "name": "Long Addition Chain",
+        "source": "vidhi main() {\n    ank total = 0" + " + 1" * 5000 + ";\n    likho(total);\n    wapas 0;\n}",
+        "expected_output": "5000"
+    },
+    {
+        "name": "Long Condition Chain",
+        "source": "vidhi main() {\n    ank x = 3;\n    agar (nahi (x == 0)" + " aur x > 1" * 3000
+                  + ") {\n        likho(x * 2 - 1);\n    }\n    wapas 0;\n}",
+        "expected_output": "5"
+    },
+    {
+        # Two functions, so ParallelIRBuilder sends the chain back from a worker
+        "name": "Long Chain in a Called Function",
+        "source": "vidhi total() ank {\n    wapas 0" + " + 1" * 5000 + ";\n}\n\nvidhi main() {\n    likho(total());\n    wapas 0;\n}",
+        "expected_output": "5000"
+    }
+]
+
+# Multi-function programs for the parallel and incremental analysis checks,
+# with top-level declarations between functions; every source in tests and
+# code_gen_tests is checked as well
+analysis_tests = [
+    {
+        "name": "Globals Between Functions",
+        "source": """
+        ank g = 1;
+        vidhi first(ank x) ank { wapas x + g + h; }
+        ank h = 2;
+        vidhi second() ank { wapas first(h) + h; }
+        vidhi third() { likho(first("s")); likho(second(1)); likho(fourth()); }
+        vidhi fourth() ank { wapas 4; }
+        ank g = 3;
+        vidhi main() { third(); ank g = 5; likho(g); wapas 0; }
+        likho(g + main());
+        """
+    },
+    {
+        # Three equal parts, so the incremental check analyses the first and
+        # last before the middle one changes what the reused main's call
+        # resolves to
+        "name": "Signature Changed by an Edit",
+        "source": "".join(part.ljust(64) for part in (
+            "ank g = 1;\nvidhi twice(ank x) ank { wapas x * 2; }\n",
+            "vidhi twice(vakya s) vakya { wapas s; }\nank h = 2;\n",
+            "ank spacer = 0;\nvidhi main() { likho(twice(g) + h); wapas 0; }\n"))
+    },
+    {
+        "name": "Errors in Every Function",
+        "source": "\n".join(f"vidhi f{i}(ank n) ank {{ vakya s = n; wapas f{i}(s); }}" for i in range(9))
+                  + "\nvidhi main() { wapas f8(1, 2); }"
+    },
+    {
+        # -O2 only propagates scale and hoists times() when the functions
+        # lowered in worker processes share the global Symbols
+        "name": "Globals Shared by Functions",
+        "source": """
+        ank scale = 3;
+        vidhi times(ank x) ank { wapas x * scale; }
+        vidhi main() {
+            ank total = 0;
+            karo (ank i = 0; i < 4; i = i + 1) {
+                total = total + times(scale) + i;
+            }
+            likho(total);
+            wapas 0;
+        }
+        """
+    }
+]
+
+# Programs for the optimization passes, run at opt_level (default 1): the
+# optimized C must contain every expected_code snippet and no
+# unexpected_code one, and still print expected_output; every code
+# generation test is also run at -O2
+optimizer_tests = [
+    {
+        "name": "Constant Limit and Literal Arithmetic",
+        "source": """
+        vidhi main() {
+            ank limit = 3;
+            ank x = 4;
+            ank y = 2 * 3 + x;
+            karo (ank i = 0; i < limit; i = i + 1) {
+                likho(i);
+            }
+            likho(y);
+        }
+        """,
+        "expected_code": ["(i < 3)", "printf(\"%d\\n\", 10);"],
+        "unexpected_code": ["int limit", "int y"],
+        "expected_output": "0\n1\n2\n10"
+    },
+    {
+        "name": "Branches With Constant Conditions",
+        "source": """
+        ank mode = 2;
+        vidhi main() {
+            agar (mode > 1 aur nahi (mode == 3)) {
+                likho("fast");
+            } nahi_to {
+                likho("slow");
+            }
+            jabtak (mode < 0) {
+                likho("never");
+            }
+            likho("done");
+        }
+        """,
+        "expected_code": ["{\n        printf(\"%s\\n\", \"fast\");\n    }"],
+        "unexpected_code": ["if (", "while (", "slow", "never"],
+        "expected_output": "fast\ndone"
+    },
+    {
+        "name": "Unsafe Folds Left Alone",
+        "source": """
+        ank big = 2147483647;
+        vidhi overflow() ank { wapas big + 1; }
+        vidhi divide(ank n) ank { wapas n / 0; }
+        vidhi main() {
+            likho(-7 / 2);
+            likho(big);
+        }
+        """,
+        "expected_code": ["(2147483647 + 1)", "(n / 0)", "(-3)"],
+        "expected_output": "-3\n2147483647"
+    },
+    {
+        "name": "Reassigned Variables Kept",
+        "source": """
+        vidhi main() {
+            ank count = 1;
+            ank step = 2;
+            sankhya scale = 2;
+            count = count + step;
+            likho(count);
+            likho(scale * step);
+        }
+        """,
+        "expected_code": ["int count = 1;", "(count + 2)", "(scale * 2.0)"],
+        "unexpected_code": ["int step"],
+        "expected_output": "3\n4.0"
+    },
+    {
+        "name": "Invariant Loop Bound and Body",
+        "source": """
+        vidhi total(ank n, ank m) ank {
+            ank sum = 0;
+            karo (ank i = 0; i < n * m; i = i + 1) {
+                sum = sum + 1;
+            }
+            karo (ank k = 0; k < 3; k = k + 1) {
+                sum = sum + (n + m) * 2;
+            }
+            wapas sum;
+        }
+        vidhi main() {
+            likho(total(2, 3));
+        }
+        """,
+        "opt_level": 2,
+        "expected_code": ["int _inv0 = (n * m);", "(i < _inv0)", "int _inv1 = ((n + m) * 2);", "sum = (sum + _inv1);"],
+        "expected_output": "36"
+    },
+    {
+        "name": "Only Pure Calls Hoisted",
+        "source": """
+        ank calls = 0;
+        vidhi square(ank x) ank { wapas x * x; }
+        vidhi counted(ank x) ank { calls = calls + 1; wapas x; }
+        vidhi half(ank x) ank { wapas x / 2; }
+        vidhi main() {
+            ank k = 3;
+            ank sum = 0;
+            k = k + 1;
+            karo (ank j = 0; j < 3; j = j + 1) {
+                sum = sum + square(k) + counted(k) + half(k) + k / 2;
+            }
+            likho(sum);
+            likho(calls);
+        }
+        """,
+        "opt_level": 2,
+        "expected_code": ["int _inv0 = square(k);", "counted(k)", "half(k)", "(k / 2)"],
+        "unexpected_code": ["_inv1"],
+        "expected_output": "72\n3"
+    },
+    {
+        "name": "Invariant in Nested Loops",
+        "source": """
+        vidhi grid(ank w, ank h) ank {
+            ank cells = 0;
+            karo (ank y = 0; y < 2; y = y + 1) {
+                karo (ank x = 0; x < 3; x = x + 1) {
+                    cells = cells + w * h;
+                }
+            }
+            wapas cells;
+        }
+        vidhi main() {
+            likho(grid(3, 2));
+        }
+        """,
+        "opt_level": 2,
+        "expected_code": ["int _inv0 = (w * h);\n        for (int y = 0;", "cells = (cells + _inv0);"],
+        "expected_output": "36"
+    },
+    {
+        "name": "Overflow Not Hoisted From Zero-Trip Loop",
+        "source": """
+        vidhi main() {
+            ank big = 2147483647;
+            ank n = 0;
+            karo (ank i = 0; i < n; i = i + 1) {
+                likho(big + 1);
+            }
+            likho(n);
+        }
+        """,
+        "opt_level": 2,
+        "unexpected_code": ["_inv"],
+        "expected_output": "0"
+    },
+    {
+        "name": "Overflow Not Hoisted From Agar",
+        "source": """
+        vidhi scan(ank big) {
+            ank j = 0;
+            jabtak (j < 3) {
+                agar (big < 0) {
+                    likho(big * 2);
+                }
+                likho(j);
+                j = j + 1;
+            }
+        }
+        vidhi main() {
+            scan(2147483647);
+        }
+        """,
+        "opt_level": 2,
+        "expected_code": ["int _inv0 = (big < 0);", "if (_inv0)", "(big * 2)"],
+        "unexpected_code": ["_inv1"],
+        "expected_output": "0\n1\n2"
+    }
+]
+
+# Sources that exercise lexer corner cases; every source in tests and
+# code_gen_tests is checked as well
+lexer_tests = [
+    {
+        "name": "Escapes and Unterminated Literals",
+        "source": 'vakya s = "tab\\there \\"quoted\\" \\\\";\nakshar c = \'\\n\';\nakshar q = \'\\\'\';\nvakya open = "never closed'
+    },
+    {
+        "name": "Multi-line String",
+        "source": 'vakya s = "line one\nline two";\nank x = 1;  # trailing comment\n'
+    },
+    {
+        "name": "Stray Characters",
+        "source": "a % b [c] ! d . 1.2.3 == != <= >= 'x"
+    },
+    {
+        "name": "Non-ASCII Identifiers and Whitespace",
+        "source": "ank gati\u00e9 = 1;\u00a0likho(gati\u00e9);\nvakya s = \"\u0928\u092e\u0938\u094d\u0924\u0947\";\u2028ank x = 12\u00b2;"
+    }
+]
+
+# Expression sources for the parser equivalence check, including ones that
+# must fail identically; every source in tests and code_gen_tests is checked too
+parser_tests = [
+    {
+        "name": "Precedence and Associativity",
+        "source": "x = a - b - c * d / e % f + -g * -(h) < i == j != k >= l aur m ya n aur nahi o;"
+    },
+    {
+        "name": "Chained Assignment and Calls",
+        "source": "a = b = f(g(1, 2.5), -h(x)(y), \"s\", 'c') * (c = d);"
+    },
+    {
+        "name": "Invalid Assignment Target",
+        "source": "a + b = c;"
+    },
+    {
+        "name": "Missing Operand",
+        "source": "likho(a * (b + ));"
+    },
+    {
+        "name": "Nested Function Bodies",
+        "source": "vidhi outer() { vidhi inner() { { likho(\"}\"); } } agar (x) { y = '{'; } }\nvidhi broken() { likho(1 +); }\nvidhi main() { outer(); }"
+    }
+]
+
 def run_all_tests():
     """Run all test cases and report results"""
     passed = 0
@@ -593,9 +1357,9 @@ def run_all_tests():
     print(f"{'=' * 50}")
     
     gen_passed = 0
-    gen_total = len(code_gen_tests)
+    gen_total = len(code_gen_tests) + len(deep_expression_tests)
     
-    for test in code_gen_tests:
+    for test in code_gen_tests + deep_expression_tests:
         if run_generator_test(
             test["name"], 
             test["source"], 
@@ -607,9 +1371,64 @@ def run_all_tests():
     print(f"CODE GENERATION SUMMARY: {gen_passed}/{gen_total} tests passed")
     print(f"{'=' * 50}")
     
+    # Run lexer engine tests over every known source
+    lex_sources = lexer_tests + [{"name": test["name"], "source": test["source"]}
+                                 for test in tests + code_gen_tests]
+    lex_passed = sum(1 for test in lex_sources if run_lexer_test(test["name"], test["source"]))
+    lex_total = len(lex_sources)
+    
+    print(f"\n{'=' * 50}")
+    print(f"LEXER SUMMARY: {lex_passed}/{lex_total} tests passed")
+    print(f"{'=' * 50}")
+    
+    # Run parser equivalence tests over every known source
+    parse_sources = parser_tests + [{"name": test["name"], "source": test["source"]}
+                                    for test in tests + code_gen_tests]
+    parse_passed = sum(1 for test in parse_sources if run_parser_test(test["name"], test["source"]))
+    # Expressions too deep to repr are checked through the cache alone
+    parse_passed += sum(1 for test in deep_expression_tests if run_cache_test(test["name"], test["source"]))
+    parse_total = len(parse_sources) + len(deep_expression_tests)
+    
+    print(f"\n{'=' * 50}")
+    print(f"PARSER SUMMARY: {parse_passed}/{parse_total} tests passed")
+    print(f"{'=' * 50}")
+    
+    # Run parallel and incremental semantic analysis over every known source
+    analysis_sources = analysis_tests + tests + code_gen_tests
+    analysis_passed = sum(1 for test in analysis_sources if run_analysis_test(test["name"], test["source"]))
+    analysis_total = len(analysis_sources)
+    
+    print(f"\n{'=' * 50}")
+    print(f"ANALYZER EQUIVALENCE SUMMARY: {analysis_passed}/{analysis_total} tests passed")
+    print(f"{'=' * 50}")
+    
+    # Run the IR pipeline checks: every basic, code generation and analysis
+    # test must lower, serially and in worker processes, with the analyzer's
+    # errors, and give C only when there are none
+    pipeline_sources = tests + code_gen_tests + deep_expression_tests + analysis_tests
+    pipeline_passed = sum(1 for test in pipeline_sources if run_pipeline_test(test["name"], test["source"]))
+    pipeline_total = len(pipeline_sources)
+    
+    print(f"\n{'=' * 50}")
+    print(f"IR PIPELINE SUMMARY: {pipeline_passed}/{pipeline_total} tests passed")
+    print(f"{'=' * 50}")
+    
+    # Run the optimization passes: the optimizer tests check the optimized C,
+    # and every code generation test must still produce the expected output
+    opt_passed = sum(1 for test in optimizer_tests if run_optimizer_test(test))
+    opt_passed += sum(1 for test in code_gen_tests + deep_expression_tests
+                      if run_generator_test(test["name"], test["source"], test.get("expected_output"), opt_level=2))
+    opt_total = len(optimizer_tests) + len(code_gen_tests) + len(deep_expression_tests)
+    
+    print(f"\n{'=' * 50}")
+    print(f"OPTIMIZER SUMMARY: {opt_passed}/{opt_total} tests passed")
+    print(f"{'=' * 50}")
+    
     # Overall summary
+    all_passed = passed + gen_passed + lex_passed + parse_passed + analysis_passed + pipeline_passed + opt_passed
+    all_total = total + gen_total + lex_total + parse_total + analysis_total + pipeline_total + opt_total
     print(f"\n{'=' * 50}")
-    print(f"OVERALL SUMMARY: {passed + gen_passed}/{total + gen_total} tests passed")
+    print(f"OVERALL SUMMARY: {all_passed}/{all_total} tests passed")
     print(f"{'=' * 50}")
 
 if __name__ == "__main__":
@@ -0,0 +1,20 @@
+# util.py
+
+import gc
+from contextlib import contextmanager
+
+@contextmanager
+def gc_paused():
+    """Pause the cyclic GC while (un)pickling.
+
+    An AST is hundreds of thousands of small acyclic objects; letting the
+    collector rescan them while they are created or walked makes loading and
+    storing several times slower.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()